@@ -0,0 +1,307 @@
+"""Measure the throughput of score conversion and rendering.
+
+Synthetic event trees of different shapes and sizes are converted with
+:class:`mutwo.csound_converters.EventToCsoundScore` and rendered with
+:class:`mutwo.csound_converters.EventToSoundFile`. To only measure the
+python side of rendering, a stub csound binary (which doesn't synthesize
+anything) is used. Results are saved as JSON, so that different runs
+can be compared.
+
+Run with::
+
+    python benchmarks/conversion_benchmarks.py --output results.json
+
+Measure bigger trees (up to 1e7 chronons, this takes a while and needs
+several GB of memory) with::
+
+    python benchmarks/conversion_benchmarks.py --max-chronon-count 10000000
+
+Compare two runs with::
+
+    python benchmarks/conversion_benchmarks.py --output new.json --compare old.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from mutwo import core_events
+from mutwo import csound_converters
+
+CHRONON_COUNT_TUPLE = (1000, 10000, 100000, 1000000, 10000000)
+DEEP_TREE_DEPTH = 100
+WIDE_TREE_CONSECUTION_SIZE = 10
+
+STUB_CSOUND = """#!{executable}
+import sys
+
+arguments = sys.argv[1:]
+if arguments == ["--version"]:
+    sys.stderr.write("Csound version 0.0 (stub)\\n")
+    sys.exit(0)
+# Read the whole score like csound does.
+with open(arguments[-1], "rb") as f:
+    while f.read(2**16):
+        pass
+with open(arguments[arguments.index("-o") + 1], "wb") as f:
+    f.write(b"RIFF")
+sys.stderr.write("0 errors in performance\\n")
+"""
+
+
+class Note(core_events.Chronon):
+    def __init__(self, duration, hertz, amplitude, path):
+        super().__init__(duration)
+        self.hertz = hertz
+        self.amplitude = amplitude
+        self.path = path
+
+
+def make_note(nth_note):
+    return Note(
+        0.25 + (nth_note % 7) * 0.125,
+        100 + nth_note % 300,
+        0.5,
+        f"samples/sample{nth_note % 5}.wav",
+    )
+
+
+def make_flat_tree(chronon_count):
+    return core_events.Consecution([make_note(i) for i in range(chronon_count)])
+
+
+def make_deep_tree(chronon_count):
+    """Nested consecutions and concurrences with DEEP_TREE_DEPTH levels."""
+
+    chronon_count_per_level = max(chronon_count // DEEP_TREE_DEPTH, 1)
+    event = core_events.Consecution([])
+    nth_note = 0
+    for nth_level in range(DEEP_TREE_DEPTH):
+        if nth_note >= chronon_count:
+            break
+        compound_type = (core_events.Concurrence, core_events.Consecution)[
+            nth_level % 2
+        ]
+        level_chronon_count = min(chronon_count_per_level, chronon_count - nth_note)
+        note_list = [make_note(nth_note + i) for i in range(level_chronon_count)]
+        nth_note += level_chronon_count
+        if compound_type is core_events.Concurrence:
+            event = core_events.Concurrence(
+                [core_events.Consecution(note_list), event]
+            )
+        else:
+            event = core_events.Consecution(note_list + [event])
+    return event
+
+
+def make_wide_tree(chronon_count):
+    """One concurrence with many short consecutions."""
+
+    return core_events.Concurrence(
+        [
+            core_events.Consecution(
+                [
+                    make_note(i + j)
+                    for j in range(min(WIDE_TREE_CONSECUTION_SIZE, chronon_count - i))
+                ]
+            )
+            for i in range(0, chronon_count, WIDE_TREE_CONSECUTION_SIZE)
+        ]
+    )
+
+
+TREE_DICT = {
+    "flat": make_flat_tree,
+    "deep": make_deep_tree,
+    "wide": make_wide_tree,
+    # Same structure as 'flat', but with string p-fields.
+    "string": make_flat_tree,
+}
+
+
+def make_event_to_csound_score(tree):
+    if tree == "string":
+        return csound_converters.EventToCsoundScore(
+            p4=lambda event: event.path,
+            p5=lambda event: f"{event.hertz}Hz",
+            p6=lambda event: event.path.upper(),
+        )
+    return csound_converters.EventToCsoundScore(
+        p4=lambda event: event.hertz,
+        p5=lambda event: event.amplitude,
+    )
+
+
+def make_stub_csound(directory):
+    path = os.path.join(directory, "csound")
+    with open(path, "w") as f:
+        f.write(STUB_CSOUND.format(executable=sys.executable))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def measure(function, repeat_count):
+    """Return the best duration of ``repeat_count`` calls and the last result."""
+
+    best_duration, result = float("inf"), None
+    for _ in range(repeat_count):
+        start = time.perf_counter()
+        result = function()
+        best_duration = min(best_duration, time.perf_counter() - start)
+    return best_duration, result
+
+
+def measure_peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(tree, chronon_count, directory, repeat_count, is_memory_measured):
+    event = TREE_DICT[tree](chronon_count)
+    event_to_csound_score = make_event_to_csound_score(tree)
+    event_to_sound_file = csound_converters.EventToSoundFile(
+        os.path.join(directory, "stub.orc"),
+        event_to_csound_score,
+        remove_score_file=True,
+    )
+    score_path = os.path.join(directory, "score.sco")
+    sound_file_path = os.path.join(directory, "sound.wav")
+
+    def count_lines():
+        line_count = 0
+        for _ in event_to_csound_score.iter_lines(event):
+            line_count += 1
+        return line_count
+
+    iter_duration, line_count = measure(count_lines, repeat_count)
+    convert_duration, _ = measure(
+        lambda: event_to_csound_score.convert(event, score_path), repeat_count
+    )
+    render_duration, _ = measure(
+        lambda: event_to_sound_file.convert(event, sound_file_path), repeat_count
+    )
+    result = {
+        "tree": tree,
+        "chronon_count": chronon_count,
+        "line_count": line_count,
+        "score_byte_count": os.path.getsize(score_path),
+        "lines_per_second": line_count / iter_duration,
+        "iter_lines_duration": iter_duration,
+        "convert_duration": convert_duration,
+        # Time which is spent on writing the lines to the score file.
+        "write_duration": max(convert_duration - iter_duration, 0),
+        "render_duration": render_duration,
+        "peak_memory_byte_count": None,
+    }
+    if is_memory_measured:
+        result["peak_memory_byte_count"] = measure_peak_memory(
+            lambda: event_to_csound_score.convert(event, score_path)
+        )
+    os.remove(score_path)
+    return result
+
+
+def get_metadata():
+    try:
+        commit = subprocess.run(
+            ("git", "rev-parse", "HEAD"),
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.datetime.now().isoformat(),
+        "commit": commit,
+        "python": sys.version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(result_list, path):
+    with open(path, "r") as f:
+        other_result_list = json.load(f)["results"]
+    other_result_dict = {
+        (result["tree"], result["chronon_count"]): result
+        for result in other_result_list
+    }
+    print(f"\ncompared to '{path}' (> 1 means faster):")
+    for result in result_list:
+        key = (result["tree"], result["chronon_count"])
+        if key not in other_result_dict:
+            continue
+        other_result = other_result_dict[key]
+        print(
+            f"{key[0]:>8} {key[1]:>10} "
+            f"lines/s: {result['lines_per_second'] / other_result['lines_per_second']:6.2f}x "
+            f"convert: {other_result['convert_duration'] / result['convert_duration']:6.2f}x "
+            f"render: {other_result['render_duration'] / result['render_duration']:6.2f}x"
+        )
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argument_parser.add_argument(
+        "--output", default="benchmark_results.json", help="where to save results"
+    )
+    argument_parser.add_argument(
+        "--tree", nargs="*", choices=tuple(TREE_DICT), default=tuple(TREE_DICT)
+    )
+    argument_parser.add_argument("--max-chronon-count", type=int, default=100000)
+    argument_parser.add_argument("--repeat-count", type=int, default=3)
+    argument_parser.add_argument(
+        "--skip-memory",
+        action="store_true",
+        help="don't measure peak memory (which is slow for big trees)",
+    )
+    argument_parser.add_argument("--compare", help="JSON file of an earlier run")
+    arguments = argument_parser.parse_args()
+
+    result_list = []
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "stub.orc"), "w") as f:
+            f.write("instr 1\nendin\n")
+        csound_converters.configurations.CSOUND_BINARY = make_stub_csound(directory)
+        for tree in arguments.tree:
+            for chronon_count in CHRONON_COUNT_TUPLE:
+                if chronon_count > arguments.max_chronon_count:
+                    break
+                result = benchmark(
+                    tree,
+                    chronon_count,
+                    directory,
+                    arguments.repeat_count,
+                    not arguments.skip_memory,
+                )
+                result_list.append(result)
+                print(
+                    f"{tree:>8} {chronon_count:>10} "
+                    f"{result['lines_per_second']:12.0f} lines/s "
+                    f"convert {result['convert_duration']:8.3f}s "
+                    f"write {result['write_duration']:8.3f}s "
+                    f"render {result['render_duration']:8.3f}s "
+                    f"peak {(result['peak_memory_byte_count'] or 0) / 2**20:8.1f}MiB"
+                )
+
+    with open(arguments.output, "w") as f:
+        json.dump({"metadata": get_metadata(), "results": result_list}, f, indent=2)
+    if arguments.compare:
+        compare(result_list, arguments.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Measure how many csound score lines per second are generated.
+
+Compares the per-field string concatenation which was used by
+:class:`mutwo.csound_converters.EventToCsoundScore` until version 0.8.0
+with the compiled csound score line builder.
+
+Run with::
+
+    python benchmarks/score_line_benchmarks.py
+"""
+
+import time
+
+from mutwo import core_events
+from mutwo import core_parameters
+from mutwo import csound_converters
+
+CHRONON_COUNT = 100000
+REPEAT_COUNT = 5
+
+
+class Note(core_events.Chronon):
+    def __init__(self, duration, hertz, amplitude, path):
+        super().__init__(duration)
+        self.hertz = hertz
+        self.amplitude = amplitude
+        self.path = path
+
+
+def legacy_convert_chronon(converter, chronon, absolute_entry_delay):
+    """Reference implementation of ``_convert_chronon`` of version 0.8.0."""
+
+    csound_score_line = "i"
+    for nth_p_field, p_field_function in enumerate(converter.pfield_tuple):
+        if nth_p_field == 1 and p_field_function is None:
+            csound_score_line += " {}".format(absolute_entry_delay.beat_count)
+        else:
+            try:
+                p_field_value = p_field_function(chronon)
+            except AttributeError:
+                return tuple([])
+            p_field_value = converter._process_p_field_value(
+                nth_p_field, p_field_value
+            )
+            if p_field_value is not None:
+                csound_score_line += " {}".format(p_field_value)
+    return (csound_score_line,)
+
+
+def compiled_convert_chronon(converter, chronon, absolute_entry_delay):
+    return converter._convert_chronon(chronon, absolute_entry_delay)
+
+
+def legacy_p3(event):
+    """Default p3 function of version 0.8.0."""
+    return event.duration.beat_count if event.duration > 0 else None
+
+
+def measure_lines_per_second(convert_chronon, converter, chronon_list, delay_list):
+    best_duration = float("inf")
+    for _ in range(REPEAT_COUNT):
+        start = time.perf_counter()
+        for chronon, absolute_entry_delay in zip(chronon_list, delay_list):
+            convert_chronon(converter, chronon, absolute_entry_delay)
+        best_duration = min(best_duration, time.perf_counter() - start)
+    return len(chronon_list) / best_duration
+
+
+def main():
+    pfield = dict(
+        p4=lambda event: event.hertz,
+        p5=lambda event: event.amplitude,
+        p6=lambda event: event.path,
+        p7=lambda event: 1,
+    )
+    legacy_converter = csound_converters.EventToCsoundScore(p3=legacy_p3, **pfield)
+    converter = csound_converters.EventToCsoundScore(**pfield)
+    chronon_list = [
+        Note(0.25 + (i % 7) * 0.125, 100 + i % 300, 0.5, f"sample{i % 5}.wav")
+        for i in range(CHRONON_COUNT)
+    ]
+    delay_list = [core_parameters.DirectDuration(i * 0.25) for i in range(CHRONON_COUNT)]
+
+    for chronon, absolute_entry_delay in zip(chronon_list[:1000], delay_list):
+        assert legacy_convert_chronon(
+            legacy_converter, chronon, absolute_entry_delay
+        ) == compiled_convert_chronon(converter, chronon, absolute_entry_delay)
+
+    legacy = measure_lines_per_second(
+        legacy_convert_chronon, legacy_converter, chronon_list, delay_list
+    )
+    compiled = measure_lines_per_second(
+        compiled_convert_chronon, converter, chronon_list, delay_list
+    )
+    print(f"legacy:   {legacy:12.0f} lines/s")
+    print(f"compiled: {compiled:12.0f} lines/s")
+    print(f"speedup:  {compiled / legacy:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
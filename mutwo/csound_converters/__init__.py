@@ -1,11 +1,17 @@
 from . import configurations
 from . import constants
+from . import sound_files
 
+from .caches import *
+from .pools import *
 from .csound import *
+from .streams import *
 
-from . import csound
+from . import caches, csound, pools, streams
 
-__all__ = csound.__all__
+from mutwo import core_utilities
+
+__all__ = core_utilities.get_all(caches, csound, pools, streams)
 
 # Force flat structure
-del csound
+del caches, core_utilities, csound, pools, streams
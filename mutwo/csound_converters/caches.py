@@ -0,0 +1,250 @@
+"""Cache rendered sound files on disk.
+
+Csound renders are fully determined by their score, orchestra, flags
+and by the csound version. Therefore a render can be skipped if a file
+with exactly these inputs has already been rendered before.
+"""
+
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import typing
+
+from mutwo import csound_converters
+
+__all__ = ("RenderCache",)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_csound_version(csound_binary: str) -> str:
+    """Ask csound for its version (only once per binary)."""
+
+    completed_process = subprocess.run(
+        (csound_binary, "--version"), capture_output=True, text=True
+    )
+    for line in (completed_process.stderr + completed_process.stdout).splitlines():
+        if "version" in line.lower():
+            return line.strip()
+    return ""
+
+
+class RenderCache(object):
+    """Content-addressed on-disk cache for rendered sound files.
+
+    :param directory: Where cached sound files are stored. The directory is
+        created if it doesn't exist yet.
+    :type directory: str
+    :param max_size: Maximum size of all cached files in bytes. If the cache
+        grows larger, the least recently used files are deleted. If ``None``,
+        :const:`mutwo.csound_converters.configurations.RENDER_CACHE_MAX_SIZE`
+        is used. Default to ``None``.
+    :type max_size: typing.Optional[int]
+    :param csound_version: The csound version which is part of each key. If
+        ``None``, the version is asked from the csound binary. Default to
+        ``None``.
+    :type csound_version: typing.Optional[str]
+
+    The key of a render is a hash of the score file content, the orchestra
+    file content, the csound flags, the file extension of the sound file and
+    the csound version. On a cache hit the cached sound file is hard linked
+    (or copied, if hard links aren't possible) to the requested path.
+
+    **Example:**
+
+    >>> import tempfile
+    >>> from mutwo import csound_converters
+    >>> render_cache = csound_converters.RenderCache(tempfile.mkdtemp())
+    >>> converter = csound_converters.EventToSoundFile(
+    ...     'instr.orc',
+    ...     csound_converters.EventToCsoundScore(),
+    ...     render_cache=render_cache,
+    ... )
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: typing.Optional[int] = None,
+        csound_version: typing.Optional[str] = None,
+    ):
+        if max_size is None:
+            max_size = csound_converters.configurations.RENDER_CACHE_MAX_SIZE
+        self.directory = directory
+        self.max_size = max_size
+        self._csound_version = csound_version
+        self._lock = threading.Lock()
+        self.hit_count = 0
+        self.miss_count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # ###################################################################### #
+    #                          private methods                               #
+    # ###################################################################### #
+
+    @staticmethod
+    def _update_hash_by_file(hash_object: typing.Any, path: str):
+        with open(path, "rb") as f:
+            while chunk := f.read(2**20):
+                hash_object.update(chunk)
+
+    def _get_cache_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _get_cached_file_entry_list(self) -> list[os.DirEntry]:
+        # Hidden files are temporary files of unfinished 'store' calls.
+        return [
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.startswith(".")
+        ]
+
+    def _get_total_size(self) -> int:
+        return sum(
+            entry.stat().st_size for entry in self._get_cached_file_entry_list()
+        )
+
+    def _evict(self):
+        """Delete least recently used files until the cache is small enough."""
+
+        entry_list = sorted(
+            self._get_cached_file_entry_list(),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        total_size = sum(entry.stat().st_size for entry in entry_list)
+        for entry in entry_list:
+            if total_size <= self.max_size:
+                break
+            total_size -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    # ###################################################################### #
+    #                          properties                                    #
+    # ###################################################################### #
+
+    @property
+    def csound_version(self) -> str:
+        """The csound version which is part of each key."""
+        if self._csound_version is None:
+            self._csound_version = _get_csound_version(
+                csound_converters.configurations.CSOUND_BINARY
+            )
+        return self._csound_version
+
+    @property
+    def size(self) -> int:
+        """Size of all cached files in bytes."""
+        return self._get_total_size()
+
+    # ###################################################################### #
+    #                             public api                                 #
+    # ###################################################################### #
+
+    def get_key(
+        self,
+        score_path: str,
+        csound_orchestra_path: str,
+        flag_sequence: typing.Sequence[str],
+        path: str,
+        score_data: typing.Optional[bytes] = None,
+    ) -> str:
+        """Calculate the key of a render.
+
+        :param score_path: Path of the csound score file.
+        :type score_path: str
+        :param csound_orchestra_path: Path of the csound orchestra file.
+        :type csound_orchestra_path: str
+        :param flag_sequence: The flags which are passed to csound.
+        :type flag_sequence: typing.Sequence[str]
+        :param path: Path of the sound file. Only its extension is part
+            of the key.
+        :type path: str
+        :param score_data: The content of the csound score. If set, it is
+            used instead of the content of ``score_path`` (for scores which
+            are piped to csound). Default to ``None``.
+        :type score_data: typing.Optional[bytes]
+        """
+
+        hash_object = hashlib.sha256()
+        for text in (
+            self.csound_version,
+            os.path.splitext(path)[1],
+            "\0".join(flag_sequence),
+        ):
+            hash_object.update(text.encode())
+            hash_object.update(b"\0")
+        self._update_hash_by_file(hash_object, csound_orchestra_path)
+        hash_object.update(b"\0")
+        if score_data is None:
+            self._update_hash_by_file(hash_object, score_path)
+        else:
+            hash_object.update(score_data)
+        hash_object.update(b"\0")
+        return hash_object.hexdigest()
+
+    def load(self, key: str, path: str) -> bool:
+        """Write the cached sound file of ``key`` to ``path``.
+
+        :param key: The key of the render (see :meth:`get_key`).
+        :type key: str
+        :param path: Where the sound file shall be written to.
+        :type path: str
+        :return: ``True`` on a cache hit, ``False`` otherwise.
+        """
+
+        cache_path = self._get_cache_path(key)
+        try:
+            # Refresh modification time, so that eviction is LRU.
+            os.utime(cache_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.miss_count += 1
+            return False
+        if os.path.lexists(path):
+            os.remove(path)
+        try:
+            os.link(cache_path, path)
+        except OSError:
+            shutil.copyfile(cache_path, path)
+        with self._lock:
+            self.hit_count += 1
+        return True
+
+    def store(self, key: str, path: str):
+        """Add rendered sound file to the cache.
+
+        :param key: The key of the render (see :meth:`get_key`).
+        :type key: str
+        :param path: Path of the rendered sound file.
+        :type path: str
+        """
+
+        # Copy (instead of linking), so that later changes of 'path'
+        # never change a cached file.
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            prefix=".", dir=self.directory
+        )
+        os.close(file_descriptor)
+        try:
+            shutil.copyfile(path, temporary_path)
+            os.replace(temporary_path, self._get_cache_path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        with self._lock:
+            self._evict()
+
+    def clear(self):
+        """Remove all cached files and reset hit and miss counter."""
+
+        with self._lock:
+            for entry in self._get_cached_file_entry_list():
+                os.remove(entry.path)
+            self.hit_count = 0
+            self.miss_count = 0
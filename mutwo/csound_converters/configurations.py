@@ -3,6 +3,30 @@
 CSOUND_BINARY = "csound"
 """Path to csound binary."""
 
+CSOUND_TIMEOUT = None
+"""Default timeout in seconds for one csound render. ``None`` for no timeout."""
+
+CSOUND_WORKER_MAX_RENDER_COUNT = 100
+"""After how many renders an instance of a
+:class:`mutwo.csound_converters.CsoundWorkerPool` is replaced by a fresh one."""
+
+CSOUND_WORKER_RELEASE_DURATION = 1.0
+"""How many seconds an instance of a
+:class:`mutwo.csound_converters.CsoundWorkerPool` renders after the end of
+the last note of a score (so that the releases of the notes aren't cut off)."""
+
+SCORE_PIPE_PATH = "/dev/stdin"
+"""Score path which is passed to csound if the score is sent via the standard
+input of csound (see ``pipe_score`` of
+:class:`mutwo.csound_converters.EventToSoundFile`)."""
+
+SHARD_TAIL_DURATION = 0.05
+"""Default duration in seconds of the crossfade between two shards of
+:meth:`mutwo.csound_converters.EventToSoundFile.convert_sharded`."""
+
+RENDER_CACHE_MAX_SIZE = 2**32
+"""Default maximum size in bytes of a :class:`mutwo.csound_converters.RenderCache`."""
+
 CONSECUTION_ANNOTATION = ";; NEW CONSECUTION\n;;"
 """Annotation in Csound Score files when a new :class:`Consecution` starts."""
 
@@ -11,3 +35,23 @@ CONCURRENCE_ANNOTATION = ";; NEW CONCURRENCE\n;;"
 
 N_EMPTY_LINES_AFTER_COMPOUND = 1
 """How many empty lines shall be written to a Csound Score file after a :class:`Compound`."""
+
+SCORE_FILE_BUFFER_SIZE = 2**16
+"""Buffer size in bytes of the file handle which writes Csound Score files."""
+
+MAX_OPEN_CHUNK_FILE_COUNT = 64
+"""How many chunk files
+:meth:`mutwo.csound_converters.EventToCsoundScore.convert_chunked` keeps
+open at the same time while it splits a score by time."""
+
+P_FIELD_WARNING_SAMPLE_COUNT = 3
+"""How many invalid values per p-field are shown in the summary warning of
+:class:`mutwo.csound_converters.EventToCsoundScore`."""
+
+STREAM_LOOKAHEAD = 0.1
+"""Default time in seconds which lines are sent before their start by
+:class:`mutwo.csound_converters.EventToCsoundStream`."""
+
+COLUMN_BLOCK_SIZE = 2**16
+"""How many rows of column data are formatted at once by
+:class:`mutwo.csound_converters.EventToCsoundScore`."""
@@ -4,25 +4,404 @@ Csound is a `"domain-specific computer programming language
 for audio programming" <http://www.csounds.com/>`_.
 """
 
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import dataclasses
+import enum
+import fractions
+import functools
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
 import numbers
+import operator
 import os
+import re
+import shlex
+import subprocess
+import tempfile
+import threading
+import time
+import types
 import typing
 import warnings
 
 import natsort  # type: ignore
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore
+
 from mutwo import core_converters
 from mutwo import core_events
 from mutwo import core_constants
 from mutwo import core_parameters
 from mutwo import csound_converters
 
-__all__ = ("EventToCsoundScore", "EventToSoundFile")
+__all__ = (
+    "ColumnPField",
+    "ScoreSizeReport",
+    "ScoreChunk",
+    "ConversionReport",
+    "EventToCsoundScore",
+    "EventToSoundFile",
+    "RenderResult",
+    "CsoundError",
+    "InvalidPFieldValueTypeError",
+    "CsoundTimeoutError",
+)
 
 SupportedPFieldTypes = typing.Union[core_constants.Real, str]
 SupportedPFieldTypesForTypeChecker = typing.Union[numbers.Real, str]
 PFieldFunction = typing.Callable[[core_events.Chronon], SupportedPFieldTypes]
+PFieldColumnFunction = typing.Callable[[list[core_events.Chronon]], typing.Any]
 PFieldDict = dict[str, typing.Optional[PFieldFunction]]
+# p-field name (e.g. 'p4') => array-like with one value per i-statement
+PFieldColumnDict = dict[str, typing.Any]
+PFieldFormatter = typing.Callable[[core_events.Chronon], typing.Optional[str]]
+# Builders get the absolute entry delay as beat count.
+CsoundScoreLineBuilder = typing.Callable[
+    [core_events.Chronon, float], typing.Optional[str]
+]
+
+
+def _duration_p_field(event: core_events.Chronon) -> typing.Optional[float]:
+    # 'beat_count' is already rounded, so comparing the float is
+    # equal to (but much faster than) comparing the duration object.
+    beat_count = event.duration.beat_count
+    return beat_count if beat_count > 0 else None
+
+
+def _instrument_p_field(event: core_events.Chronon) -> int:
+    # Module level function (and not lambda), so that converters can
+    # be pickled.
+    return 1
+
+
+class ColumnPField(object):
+    """p-field function which extracts the values of many chronons at once.
+
+    :param function: Function which takes a list of chronons and returns
+        an array-like (for instance a :class:`numpy.ndarray`) with one
+        p-field value for each chronon.
+
+    If an :class:`EventToCsoundScore` has any :class:`ColumnPField`, all
+    flat :class:`~mutwo.core_events.Consecution` (which only contain
+    :class:`~mutwo.core_events.Chronon`) are converted column by column:
+    column functions are called once per consecution, p2 and p3 are
+    calculated as arrays and numbers are formatted for the whole column
+    at once. Ordinary p-field functions can still be used alongside
+    column functions. Chronons which are already known to be rests (see
+    ``rest_predicate`` of :class:`EventToCsoundScore`) aren't passed to
+    column functions. If a column function raises an :class:`AttributeError`
+    (for instance because the consecution contains unknown rests), the
+    column is calculated chronon by chronon. Column functions are also called with
+    a list of one chronon for chronons which aren't part of a flat
+    consecution. Values are formatted according to the dtype of the
+    returned array (a float array writes ``100.0`` where a python
+    ``int`` would write ``100``). This feature needs
+    `numpy <https://numpy.org>`_.
+
+    **Example:**
+
+    >>> import numpy as np
+    >>> from mutwo import csound_converters
+    >>> converter = csound_converters.EventToCsoundScore(
+    ...     p4=csound_converters.ColumnPField(
+    ...         lambda chronon_list: np.linspace(100, 200, len(chronon_list))
+    ...     )
+    ... )
+    """
+
+    def __init__(self, function: PFieldColumnFunction):
+        if np is None:
+            raise ImportError(
+                "'ColumnPField' needs numpy. Please install "
+                "'mutwo.csound[numpy]' or 'numpy'."
+            )
+        self.function = function
+
+    def __call__(self, chronon: core_events.Chronon) -> SupportedPFieldTypes:
+        p_field_value = np.asarray(self.function([chronon]))[0]
+        # Object arrays already return the plain python object
+        if isinstance(p_field_value, np.generic):
+            return p_field_value.item()
+        return p_field_value
+
+
+@dataclasses.dataclass(frozen=True)
+class ScoreSizeReport(object):
+    """Size of a written csound score file.
+
+    :param byte_count: Size of the score file in bytes.
+    :type byte_count: int
+    :param uncompacted_byte_count: Size the score file would have without
+        any compaction in bytes.
+    :type uncompacted_byte_count: int
+    """
+
+    byte_count: int
+    uncompacted_byte_count: int
+
+    @property
+    def reduction(self) -> float:
+        """How much smaller the score became (between 0 and 1)."""
+        if self.uncompacted_byte_count == 0:
+            return 0.0
+        return 1 - (self.byte_count / self.uncompacted_byte_count)
+
+
+@dataclasses.dataclass(frozen=True)
+class ScoreChunk(object):
+    """One file of a chunked csound score.
+
+    :param path: Path of the chunk file.
+    :type path: str
+    :param line_count: How many lines the chunk file contains.
+    :type line_count: int
+    :param branch_index: Index of the branch of the top-level
+        :class:`~mutwo.core_events.Concurrence` which has been converted
+        to this chunk. ``None`` if the converted event isn't a
+        :class:`~mutwo.core_events.Concurrence`.
+    :type branch_index: typing.Optional[int]
+    :param start: Start of the time window of the chunk in beats.
+        ``None`` if the score has been split by line count.
+    :type start: typing.Optional[float]
+    :param end: End of the time window of the chunk in beats.
+        ``None`` if the score has been split by line count.
+    :type end: typing.Optional[float]
+
+    See :meth:`EventToCsoundScore.convert_chunked`.
+    """
+
+    path: str
+    line_count: int
+    branch_index: typing.Optional[int] = None
+    start: typing.Optional[float] = None
+    end: typing.Optional[float] = None
+
+
+@dataclasses.dataclass
+class ConversionReport(object):
+    """Timings and counters of one conversion.
+
+    :param phase_duration_dict: Seconds spent in each phase. Phases are
+        ``"score"`` (generating the csound score lines, including all
+        p-field functions), ``"write"`` (writing the score file) and
+        ``"csound"`` (running csound).
+    :param p_field_duration_dict: Seconds spent in the p-field functions
+        (with the name of the p-field as key, e.g. ``"p4"``).
+    :param chronon_count: How many chronons have been converted.
+    :param rest_count: How many chronons have been skipped as rests
+        (see ``rest_predicate`` of :class:`EventToCsoundScore`).
+    :param line_count: How many lines have been written to the score.
+    :param warning_count: How many p-field values have been ignored with
+        an :class:`InvalidPFieldValueTypeWarning`.
+    :param csound_wall_duration: Seconds csound was running. ``None`` if
+        csound hasn't been called.
+    :param csound_cpu_duration: User and system CPU seconds of csound.
+        ``None`` if csound hasn't been called or if the platform doesn't
+        support :mod:`resource`. If several csound processes run at the
+        same time, the CPU time of all of them is counted.
+
+    Reports are only created for converters which have been initialized
+    with ``profile=True`` or with a ``report_callback``. Timing p-field
+    functions and counting chronons, rests and warnings needs ``profile``
+    of the :class:`EventToCsoundScore`.
+    """
+
+    phase_duration_dict: dict[str, float] = dataclasses.field(default_factory=dict)
+    p_field_duration_dict: dict[str, float] = dataclasses.field(default_factory=dict)
+    chronon_count: int = 0
+    rest_count: int = 0
+    line_count: int = 0
+    warning_count: int = 0
+    csound_wall_duration: typing.Optional[float] = None
+    csound_cpu_duration: typing.Optional[float] = None
+
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def traversal_and_formatting_duration(self) -> float:
+        """Seconds spent on generating score lines outside of p-field functions."""
+        return self.phase_duration_dict.get("score", 0) - sum(
+            self.p_field_duration_dict.values()
+        )
+
+    def add_phase_duration(self, phase: str, duration: float):
+        """Add seconds to the duration of a phase."""
+        with self._lock:
+            self.phase_duration_dict[phase] = (
+                self.phase_duration_dict.get(phase, 0) + duration
+            )
+
+    def add_csound_duration(self, wall_duration: float, cpu_duration: float | None):
+        """Add seconds of one csound process."""
+        with self._lock:
+            self.csound_wall_duration = (self.csound_wall_duration or 0) + wall_duration
+            if cpu_duration is not None:
+                self.csound_cpu_duration = (
+                    self.csound_cpu_duration or 0
+                ) + cpu_duration
+        self.add_phase_duration("csound", wall_duration)
+
+
+# The report of the conversion which is currently running (in the current
+# thread or asyncio task).
+_conversion_report: contextvars.ContextVar[
+    typing.Optional[ConversionReport]
+] = contextvars.ContextVar("conversion_report", default=None)
+
+
+def _get_children_cpu_time() -> typing.Optional[float]:
+    if resource is None:
+        return None
+    rusage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return rusage.ru_utime + rusage.ru_stime
+
+
+@contextlib.contextmanager
+def _measure_csound():
+    """Add wall and CPU time of a csound process to the current report."""
+
+    report = _conversion_report.get()
+    if report is None:
+        yield
+        return
+    cpu_time = _get_children_cpu_time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_duration = time.perf_counter() - start
+        cpu_duration = None
+        if cpu_time is not None:
+            cpu_duration = _get_children_cpu_time() - cpu_time  # type: ignore
+        report.add_csound_duration(wall_duration, cpu_duration)
+
+
+@dataclasses.dataclass(frozen=True)
+class RenderResult(object):
+    """Outcome of rendering one sound file with :class:`EventToSoundFile`.
+
+    :param path: Path of the rendered sound file.
+    :param score_path: Path of the csound score file.
+    :param exit_code: The exit code of the csound process. ``None`` if
+        csound couldn't be started or didn't finish.
+    :param duration: How many seconds it took to write the score file and
+        to run csound.
+    :param stderr: What csound printed to stderr.
+    :param exception: The exception which prevented the render (for
+        instance an error in a p-field function). ``None`` if no
+        exception has been raised.
+    :param stdout: What csound printed to stdout.
+    :param is_cache_hit: ``True`` if the sound file has been taken from a
+        :class:`RenderCache` instead of being rendered by csound.
+    :param report: The :class:`ConversionReport` of the render, if the
+        converter has been initialized with ``profile=True``.
+    :param sample_array: The samples of the rendered sound file as
+        :class:`numpy.memmap` (frames x channels), if the converter has
+        been initialized with ``memory_map=True``.
+    :param sample_rate: The sample rate of the rendered sound file, if the
+        converter has been initialized with ``memory_map=True``.
+    """
+
+    path: str
+    score_path: str
+    exit_code: typing.Optional[int]
+    duration: float
+    stderr: str = ""
+    exception: typing.Optional[Exception] = None
+    stdout: str = ""
+    is_cache_hit: bool = False
+    report: typing.Optional[ConversionReport] = None
+    sample_array: typing.Any = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+    sample_rate: typing.Optional[int] = None
+
+    _error_pattern = re.compile(r"error", re.IGNORECASE)
+    _error_summary_pattern = re.compile(r"^\s*\d+ errors? in performance")
+    _warning_pattern = re.compile(r"warning", re.IGNORECASE)
+
+    def _filter_output_line_tuple(
+        self, pattern: re.Pattern, ignore_pattern: typing.Optional[re.Pattern] = None
+    ) -> tuple[str, ...]:
+        return tuple(
+            line.strip()
+            for line in (self.stderr + "\n" + self.stdout).splitlines()
+            if pattern.search(line)
+            and not (ignore_pattern and ignore_pattern.search(line))
+        )
+
+    @property
+    def is_successful(self) -> bool:
+        """``True`` if csound returned with exit code 0."""
+        return self.exit_code == 0 and self.exception is None
+
+    @property
+    def error_tuple(self) -> tuple[str, ...]:
+        """All error messages csound printed."""
+        return self._filter_output_line_tuple(
+            self._error_pattern, self._error_summary_pattern
+        )
+
+    @property
+    def warning_tuple(self) -> tuple[str, ...]:
+        """All warnings csound printed."""
+        return self._filter_output_line_tuple(self._warning_pattern)
+
+
+class CsoundError(Exception):
+    """Csound returned with a non-zero exit code.
+
+    :param render_result: The :class:`RenderResult` of the failed render.
+    """
+
+    def __init__(self, render_result: RenderResult):
+        self.render_result = render_result
+        error_message = "\n".join(render_result.error_tuple[-5:])
+        super().__init__(
+            f"Csound failed to render '{render_result.path}' "
+            f"(exit code: {render_result.exit_code})."
+            + (f" Csound reported:\n{error_message}" if error_message else "")
+        )
+
+    @property
+    def exit_code(self) -> typing.Optional[int]:
+        return self.render_result.exit_code
+
+
+class CsoundTimeoutError(CsoundError):
+    """Csound didn't finish within the timeout and has been killed.
+
+    :param render_result: The :class:`RenderResult` of the killed render.
+    :param timeout: The timeout in seconds.
+    """
+
+    def __init__(self, render_result: RenderResult, timeout: float):
+        self.render_result = render_result
+        self.timeout = timeout
+        Exception.__init__(
+            self,
+            f"Csound didn't finish rendering '{render_result.path}' "
+            f"within {timeout} seconds.",
+        )
 
 
 class MissingPFieldWarning(Warning):
@@ -33,9 +412,458 @@ class InvalidPFieldValueTypeWarning(Warning):
     pass
 
 
+class InvalidPFieldValueTypeError(TypeError):
+    """Raised by a strict :class:`EventToCsoundScore` for invalid p-field values."""
+
+
+_SUPPORTED_P_FIELD_TYPES_REPR = repr(SupportedPFieldTypes)
+
+
+def _get_invalid_p_field_value_message(
+    p_field_value: typing.Any, ignored_p_field: int
+) -> str:
+    return (
+        f"Can't assign returned value '{p_field_value}' of type "
+        f"'{type(p_field_value)}' to p-field {ignored_p_field}. "
+        f" Supported types for p-fields include '{_SUPPORTED_P_FIELD_TYPES_REPR}'."
+    )
+
+
+class _PFieldWarningCollector(object):
+    """Collect invalid p-field values of one conversion."""
+
+    def __init__(self, is_strict: bool):
+        self.is_strict = is_strict
+        # p-field number => count of invalid values
+        self.count_dict: dict[int, int] = {}
+        # p-field number => first invalid values
+        self.sample_dict: dict[int, list[str]] = {}
+
+        # Branches of a conversion can run in different threads.
+        self._lock = threading.Lock()
+
+    def add(self, ignored_p_field: int, p_field_value: typing.Any):
+        if self.is_strict:
+            raise InvalidPFieldValueTypeError(
+                _get_invalid_p_field_value_message(p_field_value, ignored_p_field)
+            )
+        with self._lock:
+            count = self.count_dict.get(ignored_p_field, 0)
+            self.count_dict[ignored_p_field] = count + 1
+            sample_list = self.sample_dict.setdefault(ignored_p_field, [])
+            if len(sample_list) < (
+                csound_converters.configurations.P_FIELD_WARNING_SAMPLE_COUNT
+            ):
+                if (sample := repr(p_field_value)) not in sample_list:
+                    sample_list.append(sample)
+
+    def update(self, count_dict: dict[int, int], sample_dict: dict[int, list[str]]):
+        """Add invalid values which have been collected in another process."""
+
+        with self._lock:
+            for ignored_p_field, count in count_dict.items():
+                self.count_dict[ignored_p_field] = (
+                    self.count_dict.get(ignored_p_field, 0) + count
+                )
+                sample_list = self.sample_dict.setdefault(ignored_p_field, [])
+                for sample in sample_dict[ignored_p_field]:
+                    if len(sample_list) < (
+                        csound_converters.configurations.P_FIELD_WARNING_SAMPLE_COUNT
+                    ) and (sample not in sample_list):
+                        sample_list.append(sample)
+
+    def warn(self):
+        """Emit one warning with a summary of all invalid values."""
+
+        if not self.count_dict:
+            return
+        summary = "; ".join(
+            f"p{ignored_p_field}: {count} value(s), for instance "
+            f"{', '.join(self.sample_dict[ignored_p_field])}"
+            for ignored_p_field, count in sorted(self.count_dict.items())
+        )
+        warnings.warn(
+            f"Ignored {sum(self.count_dict.values())} p-field value(s) with "
+            f"unsupported types ({summary}). Supported types for p-fields "
+            f"include '{_SUPPORTED_P_FIELD_TYPES_REPR}'.",
+            InvalidPFieldValueTypeWarning,
+        )
+
+
+# The collector of the conversion which is currently running.
+_p_field_warning_collector: contextvars.ContextVar[
+    typing.Optional[_PFieldWarningCollector]
+] = contextvars.ContextVar("p_field_warning_collector", default=None)
+
+
+class _RestDetector(object):
+    """Find chronons which can't be converted to a csound score line.
+
+    Without a ``rest_predicate``, chronons are rests if a p-field function
+    accesses an attribute which they don't have. The kind of such a
+    chronon (its class and the names of its attributes) is remembered, so
+    that further chronons of the same kind are skipped without calling
+    any p-field function.
+    """
+
+    def __init__(
+        self,
+        rest_predicate: typing.Optional[
+            typing.Callable[[core_events.Chronon], bool]
+        ] = None,
+    ):
+        self.rest_predicate = rest_predicate
+        self._rest_kind_set: set[tuple[type, tuple[str, ...]]] = set()
+        if rest_predicate is not None:
+            self.is_rest = rest_predicate  # type: ignore
+
+    @staticmethod
+    def _get_kind(chronon: core_events.Chronon) -> tuple[type, tuple[str, ...]]:
+        return type(chronon), tuple(getattr(chronon, "__dict__", ()))
+
+    def is_rest(self, chronon: core_events.Chronon) -> bool:
+        """``True`` if the chronon is known to be a rest."""
+
+        return bool(self._rest_kind_set) and (
+            self._get_kind(chronon) in self._rest_kind_set
+        )
+
+    def add(self, chronon: core_events.Chronon, attribute_error: AttributeError):
+        """Remember the kind of a chronon which raised an AttributeError."""
+
+        # Only missing attributes of the chronon itself depend on its kind:
+        # missing attributes of its values (e.g. 'None.hertz') don't.
+        if self.rest_predicate is None and attribute_error.obj is chronon:
+            self._rest_kind_set.add(self._get_kind(chronon))
+
+
+# Types whose 'repr' contains their whole value.
+_LOSSLESS_REPR_TYPE_SET = frozenset(
+    (type(None), bool, int, float, complex, str, bytes, fractions.Fraction)
+)
+
+
+def _update_content_hash(
+    hash_object: typing.Any, value: typing.Any, active_id_set: set[int]
+) -> bool:
+    """Add the content of a value to the hash of a fingerprint.
+
+    In contrast to ``repr`` nothing is summarized or omitted (for instance
+    the points of envelopes or the values of long arrays) and objects are
+    never identified by their memory address. Returns ``False`` if the
+    content of the value is unknown (for instance of functions or of
+    objects which reference themselves).
+    """
+
+    value_type = type(value)
+    if value_type in _LOSSLESS_REPR_TYPE_SET:
+        hash_object.update(f"{value_type.__name__}({value!r})".encode())
+        return True
+    if isinstance(value, type):
+        hash_object.update(f"type({value.__module__}.{value.__qualname__})".encode())
+        return True
+    if id(value) in active_id_set or isinstance(
+        value,
+        (
+            types.FunctionType,
+            types.MethodType,
+            types.BuiltinFunctionType,
+            functools.partial,
+        ),
+    ):
+        return False
+    hash_object.update(f"{value_type.__module__}.{value_type.__qualname__}(".encode())
+    active_id_set.add(id(value))
+    try:
+        if isinstance(value, enum.Enum):
+            hash_object.update(value.name.encode())
+            return True
+        if np is not None and isinstance(value, (np.ndarray, np.generic)):
+            if value.dtype.hasobject:
+                return _update_content_hash(hash_object, value.tolist(), active_id_set)
+            hash_object.update(f"{value.dtype.str}{value.shape}".encode())
+            hash_object.update(np.ascontiguousarray(value).tobytes())
+            return True
+        is_known = False
+        if isinstance(value, (list, tuple, set, frozenset)):
+            hash_object.update(f"{len(value)}:".encode())
+            for item in value:
+                if not _update_content_hash(hash_object, item, active_id_set):
+                    return False
+            is_known = True
+        elif isinstance(value, dict):
+            hash_object.update(f"{len(value)}:".encode())
+            for key, item in value.items():
+                if not (
+                    _update_content_hash(hash_object, key, active_id_set)
+                    and _update_content_hash(hash_object, item, active_id_set)
+                ):
+                    return False
+            is_known = True
+        if (state_dict := getattr(value, "__dict__", None)) is not None:
+            hash_object.update(b"|")
+            if not _update_attribute_hash(hash_object, state_dict, active_id_set):
+                return False
+            is_known = True
+        return is_known
+    finally:
+        active_id_set.discard(id(value))
+        hash_object.update(b")")
+
+
+def _update_attribute_hash(
+    hash_object: typing.Any, state_dict: dict[str, typing.Any], active_id_set: set[int]
+) -> bool:
+    for name, attribute in state_dict.items():
+        # Dunder attributes only memorize derived values (for
+        # instance '__cls_name__' of mutwo objects).
+        if name.startswith("__") and name.endswith("__"):
+            continue
+        hash_object.update(f"{name}=".encode())
+        if not _update_content_hash(hash_object, attribute, active_id_set):
+            return False
+    return True
+
+
+def _get_content_hash(event: core_events.abc.Event) -> typing.Optional[bytes]:
+    """Hash the type and the attributes of an event (without its children)."""
+
+    event_type = type(event)
+    hash_object = hashlib.blake2b(
+        f"{event_type.__module__}.{event_type.__qualname__}|".encode(), digest_size=16
+    )
+    if not _update_attribute_hash(hash_object, vars(event), {id(event)}):
+        return None
+    return hash_object.digest()
+
+
+class _RepeatState(object):
+    """Repeated consecutions of one conversion (see ``compress_repeats``)."""
+
+    def __init__(self, event_to_convert: core_events.abc.Event):
+        # id of compound event => fingerprint (or 'None' if it's unknown)
+        self.fingerprint_dict: dict[int, typing.Optional[bytes]] = {}
+        EventToCsoundScore._get_fingerprint(event_to_convert, self.fingerprint_dict)
+        # fingerprint => how often the consecution appears in the event
+        self.fingerprint_counter: collections.Counter[bytes] = collections.Counter()
+        compound_stack = [event_to_convert]
+        while compound_stack:
+            compound = compound_stack.pop()
+            if isinstance(compound, core_events.Consecution) and (
+                (fingerprint := self.fingerprint_dict[id(compound)]) is not None
+            ):
+                self.fingerprint_counter[fingerprint] += 1
+            if isinstance(compound, (core_events.Consecution, core_events.Concurrence)):
+                compound_stack.extend(compound)
+        # fingerprint => macro name (or 'None' if a macro isn't worth it)
+        self.macro_name_dict: dict[bytes, typing.Optional[str]] = {}
+
+    def is_repeated(self, consecution: core_events.Consecution) -> bool:
+        # Consecutions without fingerprint are never compressed: it's unknown
+        # if they really equal other consecutions.
+        fingerprint = self.fingerprint_dict[id(consecution)]
+        return fingerprint is not None and self.fingerprint_counter[fingerprint] > 1
+
+
+# Converter and event of the parallel conversion which currently starts its
+# worker processes. Forked worker processes inherit them, so that they
+# don't need to be pickled.
+_inherited_parallel_conversion: typing.Optional[
+    tuple["EventToCsoundScore", core_events.abc.Event]
+] = None
+_inherited_parallel_conversion_lock = threading.Lock()
+
+
+def _convert_branch_list(
+    event_to_csound_score: typing.Optional["EventToCsoundScore"],
+    branch_list: list[
+        tuple[
+            typing.Optional[core_events.abc.Event],
+            tuple[int, ...],
+            float,
+        ]
+    ],
+) -> tuple[tuple[str, ...], dict[int, int], dict[int, list[str]]]:
+    """Convert successive branches of a parallel conversion in a worker process.
+
+    Each branch is either passed directly or (if the worker inherited the
+    converted event) as the indices which lead to the branch.
+    """
+
+    root_event = None
+    if event_to_csound_score is None:
+        event_to_csound_score, root_event = _inherited_parallel_conversion  # type: ignore
+    collector = _PFieldWarningCollector(event_to_csound_score.strict)
+    csound_score_line_list: list[str] = []
+    token = _p_field_warning_collector.set(collector)
+    try:
+        for event_to_convert, index_tuple, absolute_entry_delay in branch_list:
+            if event_to_convert is None:
+                event_to_convert = root_event
+                for index in index_tuple:
+                    event_to_convert = event_to_convert[index]  # type: ignore
+            csound_score_line_list.extend(
+                event_to_csound_score._iter_event(
+                    event_to_convert, absolute_entry_delay  # type: ignore
+                )
+            )
+    finally:
+        _p_field_warning_collector.reset(token)
+    # Warnings are emitted by the main process.
+    return tuple(csound_score_line_list), collector.count_dict, collector.sample_dict
+
+
+def _write_branch_chunk_list(
+    event_to_csound_score: typing.Optional["EventToCsoundScore"],
+    event_to_convert: typing.Optional[core_events.abc.Event],
+    branch_index: int,
+    directory: str,
+    max_line_count: typing.Optional[int],
+    chunk_duration: typing.Optional[float],
+) -> tuple[list["ScoreChunk"], dict[int, int], dict[int, list[str]]]:
+    """Write the chunk files of one branch of a chunked conversion in a worker process."""
+
+    if event_to_csound_score is None:
+        event_to_csound_score, root_event = _inherited_parallel_conversion  # type: ignore
+        event_to_convert = root_event[branch_index]  # type: ignore
+    collector = _PFieldWarningCollector(event_to_csound_score.strict)
+    token = _p_field_warning_collector.set(collector)
+    try:
+        chunk_list = event_to_csound_score._write_chunk_list(
+            event_to_convert,  # type: ignore
+            directory,
+            branch_index,
+            max_line_count,
+            chunk_duration,
+        )
+    finally:
+        _p_field_warning_collector.reset(token)
+    # Warnings are emitted by the main process.
+    return chunk_list, collector.count_dict, collector.sample_dict
+
+
+def _restore_event_to_csound_score(
+    pfield_tuple: tuple[typing.Optional[PFieldFunction], ...],
+    trusted_nth_p_field_set: frozenset[int],
+    keyword_argument_dict: dict[str, typing.Any],
+) -> "EventToCsoundScore":
+    event_to_csound_score = EventToCsoundScore(
+        trusted_pfield=tuple(
+            f"p{nth_p_field + 1}" for nth_p_field in trusted_nth_p_field_set
+        ),
+        **keyword_argument_dict,
+    )
+    event_to_csound_score.pfield_tuple = pfield_tuple
+    return event_to_csound_score
+
+
 class EventToCsoundScore(core_converters.abc.EventConverter):
     """Class to convert mutwo events to a Csound score file.
 
+    :param subtree_cache_size: How many converted
+        :class:`~mutwo.core_events.Consecution` and
+        :class:`~mutwo.core_events.Concurrence` are memorized. If bigger than
+        0, the converter works incrementally: each compound event is
+        identified by a fingerprint of its structure (the types and the
+        content of the attributes of itself and of all its children) and
+        its absolute entry delay. Compound events which haven't changed since
+        an earlier conversion reuse their csound score lines, only changed
+        branches are converted again. Compound events with attributes whose
+        content can't be hashed (for instance functions) are always converted
+        again. Default to 0 (no memorization).
+    :type subtree_cache_size: int
+    :param precision: If set, floating point numbers are written with at
+        most this number of decimal places (trailing zeros are removed).
+        p1 is never rounded. Default to ``None`` (shortest representation
+        which doesn't lose any precision).
+    :type precision: typing.Optional[int]
+    :param carry: Set to ``True`` to omit p-fields which repeat the value
+        of the previous i-statement of the same instrument. Repeated values
+        are written with csound's carry symbol ``.``, start times which equal
+        start time plus duration of the previous statement with ``+`` and
+        carried values at the end of a statement are omitted. Strings are
+        never carried. The meaning of the score doesn't change. Default to
+        ``False``.
+    :type carry: bool
+    :param sort_by_time: Set to ``True`` to write i-statements sorted by
+        their absolute entry delay (and without any annotations), so that
+        csound doesn't need to sort the score and the score can be played
+        while it's read. The lines of the branches of each
+        :class:`~mutwo.core_events.Concurrence` are merged while the event
+        is walked, so the score is never held in memory. Events with the
+        same start time keep their order. Sorted conversions don't
+        use ``subtree_cache_size`` and ``parallel_depth``. Default to
+        ``False``.
+    :type sort_by_time: bool
+    :param compress_repeats: Set to ``True`` to write consecutions which
+        appear several times in the event (with the same structure and the
+        same attributes, but maybe at another time) only once. The
+        i-statements of a repeated consecution are written once as score
+        macro (with ``#define``). Each repetition sets the clock base of
+        csound to its start time (with a ``b`` statement) and inserts the
+        macro. Csound expands the score to the same i-statements as the
+        uncompressed score. Consecutions inside of repeated consecutions
+        aren't compressed again, neither are consecutions with attributes
+        whose content can't be hashed. Needs p2 to be the absolute entry delay
+        and can't be combined with ``sort_by_time``. Compressed
+        conversions don't use ``subtree_cache_size`` and
+        ``parallel_depth``. Default to ``False``.
+    :type compress_repeats: bool
+    :param profile: Set to ``True`` to measure how long each p-field function
+        takes and to count converted chronons, rests, lines and warnings.
+        After each conversion :attr:`report` contains a
+        :class:`ConversionReport`. Profiling slows down the conversion.
+        Default to ``False``.
+    :type profile: bool
+    :param report_callback: If set, it is called with the
+        :class:`ConversionReport` after each conversion (for instance to
+        send it to a metrics system). Setting a callback enables ``profile``.
+        Default to ``None``.
+    :type report_callback: typing.Optional[typing.Callable[[ConversionReport], None]]
+    :param strict: Set to ``True`` to raise an
+        :class:`InvalidPFieldValueTypeError` as soon as a p-field function
+        returns a value of an unsupported type. By default such values are
+        ignored and one warning per conversion summarizes all ignored
+        values. Default to ``False``.
+    :type strict: bool
+    :param trusted_pfield: Names of p-fields (for instance ``("p4",)``)
+        whose functions are known to always return numbers. Their values
+        are written without any type check, which is faster. Default to
+        an empty tuple.
+    :type trusted_pfield: typing.Sequence[str]
+    :param parallel_depth: If set, the branches of
+        :class:`~mutwo.core_events.Concurrence` are converted in parallel
+        worker processes. The converted event has depth 0: with
+        ``parallel_depth=0`` the branches of the converted event are
+        distributed, with ``parallel_depth=1`` also the branches of
+        concurrences inside of the converted event and so on. The score
+        is the same as without parallel conversion. Branches which are
+        converted in worker processes are neither memorized (see
+        ``subtree_cache_size``) nor profiled. If worker processes can't be
+        forked (for instance on Windows and macOS or with the
+        ``mp_context`` "spawn"), the p-field functions need to be
+        picklable (e.g. functions which are defined on module level or
+        :func:`operator.attrgetter`). Default to ``None`` (no parallel
+        conversion).
+    :type parallel_depth: typing.Optional[int]
+    :param max_workers: How many worker processes convert branches at the
+        same time if ``parallel_depth`` is set. If ``None`` the number of
+        CPUs is used. Default to ``None``.
+    :type max_workers: typing.Optional[int]
+    :param mp_context: The :mod:`multiprocessing` context which starts the
+        worker processes (for instance
+        ``multiprocessing.get_context("spawn")`` if the converter is used in
+        a process with threads, which can deadlock forked processes). If
+        ``None`` the default context is used. Default to ``None``.
+    :type mp_context: typing.Optional[multiprocessing.context.BaseContext]
+    :param rest_predicate: Function which takes a chronon and returns
+        ``True`` if the chronon is a rest. Rests are skipped without
+        calling any p-field function. If ``None``, a chronon is a rest if
+        a p-field function raises an :class:`AttributeError`: the class
+        and the attribute names of chronons which miss an attribute are
+        remembered, so that further chronons of the same kind are skipped
+        right away. Default to ``None``.
+    :type rest_predicate: typing.Optional[typing.Callable[[core_events.Chronon], bool]]
     :param pfield: p-field / p-field-extraction-function pairs.
 
     This class helps generating score files for the `"domain-specific computer
@@ -71,17 +899,97 @@ class EventToCsoundScore(core_converters.abc.EventConverter):
     For easier debugging of faulty score files, :mod:`mutwo` adds annotations
     when a new :class:`~mutwo.core_events.Consecution` or a new :class:`~mutwo.core_events.Concurrence`
     starts.
+
+    To only convert changed voices of a large event again, the converter
+    can memorize the csound score lines of its compound events:
+
+    >>> from mutwo import core_events
+    >>> converter = csound_converters.EventToCsoundScore(subtree_cache_size=1000)
+    >>> voice_list = [
+    ...     core_events.Consecution([core_events.Chronon(i), core_events.Chronon(2)])
+    ...     for i in range(1, 4)
+    ... ]
+    >>> event = core_events.Concurrence(voice_list)
+    >>> converter.convert(event, 'score.sco')
+    >>> event[0][0].duration = 5
+    >>> converter.convert(event, 'score.sco')
+    >>> converter.subtree_cache_hit_count  # the two unchanged voices
+    2
+
+    Dense scores become smaller and faster to parse for csound if they
+    are compacted:
+
+    >>> converter = csound_converters.EventToCsoundScore(
+    ...     p4=lambda event: 0.1 * 3, precision=4, carry=True
+    ... )
+    >>> event = core_events.Consecution([core_events.Chronon(1) for _ in range(3)])
+    >>> for line in converter.iter_lines(event):
+    ...     print(line)
+    ;; NEW CONSECUTION
+    ;;
+    i 1 0 1 0.3
+    i 1 + .
+    i 1 + .
+    <BLANKLINE>
+    >>> converter.convert(event, 'score.sco')
+    >>> round(converter.score_size_report.reduction, 2)
+    0.58
     """
 
+    _csound_score_token_pattern = re.compile(r'"[^"]*"|\S+')
+
     _default_p_field_dict: PFieldDict = {
-        "p1": lambda event: 1,  # default instrument name "1"
+        "p1": _instrument_p_field,  # default instrument name "1"
         "p2": None,  # default to absolute start time
-        "p3": lambda event: event.duration.beat_count # type: ignore
-        if event.duration > 0
-        else None,  # default key for duration
+        "p3": _duration_p_field,  # default key for duration
     }
 
-    def __init__(self, **pfield: PFieldFunction):
+    def __init__(
+        self,
+        *,
+        subtree_cache_size: int = 0,
+        precision: typing.Optional[int] = None,
+        carry: bool = False,
+        sort_by_time: bool = False,
+        compress_repeats: bool = False,
+        profile: bool = False,
+        report_callback: typing.Optional[
+            typing.Callable[[ConversionReport], None]
+        ] = None,
+        strict: bool = False,
+        trusted_pfield: typing.Sequence[str] = tuple([]),
+        parallel_depth: typing.Optional[int] = None,
+        max_workers: typing.Optional[int] = None,
+        mp_context: typing.Optional[multiprocessing.context.BaseContext] = None,
+        rest_predicate: typing.Optional[
+            typing.Callable[[core_events.Chronon], bool]
+        ] = None,
+        **pfield: PFieldFunction,
+    ):
+        self.subtree_cache_size = subtree_cache_size
+        self._rest_predicate = rest_predicate
+        self.strict = strict
+        self.parallel_depth = parallel_depth
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self._trusted_nth_p_field_set = frozenset(
+            int(p_field[1:]) - 1 for p_field in trusted_pfield
+        )
+        self.precision = precision
+        self.carry = carry
+        self.sort_by_time = sort_by_time
+        self.compress_repeats = compress_repeats
+        self.score_size_report: typing.Optional[ScoreSizeReport] = None
+        self.report_callback = report_callback
+        self.report: typing.Optional[ConversionReport] = None
+        self._profile = profile or report_callback is not None
+        self._subtree_cache: collections.OrderedDict[
+            tuple[bytes, float], tuple[str, ...]
+        ] = collections.OrderedDict()
+        self._subtree_cache_lock = threading.Lock()
+        self.subtree_cache_hit_count = 0
+        self.subtree_cache_miss_count = 0
+
         concatenated_p_field_dict: PFieldDict = dict([])
         for (
             default_p_field,
@@ -94,11 +1002,161 @@ class EventToCsoundScore(core_converters.abc.EventConverter):
 
         concatenated_p_field_dict.update(pfield)
         self.pfield_tuple = self._generate_pfield_mapping(concatenated_p_field_dict)
+        if compress_repeats:
+            if sort_by_time:
+                raise ValueError("Scores which are sorted by time can't be compressed.")
+            if len(self.pfield_tuple) < 2 or self.pfield_tuple[1] is not None:
+                raise ValueError(
+                    "Repeats can only be compressed if p2 is the absolute "
+                    "entry delay of the chronons."
+                )
+
+    def __reduce__(self):
+        # Compiled p-field formatters, caches and locks can't be pickled:
+        # only the p-field mapping and the options are sent (e.g. to worker
+        # processes), the mapping is compiled again when unpickling.
+        return (
+            _restore_event_to_csound_score,
+            (
+                self._pfield_tuple,
+                self._trusted_nth_p_field_set,
+                dict(
+                    subtree_cache_size=self.subtree_cache_size,
+                    precision=self.precision,
+                    carry=self.carry,
+                    sort_by_time=self.sort_by_time,
+                    compress_repeats=self.compress_repeats,
+                    strict=self.strict,
+                    parallel_depth=self.parallel_depth,
+                    max_workers=self.max_workers,
+                    rest_predicate=self.rest_predicate,
+                ),
+            ),
+        )
+
+    # ###################################################################### #
+    #                          properties                                    #
+    # ###################################################################### #
+
+    @property
+    def pfield_tuple(self) -> tuple[typing.Optional[PFieldFunction], ...]:
+        """p-field extraction functions, sorted from p1 to pn."""
+        return self._pfield_tuple
+
+    @pfield_tuple.setter
+    def pfield_tuple(
+        self, pfield_tuple: tuple[typing.Optional[PFieldFunction], ...]
+    ):
+        self._pfield_tuple = tuple(pfield_tuple)
+        if self.profile:
+            self._p_field_function_tuple = tuple(
+                p_field_function
+                if p_field_function is None
+                else self._profile_p_field_function(nth_p_field, p_field_function)
+                for nth_p_field, p_field_function in enumerate(self._pfield_tuple)
+            )
+        else:
+            self._p_field_function_tuple = self._pfield_tuple
+        # The line builder depends on the p-field functions, so it
+        # needs to be compiled again each time they change (and known
+        # rests depend on the p-field functions as well).
+        self._rest_detector = _RestDetector(self.rest_predicate)
+        self._csound_score_line_builder = self._compile_csound_score_line_builder(
+            self._p_field_function_tuple,
+            self._trusted_nth_p_field_set,
+            self._rest_detector,
+        )
+        if self.profile:
+            self._csound_score_line_builder = self._profile_csound_score_line_builder(
+                self._csound_score_line_builder
+            )
+        self._is_column_mode = any(
+            isinstance(p_field_function, ColumnPField)
+            for p_field_function in self._pfield_tuple
+        )
+        # Memorized lines have been written by the old p-field functions.
+        self.clear_subtree_cache()
+
+    @property
+    def rest_predicate(
+        self,
+    ) -> typing.Optional[typing.Callable[[core_events.Chronon], bool]]:
+        """Function which returns ``True`` if a chronon is a rest."""
+        return self._rest_predicate
+
+    @rest_predicate.setter
+    def rest_predicate(
+        self,
+        rest_predicate: typing.Optional[typing.Callable[[core_events.Chronon], bool]],
+    ):
+        self._rest_predicate = rest_predicate
+        # Compile line builder with the new rest detection.
+        self.pfield_tuple = self.pfield_tuple
+
+    @property
+    def profile(self) -> bool:
+        """``True`` if conversions are measured (see :class:`ConversionReport`)."""
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile: bool):
+        self._profile = profile
+        # Compile line builder with (or without) measuring p-field functions.
+        self.pfield_tuple = self.pfield_tuple
 
     # ###################################################################### #
     #                          static methods                                #
     # ###################################################################### #
 
+    @staticmethod
+    def _profile_p_field_function(
+        nth_p_field: int, p_field_function: PFieldFunction
+    ) -> PFieldFunction:
+        """Wrap p-field function, so that its time is added to the report."""
+
+        p_field_name = f"p{nth_p_field + 1}"
+        get_report = _conversion_report.get
+        perf_counter = time.perf_counter
+        supported_type_tuple = SupportedPFieldTypesForTypeChecker.__args__  # type: ignore
+
+        def profiled_p_field_function(chronon: core_events.Chronon) -> typing.Any:
+            report = get_report()
+            if report is None:
+                return p_field_function(chronon)
+            start = perf_counter()
+            try:
+                p_field_value = p_field_function(chronon)
+            finally:
+                p_field_duration_dict = report.p_field_duration_dict
+                p_field_duration_dict[p_field_name] = (
+                    p_field_duration_dict.get(p_field_name, 0) + perf_counter() - start
+                )
+            if not isinstance(p_field_value, supported_type_tuple):
+                report.warning_count += 1
+            return p_field_value
+
+        return profiled_p_field_function
+
+    @staticmethod
+    def _profile_csound_score_line_builder(
+        build_csound_score_line: CsoundScoreLineBuilder,
+    ) -> CsoundScoreLineBuilder:
+        """Wrap line builder, so that chronons and rests are counted."""
+
+        get_report = _conversion_report.get
+
+        def profiled_build_csound_score_line(
+            chronon: core_events.Chronon, absolute_entry_delay: float
+        ) -> typing.Optional[str]:
+            csound_score_line = build_csound_score_line(chronon, absolute_entry_delay)
+            if (report := get_report()) is not None:
+                report.chronon_count += 1
+                if csound_score_line is None:
+                    report.rest_count += 1
+            return csound_score_line
+
+        return profiled_build_csound_score_line
+
     @staticmethod
     def _generate_pfield_mapping(
         pfield_key_to_function_mapping: PFieldDict,
@@ -151,107 +1209,1522 @@ class EventToCsoundScore(core_converters.abc.EventConverter):
 
         else:
             ignored_p_field = nth_p_field + 1
-            warnings.warn(
-                f"Can't assign returned value '{p_field_value}' of type "
-                f"'{type(p_field_value)}' to p-field {ignored_p_field}. "
-                " Supported types for p-fields include "
-                f"'{repr(SupportedPFieldTypes)}'. "
-                "Ignored p-field {ignored_p_field}.",
-                InvalidPFieldValueTypeWarning,
-            )
+            collector = _p_field_warning_collector.get()
+            if collector is None:
+                warnings.warn(
+                    _get_invalid_p_field_value_message(p_field_value, ignored_p_field)
+                    + f" Ignored p-field {ignored_p_field}.",
+                    InvalidPFieldValueTypeWarning,
+                )
+            else:
+                collector.add(ignored_p_field, p_field_value)
             return None
 
-    # ###################################################################### #
-    #           private methods (conversion of different event types)        #
-    # ###################################################################### #
+    @staticmethod
+    def _compile_p_field_formatter(
+        nth_p_field: int, p_field_function: PFieldFunction, is_trusted: bool = False
+    ) -> PFieldFormatter:
+        """Create function which returns the formatted value of one p-field.
 
-    def _convert_chronon(
-        self,
-        chronon: core_events.Chronon,
-        absolute_entry_delay: core_parameters.abc.Duration,
-    ) -> tuple[str, ...]:
-        """Extract p-field data from chronon and write one Csound-Score line."""
+        The most common value types (``int``, ``float`` and ``str``) are
+        formatted directly, all other values are passed to
+        :meth:`_process_p_field_value`. Values of trusted p-fields are
+        written without any type check.
+        """
 
-        csound_score_line = "i"
-        for nth_p_field, p_field_function in enumerate(self.pfield_tuple):
-            # special case of absolute start time initialization
-            if nth_p_field == 1 and p_field_function is None:
-                csound_score_line += " {}".format(
-                    absolute_entry_delay.beat_count
-                )
+        if is_trusted:
 
-            else:
-                try:
-                    p_field_value = p_field_function(chronon)  # type: ignore
+            def format_trusted_p_field(chronon: core_events.Chronon) -> str:
+                return str(p_field_function(chronon))
 
-                except AttributeError:
-                    # if attribute couldn't be found, just make a rest
-                    return tuple([])
+            return format_trusted_p_field
 
-                p_field_value = EventToCsoundScore._process_p_field_value(
-                    nth_p_field, p_field_value
-                )
-                if p_field_value is not None:
-                    csound_score_line += " {}".format(p_field_value)
+        process_p_field_value = EventToCsoundScore._process_p_field_value
 
-        return (csound_score_line,)
+        def format_p_field(chronon: core_events.Chronon) -> typing.Optional[str]:
+            p_field_value = p_field_function(chronon)
+            value_type = type(p_field_value)
+            if value_type is float or value_type is int:
+                return str(p_field_value)
+            elif value_type is str:
+                return f'"{p_field_value}"'
+            return process_p_field_value(nth_p_field, p_field_value)
 
-    def _convert_consecution(
-        self,
-        consecution: core_events.Consecution,
-        absolute_entry_delay: core_parameters.abc.Duration,
-    ) -> tuple[str, ...]:
-        csound_score_line_list = [
-            csound_converters.configurations.CONSECUTION_ANNOTATION
-        ]
-        csound_score_line_list.extend(
-            super()._convert_consecution(consecution, absolute_entry_delay)
-        )
+        return format_p_field
 
-        for _ in range(
-            csound_converters.configurations.N_EMPTY_LINES_AFTER_COMPOUND
-        ):
-            csound_score_line_list.append("")
+    @staticmethod
+    def _compile_csound_score_line_builder(
+        pfield_tuple: tuple[typing.Optional[PFieldFunction], ...],
+        trusted_nth_p_field_set: frozenset[int] = frozenset([]),
+        rest_detector: typing.Optional[_RestDetector] = None,
+    ) -> CsoundScoreLineBuilder:
+        """Create function which writes one Csound-Score line for a chronon.
 
-        return tuple(csound_score_line_list)
+        The returned function returns ``None`` if the chronon is a rest
+        (if the ``rest_detector`` already knows it or if any p-field
+        function raised an :class:`AttributeError`).
+        """
 
-    def _convert_concurrence(
-        self,
-        concurrence: core_events.Concurrence,
-        absolute_entry_delay: core_parameters.abc.Duration,
-    ) -> tuple[str, ...]:
-        csound_score_line_list = [
-            csound_converters.configurations.CONCURRENCE_ANNOTATION
-        ]
-        csound_score_line_list.extend(
-            super()._convert_concurrence(
-                concurrence, absolute_entry_delay
+        if rest_detector is None:
+            rest_detector = _RestDetector()
+        is_rest, add_rest = rest_detector.is_rest, rest_detector.add
+
+        compile_p_field_formatter = EventToCsoundScore._compile_p_field_formatter
+        is_p2_absolute_entry_delay = len(pfield_tuple) > 1 and pfield_tuple[1] is None
+        if is_p2_absolute_entry_delay:
+            head_pfield_tuple, tail_pfield_tuple = pfield_tuple[:1], pfield_tuple[2:]
+        else:
+            head_pfield_tuple, tail_pfield_tuple = pfield_tuple, ()
+        head_formatter_tuple = tuple(
+            compile_p_field_formatter(
+                nth_p_field,
+                p_field_function,  # type: ignore
+                nth_p_field in trusted_nth_p_field_set,
             )
+            for nth_p_field, p_field_function in enumerate(head_pfield_tuple)
+        )
+        tail_formatter_tuple = tuple(
+            compile_p_field_formatter(
+                nth_p_field,
+                p_field_function,  # type: ignore
+                nth_p_field in trusted_nth_p_field_set,
+            )
+            for nth_p_field, p_field_function in enumerate(tail_pfield_tuple, 2)
         )
-        for _ in range(
-            csound_converters.configurations.N_EMPTY_LINES_AFTER_COMPOUND
-        ):
-            csound_score_line_list.append("")
-        return tuple(csound_score_line_list)
 
-    # ###################################################################### #
-    #                             public api                                 #
-    # ###################################################################### #
+        if is_p2_absolute_entry_delay:
 
-    def convert(self, event_to_convert: core_events.abc.Event, path: str) -> None:
-        """Render csound score file (.sco) from the passed event.
+            def build_csound_score_line(
+                chronon: core_events.Chronon, absolute_entry_delay: float
+            ) -> typing.Optional[str]:
+                if is_rest(chronon):
+                    return None
+                try:
+                    head_p_field_list = [
+                        format_p_field(chronon)
+                        for format_p_field in head_formatter_tuple
+                    ]
+                    tail_p_field_list = [
+                        format_p_field(chronon)
+                        for format_p_field in tail_formatter_tuple
+                    ]
+                except AttributeError as e:
+                    # if attribute couldn't be found, just make a rest
+                    add_rest(chronon, e)
+                    return None
+                # Ignored p-fields are 'None', valid p-fields are never empty.
+                return " ".join(
+                    filter(
+                        None,
+                        (
+                            "i",
+                            *head_p_field_list,
+                            str(absolute_entry_delay),
+                            *tail_p_field_list,
+                        ),
+                    )
+                )
 
-        :param event_to_convert: The event that shall be rendered to a csound score
-            file.
-        :type event_to_convert: core_events.abc.Event
-        :param path: where to write the csound score file
-        :type path: str
+        else:
 
-        >>> import random
-        >>> from mutwo import core_events
-        >>> from mutwo import csound_converters
-        >>> converter = csound_converters.EventToCsoundScore(
-        ...    p4=lambda event: event.tempo_envelope.duration
+            def build_csound_score_line(
+                chronon: core_events.Chronon, absolute_entry_delay: float
+            ) -> typing.Optional[str]:
+                if is_rest(chronon):
+                    return None
+                try:
+                    p_field_list = [
+                        format_p_field(chronon)
+                        for format_p_field in head_formatter_tuple
+                    ]
+                except AttributeError as e:
+                    # if attribute couldn't be found, just make a rest
+                    add_rest(chronon, e)
+                    return None
+                return " ".join(filter(None, ("i", *p_field_list)))
+
+        return build_csound_score_line
+
+    @staticmethod
+    def _format_p_field_column(
+        nth_p_field: int, p_field_value_array: typing.Any
+    ) -> list[typing.Optional[str]]:
+        """Format all values of one p-field column at once."""
+
+        p_field_value_array = np.asarray(p_field_value_array)
+        match p_field_value_array.dtype.kind:
+            case "b" | "i" | "u" | "f":
+                unique_value_array, index_array = np.unique(
+                    p_field_value_array, return_inverse=True
+                )
+                # Formatting numbers is slow: repeated values (e.g.
+                # instruments or durations) are only formatted once.
+                if len(unique_value_array) * 2 <= len(p_field_value_array):
+                    return np.array(
+                        unique_value_array.astype(str).tolist(), dtype=object
+                    )[index_array.reshape(-1)].tolist()
+                return p_field_value_array.astype(str).tolist()
+            case "U" | "S":
+                return np.char.add(
+                    np.char.add('"', p_field_value_array.astype(str)), '"'
+                ).tolist()
+            case _:
+                process_p_field_value = EventToCsoundScore._process_p_field_value
+                return [
+                    process_p_field_value(nth_p_field, p_field_value)
+                    for p_field_value in p_field_value_array.tolist()
+                ]
+
+    @staticmethod
+    def _get_fingerprint(
+        event_to_convert: core_events.abc.Event,
+        fingerprint_dict: dict[int, typing.Optional[bytes]],
+    ) -> typing.Optional[bytes]:
+        """Hash the structure and the content of an event.
+
+        The fingerprints of all compound events are added to
+        ``fingerprint_dict`` (with the id of the event as key). Events
+        with attributes whose content is unknown (see
+        :func:`_update_content_hash`) have no fingerprint (``None``).
+        """
+
+        def get_fingerprint(event: core_events.abc.Event) -> typing.Optional[bytes]:
+            if isinstance(event, core_events.Chronon):
+                return _get_content_hash(event)
+            return fingerprint_dict[id(event)]
+
+        if isinstance(event_to_convert, core_events.Chronon):
+            return get_fingerprint(event_to_convert)
+        # Explicit stack instead of recursion (like in '_get_beat_count'): a
+        # compound event is visited a second time (with 'is_visited=True')
+        # after the fingerprints of its children are known.
+        event_stack: list[tuple[core_events.abc.Event, bool]] = [
+            (event_to_convert, False)
+        ]
+        while event_stack:
+            event, is_visited = event_stack.pop()
+            if is_visited:
+                fingerprint_list = [_get_content_hash(event)]
+                fingerprint_list.extend(
+                    get_fingerprint(child_event) for child_event in event  # type: ignore
+                )
+                fingerprint_dict[id(event)] = (
+                    None
+                    if None in fingerprint_list
+                    else hashlib.blake2b(
+                        b"".join(fingerprint_list), digest_size=16  # type: ignore
+                    ).digest()
+                )
+            elif id(event) not in fingerprint_dict:
+                event_stack.append((event, True))
+                event_stack.extend(
+                    (child_event, False)
+                    for child_event in event  # type: ignore
+                    if not isinstance(child_event, core_events.Chronon)
+                )
+        return fingerprint_dict[id(event_to_convert)]
+
+    # ###################################################################### #
+    #           private methods (conversion of different event types)        #
+    # ###################################################################### #
+
+    def _convert_chronon(
+        self,
+        chronon: core_events.Chronon,
+        absolute_entry_delay: core_parameters.abc.Duration,
+    ) -> tuple[str, ...]:
+        """Extract p-field data from chronon and write one Csound-Score line."""
+
+        csound_score_line = self._csound_score_line_builder(
+            chronon, absolute_entry_delay.beat_count
+        )
+        if csound_score_line is None:
+            return tuple([])
+        return (csound_score_line,)
+
+    @staticmethod
+    def _get_beat_count(
+        event_to_convert: core_events.abc.Event, beat_count_dict: dict[int, float]
+    ) -> float:
+        """Get the duration of an event in beats.
+
+        The durations of compound events are memorized in ``beat_count_dict``
+        (with the id of the event as key), so that each duration is only
+        calculated once. The result is the same as the 'beat_count' of
+        the 'duration' of the event (durations are rounded after each
+        addition like it's done by :class:`mutwo.core_parameters.abc.Duration`).
+        """
+
+        if isinstance(event_to_convert, core_events.Chronon):
+            return event_to_convert.duration.beat_count
+        try:
+            return beat_count_dict[id(event_to_convert)]
+        except KeyError:
+            pass
+
+        def get_beat_count(event: core_events.abc.Event) -> float:
+            if isinstance(event, core_events.Chronon):
+                return event.duration.beat_count
+            return beat_count_dict[id(event)]
+
+        n_digits = core_parameters.configurations.ROUND_DURATION_TO_N_DIGITS
+        # Explicit stack instead of recursion, so that the depth of the event
+        # isn't limited: a compound event is visited a second time (with
+        # 'is_visited=True') after the durations of its children are known.
+        event_stack: list[tuple[core_events.abc.Event, bool]] = [
+            (event_to_convert, False)
+        ]
+        while event_stack:
+            event, is_visited = event_stack.pop()
+            match event:
+                case core_events.Consecution() if is_visited:
+                    beat_count_iterator = map(get_beat_count, event)
+                    beat_count = next(beat_count_iterator, 0.0)
+                    for event_beat_count in beat_count_iterator:
+                        beat_count = round(beat_count + event_beat_count, n_digits)
+                case core_events.Concurrence() if is_visited:
+                    beat_count = max(map(get_beat_count, event), default=0.0)
+                case core_events.Consecution() | core_events.Concurrence():
+                    if id(event) not in beat_count_dict:
+                        event_stack.append((event, True))
+                        event_stack.extend(
+                            (child_event, False)
+                            for child_event in event
+                            if not isinstance(child_event, core_events.Chronon)
+                        )
+                    continue
+                case _:
+                    beat_count = event.duration.beat_count
+            beat_count_dict[id(event)] = beat_count
+        return beat_count_dict[id(event_to_convert)]
+
+    def _iter_event(
+        self,
+        event_to_convert: core_events.abc.Event,
+        absolute_entry_delay: float,
+        fingerprint_dict: typing.Optional[dict[int, typing.Optional[bytes]]] = None,
+        beat_count_dict: typing.Optional[dict[int, float]] = None,
+    ) -> typing.Iterator[str]:
+        """Lazily yield Csound-Score lines for an event of unknown type.
+
+        Absolute entry delays are passed as beat counts (and not as
+        :class:`mutwo.core_parameters.abc.Duration`), so that no
+        duration objects need to be created while walking the event.
+        """
+
+        if beat_count_dict is None:
+            beat_count_dict = {}
+        return self._iter_walked_lines(
+            iter(((absolute_entry_delay, event_to_convert),)),
+            fingerprint_dict,
+            beat_count_dict,
+        )
+
+    def _iter_compound_items(
+        self,
+        compound: core_events.Consecution | core_events.Concurrence,
+        absolute_entry_delay: float,
+        beat_count_dict: dict[int, float],
+    ) -> typing.Iterator[str | tuple[float, core_events.abc.Event]]:
+        """Iterate over the lines and the children of a compound event.
+
+        Annotations, empty lines and lines of flat consecutions in column
+        mode are yielded as strings, children are yielded together with
+        their absolute entry delay.
+        """
+
+        if isinstance(compound, core_events.Consecution):
+            annotation = csound_converters.configurations.CONSECUTION_ANNOTATION
+            if self._is_column_mode and all(
+                isinstance(event, core_events.Chronon) for event in compound
+            ):
+                item_iterator: typing.Iterator = self._iter_flat_consecution_columns(
+                    compound, absolute_entry_delay
+                )
+            else:
+                item_iterator = self._iter_consecution_entry_delays(
+                    compound, absolute_entry_delay, beat_count_dict
+                )
+        else:
+            annotation = csound_converters.configurations.CONCURRENCE_ANNOTATION
+            item_iterator = zip(itertools.repeat(absolute_entry_delay), compound)
+        return itertools.chain((annotation,), item_iterator, self._iter_compound_end())
+
+    def _iter_walked_lines(
+        self,
+        item_iterator: typing.Iterator[str | tuple[float, core_events.abc.Event]],
+        fingerprint_dict: typing.Optional[dict[int, typing.Optional[bytes]]],
+        beat_count_dict: dict[int, float],
+        repeat_state: typing.Optional[_RepeatState] = None,
+    ) -> typing.Iterator[str]:
+        """Walk the event tree with an explicit stack and yield its lines.
+
+        The stack holds one item iterator (see :meth:`_iter_compound_items`)
+        per compound event which is currently walked. Nested events neither
+        hit the recursion limit nor pass their lines through a chain of
+        generators: each line is yielded exactly once. Memorized lines and
+        macros of repeated consecutions are put on the stack as iterators
+        of strings. The lines of compound events which are memorized (see
+        ``subtree_cache_size``) are collected while they are yielded and
+        added to the cache as soon as the compound event is walked.
+        """
+
+        build_csound_score_line = self._csound_score_line_builder
+        item_iterator_stack = [item_iterator]
+        # (stack size, cache key, index of the first line) of each compound
+        # event on the stack whose lines are memorized afterwards.
+        memorized_compound_list: list[tuple[int, tuple[bytes, float], int]] = []
+        memorized_line_list: list[str] = []
+        while item_iterator_stack:
+            for item in item_iterator_stack[-1]:
+                if type(item) is str:
+                    if memorized_compound_list:
+                        memorized_line_list.append(item)  # type: ignore
+                    yield item  # type: ignore
+                    continue
+                absolute_entry_delay, event = item  # type: ignore
+                match event:
+                    case core_events.Chronon():
+                        csound_score_line = build_csound_score_line(
+                            event, absolute_entry_delay
+                        )
+                        if csound_score_line is not None:
+                            if memorized_compound_list:
+                                memorized_line_list.append(csound_score_line)
+                            yield csound_score_line
+                    case core_events.Consecution() if (
+                        repeat_state is not None and repeat_state.is_repeated(event)
+                    ):
+                        item_iterator_stack.append(
+                            self._iter_repeated_consecution(
+                                event,
+                                absolute_entry_delay,
+                                repeat_state,
+                                beat_count_dict,
+                            )
+                        )
+                        break
+                    case core_events.Consecution() | core_events.Concurrence() if (
+                        fingerprint_dict is not None
+                        and (fingerprint := fingerprint_dict[id(event)]) is not None
+                    ):
+                        key = (fingerprint, absolute_entry_delay)
+                        csound_score_line_tuple = self._get_memorized_lines(key)
+                        if csound_score_line_tuple is None:
+                            memorized_compound_list.append(
+                                (
+                                    len(item_iterator_stack) + 1,
+                                    key,
+                                    len(memorized_line_list),
+                                )
+                            )
+                            item_iterator_stack.append(
+                                self._iter_compound_items(
+                                    event, absolute_entry_delay, beat_count_dict
+                                )
+                            )
+                        else:
+                            item_iterator_stack.append(iter(csound_score_line_tuple))
+                        break
+                    case core_events.Consecution() | core_events.Concurrence():
+                        item_iterator_stack.append(
+                            self._iter_compound_items(
+                                event, absolute_entry_delay, beat_count_dict
+                            )
+                        )
+                        # Continue with the children of the compound event.
+                        break
+                    case _:
+                        raise TypeError(
+                            f"Can't convert object '{event}' of type "
+                            f"'{type(event)}' with EventToCsoundScore."
+                            " Supported types only include all inherited classes "
+                            f"from '{core_events.abc.Event}'."
+                        )
+            else:
+                item_iterator_stack.pop()
+                if memorized_compound_list and (
+                    memorized_compound_list[-1][0] > len(item_iterator_stack)
+                ):
+                    _, key, start = memorized_compound_list.pop()
+                    self._memorize_lines(key, tuple(memorized_line_list[start:]))
+                    if not memorized_compound_list:
+                        memorized_line_list.clear()
+
+    def _iter_repeated_consecution(
+        self,
+        consecution: core_events.Consecution,
+        absolute_entry_delay: float,
+        repeat_state: _RepeatState,
+        beat_count_dict: dict[int, float],
+    ) -> typing.Iterator[str]:
+        """Yield Csound-Score lines which insert the macro of a consecution.
+
+        The macro is defined when the consecution appears for the first time.
+        """
+
+        fingerprint = repeat_state.fingerprint_dict[id(consecution)]
+        try:
+            macro_name = repeat_state.macro_name_dict[fingerprint]  # type: ignore
+        except KeyError:
+            # The macro starts at 0, the clock base moves it to its start.
+            csound_score_line_list = [
+                csound_score_line
+                for csound_score_line in self._iter_consecution(
+                    consecution, 0.0, None, beat_count_dict
+                )
+                if csound_score_line.startswith("i")
+            ]
+            # Macros of only one i-statement would make the score bigger.
+            if len(csound_score_line_list) > 1:
+                macro_name = f"MUTWO_REPEAT_{len(repeat_state.macro_name_dict) + 1}"
+                yield f"#define {macro_name} #"
+                yield from csound_score_line_list
+                yield "#"
+            else:
+                macro_name = None
+            repeat_state.macro_name_dict[fingerprint] = macro_name  # type: ignore
+        if macro_name is None:
+            yield from self._iter_consecution(
+                consecution, absolute_entry_delay, None, beat_count_dict
+            )
+            return
+        yield f"b {absolute_entry_delay}"
+        yield f"${macro_name}."
+        yield "b 0"
+
+    def _get_memorized_lines(
+        self, key: tuple[bytes, float]
+    ) -> typing.Optional[tuple[str, ...]]:
+        """Get the memorized lines of a compound event (or ``None``)."""
+
+        with self._subtree_cache_lock:
+            csound_score_line_tuple = self._subtree_cache.get(key, None)
+            if csound_score_line_tuple is None:
+                self.subtree_cache_miss_count += 1
+            else:
+                self._subtree_cache.move_to_end(key)
+                self.subtree_cache_hit_count += 1
+        return csound_score_line_tuple
+
+    def _memorize_lines(
+        self, key: tuple[bytes, float], csound_score_line_tuple: tuple[str, ...]
+    ):
+        with self._subtree_cache_lock:
+            self._subtree_cache[key] = csound_score_line_tuple
+            while len(self._subtree_cache) > self.subtree_cache_size:
+                self._subtree_cache.popitem(last=False)
+
+    def _iter_flat_consecution_columns(
+        self, consecution: core_events.Consecution, absolute_entry_delay: float
+    ) -> typing.Iterator[str]:
+        """Yield Csound-Score lines of a consecution which only has chronons.
+
+        All p-fields are calculated column by column (see :class:`ColumnPField`).
+        """
+
+        return filter(
+            None,
+            self._iter_flat_consecution_columns_with_rests(
+                consecution, absolute_entry_delay
+            ),
+        )
+
+    def _iter_flat_consecution_columns_with_rests(
+        self, consecution: core_events.Consecution, absolute_entry_delay: float
+    ) -> typing.Iterator[typing.Optional[str]]:
+        """Yield one Csound-Score line (or ``None`` for rests) per chronon."""
+
+        chronon_list = list(consecution)
+        chronon_count = len(chronon_list)
+        beat_count_array = np.fromiter(
+            (chronon.duration.beat_count for chronon in chronon_list),
+            dtype=float,
+            count=chronon_count,
+        )
+        rest_detector = self._rest_detector
+        is_rest_list = list(map(rest_detector.is_rest, chronon_list))
+        # Column functions only get chronons which aren't known rests.
+        if has_known_rest := any(is_rest_list):
+            column_chronon_list = [
+                chronon
+                for chronon, is_rest in zip(chronon_list, is_rest_list)
+                if not is_rest
+            ]
+        else:
+            column_chronon_list = chronon_list
+        column_list: list[typing.Sequence[typing.Optional[str]]] = [
+            ["i"] * chronon_count
+        ]
+        report = _conversion_report.get() if self.profile else None
+        for nth_p_field, p_field_function in enumerate(self.pfield_tuple):
+            if nth_p_field == 1 and p_field_function is None:
+                column = (
+                    np.asarray(
+                        self._get_absolute_entry_delay_list(
+                            beat_count_array.tolist(), absolute_entry_delay
+                        )
+                    )
+                    .astype(str)
+                    .tolist()
+                )
+            elif p_field_function is _duration_p_field:
+                column = [
+                    beat_count if is_positive else None
+                    for beat_count, is_positive in zip(
+                        beat_count_array.astype(str).tolist(),
+                        (beat_count_array > 0).tolist(),
+                    )
+                ]
+            else:
+                column = None
+                if isinstance(p_field_function, ColumnPField):
+                    start = time.perf_counter()
+                    try:
+                        p_field_value_array = p_field_function.function(
+                            column_chronon_list
+                        )
+                    except AttributeError:
+                        # Rests: fall back to chronon-wise calculation
+                        pass
+                    else:
+                        column = self._format_p_field_column(
+                            nth_p_field, p_field_value_array
+                        )
+                    if report is not None:
+                        p_field_name = f"p{nth_p_field + 1}"
+                        report.p_field_duration_dict[p_field_name] = (
+                            report.p_field_duration_dict.get(p_field_name, 0)
+                            + time.perf_counter()
+                            - start
+                        )
+                        if column is not None:
+                            report.warning_count += column.count(None)
+                    if column is not None and has_known_rest:
+                        # Known rests have no value.
+                        p_field_value_iterator = iter(column)
+                        column = [
+                            None if is_rest else next(p_field_value_iterator)
+                            for is_rest in is_rest_list
+                        ]
+                if column is None:
+                    format_p_field = self._compile_p_field_formatter(
+                        nth_p_field,
+                        self._p_field_function_tuple[nth_p_field],  # type: ignore
+                        nth_p_field in self._trusted_nth_p_field_set,
+                    )
+                    column = []
+                    for nth_chronon, chronon in enumerate(chronon_list):
+                        p_field_value = None
+                        if not is_rest_list[nth_chronon]:
+                            try:
+                                p_field_value = format_p_field(chronon)
+                            except AttributeError as e:
+                                rest_detector.add(chronon, e)
+                                is_rest_list[nth_chronon] = True
+                        column.append(p_field_value)
+            column_list.append(column)
+
+        if report is not None:
+            report.chronon_count += chronon_count
+            report.rest_count += sum(is_rest_list)
+        for is_rest, p_field_tuple in zip(is_rest_list, zip(*column_list)):
+            yield None if is_rest else " ".join(filter(None, p_field_tuple))
+
+    @staticmethod
+    def _is_column_data(data: typing.Any) -> bool:
+        return isinstance(data, dict) or (
+            np is not None and isinstance(data, np.ndarray)
+        )
+
+    @staticmethod
+    def _get_p_field_column_dict(column_data: typing.Any) -> dict[int, typing.Any]:
+        """Map index of each p-field to its column (as numpy array)."""
+
+        if np is None:
+            raise ImportError(
+                "Converting column data needs numpy. Please install "
+                "'mutwo.csound[numpy]' or 'numpy'."
+            )
+        if isinstance(column_data, np.ndarray):
+            if column_data.dtype.names is None:
+                raise ValueError(
+                    "Column data needs to be a structured array with p-field "
+                    "names (e.g. 'p4') as field names."
+                )
+            column_data = {name: column_data[name] for name in column_data.dtype.names}
+        column_dict = {}
+        for p_field_name, column in column_data.items():
+            if not re.fullmatch(r"p[1-9]\d*", p_field_name):
+                raise ValueError(
+                    f"Invalid p-field name '{p_field_name}'. P-field names "
+                    "start with 'p' followed by a number bigger than 0."
+                )
+            column_dict[int(p_field_name[1:]) - 1] = np.asarray(column)
+        if len({len(column) for column in column_dict.values()}) > 1:
+            raise ValueError("All columns need to have the same length.")
+        return column_dict
+
+    def _iter_column_data_lines(self, column_data: typing.Any) -> typing.Iterator[str]:
+        """Yield Csound-Score lines of column data (see :meth:`iter_lines`)."""
+
+        column_dict = self._get_p_field_column_dict(column_data)
+        row_count = len(next(iter(column_dict.values()), ()))
+        if 0 not in column_dict:
+            # Default instrument
+            column_dict[0] = np.ones(row_count, dtype=int)
+        if 1 not in column_dict:
+            # Events without start times follow each other.
+            if 2 not in column_dict:
+                raise ValueError("Column data needs a 'p2' or a 'p3' column.")
+            column_dict[1] = np.asarray(
+                self._get_absolute_entry_delay_list(
+                    column_dict[2].astype(float).tolist()
+                )
+            )
+        p_field_count = max(column_dict) + 1
+        if missing_p_field_list := [
+            f"p{nth_p_field + 1}"
+            for nth_p_field in range(p_field_count)
+            if nth_p_field not in column_dict
+        ]:
+            warnings.warn(
+                f"Couldn't find any column for the p-fields {missing_p_field_list}. "
+                "Assigned these p-fields to 0.",
+                MissingPFieldWarning,
+            )
+        column_list = [
+            column_dict.get(nth_p_field, np.zeros(row_count, dtype=int))
+            for nth_p_field in range(p_field_count)
+        ]
+        order = None
+        if self.sort_by_time:
+            order = np.argsort(column_list[1], kind="stable")
+
+        format_p_field_column = self._format_p_field_column
+        block_size = csound_converters.configurations.COLUMN_BLOCK_SIZE
+        for start in range(0, row_count, block_size):
+            if order is None:
+                block_column_list = [
+                    column[start : start + block_size] for column in column_list
+                ]
+            else:
+                block_order = order[start : start + block_size]
+                block_column_list = [column[block_order] for column in column_list]
+            formatted_column_list = [
+                format_p_field_column(nth_p_field, column)
+                for nth_p_field, column in enumerate(block_column_list)
+            ]
+            if any(None in column for column in formatted_column_list):
+                # Ignored p-field values
+                for p_field_tuple in zip(*formatted_column_list):
+                    yield " ".join(filter(None, ("i", *p_field_tuple)))
+            else:
+                yield from map(
+                    " ".join,
+                    zip(itertools.repeat("i"), *formatted_column_list),
+                )
+
+    @staticmethod
+    def _get_column_array(value_list: list[typing.Any]) -> typing.Any:
+        # Numpy would write mixed integers and floats as floats and would
+        # turn unsupported values into strings.
+        if not value_list:
+            return np.array(value_list, dtype=float)
+        if len(set(map(type, value_list))) == 1 and type(value_list[0]) in (
+            float,
+            int,
+            str,
+        ):
+            return np.array(value_list)
+        return np.array(value_list, dtype=object)
+
+    @staticmethod
+    def _round_csound_score_token(token: str, precision: int) -> str:
+        # Integers and strings are never rounded.
+        if token[0] == '"' or not ("." in token or "e" in token):
+            return token
+        try:
+            value = float(token)
+        except ValueError:
+            return token
+        if not math.isfinite(value):
+            return token
+        token = f"{value:.{precision}f}".rstrip("0").rstrip(".")
+        return "0" if token == "-0" else token
+
+    @staticmethod
+    def _is_csound_score_start_time_successive(
+        token: str, previous_token_list: list[str]
+    ) -> bool:
+        """Check if csound's '+' means the same as the start time."""
+
+        try:
+            previous_duration = float(previous_token_list[2])
+            return (
+                previous_duration >= 0
+                and float(previous_token_list[1]) + previous_duration == float(token)
+            )
+        except (IndexError, ValueError):
+            return False
+
+    def _iter_compact_lines(
+        self, csound_score_line_iterator: typing.Iterator[str]
+    ) -> typing.Iterator[str]:
+        """Round numbers and replace repeated values by csound's carry symbols."""
+
+        precision, carry = self.precision, self.carry
+        find_token = self._csound_score_token_pattern.findall
+        round_token = self._round_csound_score_token
+        # The p-fields of the previous i-statement (after csound resolved all
+        # carried values).
+        previous_token_list: typing.Optional[list[str]] = None
+        # Start times in macros are moved by the clock base (see
+        # 'compress_repeats'), so they are never carried.
+        is_macro = False
+        for csound_score_line in csound_score_line_iterator:
+            # Annotations, empty lines, macros and clock changes
+            if not csound_score_line.startswith("i"):
+                # Values can't be carried over macros and clock changes.
+                if csound_score_line and csound_score_line[0] != ";":
+                    previous_token_list = None
+                    if csound_score_line.startswith("#define"):
+                        is_macro = True
+                    elif csound_score_line == "#":
+                        is_macro = False
+                yield csound_score_line
+                continue
+            token_list = find_token(csound_score_line)[1:]
+            if precision is not None:
+                token_list[1:] = (
+                    round_token(token, precision) for token in token_list[1:]
+                )
+            if carry:
+                resolved_token_list = token_list
+                if (
+                    token_list
+                    and previous_token_list
+                    and previous_token_list[0] == token_list[0]
+                ):
+                    # Csound carries omitted trailing p-fields.
+                    resolved_token_list = (
+                        token_list + previous_token_list[len(token_list) :]
+                    )
+                    compact_token_list = list(token_list)
+                    for nth_token, token in enumerate(
+                        token_list[1 : len(previous_token_list)], 1
+                    ):
+                        if (
+                            token == previous_token_list[nth_token]
+                            and token[0] != '"'
+                        ):
+                            compact_token_list[nth_token] = "."
+                    if len(token_list) > 1 and is_macro:
+                        compact_token_list[1] = token_list[1]
+                    elif (
+                        len(token_list) > 1
+                        and compact_token_list[1] != "."
+                        and self._is_csound_score_start_time_successive(
+                            token_list[1], previous_token_list
+                        )
+                    ):
+                        compact_token_list[1] = "+"
+                    while (
+                        len(compact_token_list) > 3 and compact_token_list[-1] == "."
+                    ):
+                        compact_token_list.pop()
+                    token_list = compact_token_list
+                previous_token_list = resolved_token_list
+            yield " ".join(("i", *token_list))
+
+    def _iter_consecution_entry_delays(
+        self,
+        consecution: core_events.Consecution,
+        absolute_entry_delay: float,
+        beat_count_dict: dict[int, float],
+    ) -> typing.Iterator[tuple[float, core_events.abc.Event]]:
+        """Yield each event of a consecution with its absolute entry delay.
+
+        The local entry delays are calculated with one cumulative pass.
+        """
+
+        n_digits = core_parameters.configurations.ROUND_DURATION_TO_N_DIGITS
+        get_beat_count = self._get_beat_count
+        local_entry_delay = 0.0
+        for event in consecution:
+            yield round(local_entry_delay + absolute_entry_delay, n_digits), event
+            local_entry_delay = round(
+                local_entry_delay + get_beat_count(event, beat_count_dict), n_digits
+            )
+
+    @staticmethod
+    def _get_absolute_entry_delay_list(
+        beat_count_list: list[float], absolute_entry_delay: float = 0.0
+    ) -> list[float]:
+        """Get the absolute entry delay of each event of a consecution.
+
+        Local entry delays are rounded after each event, exactly like in
+        :meth:`_iter_consecution_entry_delays`, so that columns get the
+        same p2 values as chronons.
+        """
+
+        if not beat_count_list:
+            return []
+        n_digits = core_parameters.configurations.ROUND_DURATION_TO_N_DIGITS
+        return [
+            round(local_entry_delay + absolute_entry_delay, n_digits)
+            for local_entry_delay in itertools.accumulate(
+                beat_count_list[:-1],
+                lambda local_entry_delay, beat_count: round(
+                    local_entry_delay + beat_count, n_digits
+                ),
+                initial=0.0,
+            )
+        ]
+
+    def _iter_timed_chronons(
+        self,
+        event_to_convert: core_events.abc.Event,
+        absolute_entry_delay: float = 0.0,
+        beat_count_dict: typing.Optional[dict[int, float]] = None,
+    ) -> typing.Iterator[tuple[float, core_events.Chronon]]:
+        """Yield each chronon together with its absolute entry delay in beats.
+
+        The absolute entry delays are equal to the p2 values of the
+        chronons in the csound score.
+        """
+
+        if beat_count_dict is None:
+            beat_count_dict = {}
+        # Explicit stack (see '_iter_walked_lines').
+        timed_event_iterator_stack: list[
+            typing.Iterator[tuple[float, core_events.abc.Event]]
+        ] = [iter(((absolute_entry_delay, event_to_convert),))]
+        while timed_event_iterator_stack:
+            for event_entry_delay, event in timed_event_iterator_stack[-1]:
+                match event:
+                    case core_events.Chronon():
+                        yield event_entry_delay, event
+                    case core_events.Consecution():
+                        timed_event_iterator_stack.append(
+                            self._iter_consecution_entry_delays(
+                                event, event_entry_delay, beat_count_dict
+                            )
+                        )
+                        break
+                    case core_events.Concurrence():
+                        timed_event_iterator_stack.append(
+                            zip(itertools.repeat(event_entry_delay), event)
+                        )
+                        break
+                    case _:
+                        raise TypeError(
+                            f"Can't convert object '{event}' of type "
+                            f"'{type(event)}' with EventToCsoundScore."
+                        )
+            else:
+                timed_event_iterator_stack.pop()
+
+    @staticmethod
+    def _get_event_count(
+        event_to_convert: core_events.abc.Event, event_count_dict: dict[int, int]
+    ) -> int:
+        """Count an event and all events which it contains.
+
+        The counts of compound events are memorized in ``event_count_dict``
+        (with the id of the event as key), like in :meth:`_get_beat_count`.
+        """
+
+        if isinstance(event_to_convert, core_events.Chronon):
+            return 1
+        try:
+            return event_count_dict[id(event_to_convert)]
+        except KeyError:
+            pass
+
+        def get_event_count(event: core_events.abc.Event) -> int:
+            if isinstance(event, core_events.Chronon):
+                return 1
+            return event_count_dict[id(event)]
+
+        # Explicit stack (see '_get_beat_count').
+        event_stack: list[tuple[core_events.abc.Event, bool]] = [
+            (event_to_convert, False)
+        ]
+        while event_stack:
+            event, is_visited = event_stack.pop()
+            if is_visited:
+                event_count_dict[id(event)] = 1 + sum(
+                    map(get_event_count, event)  # type: ignore
+                )
+            elif id(event) not in event_count_dict:
+                event_stack.append((event, True))
+                event_stack.extend(
+                    (child_event, False)
+                    for child_event in event  # type: ignore
+                    if not isinstance(child_event, core_events.Chronon)
+                )
+        return event_count_dict[id(event_to_convert)]
+
+    def _iter_positioned_items(
+        self,
+        compound: core_events.Consecution | core_events.Concurrence,
+        absolute_entry_delay: float,
+        position: int,
+        beat_count_dict: dict[int, float],
+        event_count_dict: dict[int, int],
+    ) -> typing.Iterator[tuple[float, int, str | core_events.abc.Event]]:
+        """Yield the children of a compound event with their absolute entry
+        delay and their position in a pre-order walk of the whole event.
+
+        Flat consecutions in column mode yield their lines instead of their
+        chronons.
+        """
+
+        position += 1
+        if isinstance(compound, core_events.Consecution):
+            timed_event_iterator = self._iter_consecution_entry_delays(
+                compound, absolute_entry_delay, beat_count_dict
+            )
+            if self._is_column_mode and all(
+                isinstance(event, core_events.Chronon) for event in compound
+            ):
+                for nth_event, ((event_entry_delay, _), csound_score_line) in enumerate(
+                    zip(
+                        timed_event_iterator,
+                        self._iter_flat_consecution_columns_with_rests(
+                            compound, absolute_entry_delay
+                        ),
+                    )
+                ):
+                    if csound_score_line is not None:
+                        yield event_entry_delay, position + nth_event, csound_score_line
+                return
+        else:
+            timed_event_iterator = zip(itertools.repeat(absolute_entry_delay), compound)
+        get_event_count = self._get_event_count
+        for event_entry_delay, event in timed_event_iterator:
+            yield event_entry_delay, position, event
+            position += get_event_count(event, event_count_dict)
+
+    def _iter_timed_lines(
+        self,
+        event_to_convert: core_events.abc.Event,
+        absolute_entry_delay: float,
+        beat_count_dict: dict[int, float],
+    ) -> typing.Iterator[tuple[float, str]]:
+        """Yield Csound-Score lines with their absolute entry delays, sorted by time.
+
+        Instead of recursion one heap walks the event: it holds the next
+        child of each compound event which is currently walked (see
+        :meth:`_iter_positioned_items`). The heap is ordered by the
+        absolute entry delays and by the positions of the children in a
+        pre-order walk, so that lines with the same start time keep the
+        order of an unsorted conversion.
+        """
+
+        build_csound_score_line = self._csound_score_line_builder
+        event_count_dict: dict[int, int] = {}
+        heap: list[tuple[float, int, typing.Any, typing.Iterator]] = [
+            (absolute_entry_delay, 0, event_to_convert, iter(()))
+        ]
+        while heap:
+            entry_delay, position, item, item_iterator = heap[0]
+            if (next_item := next(item_iterator, None)) is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (*next_item, item_iterator))
+            match item:
+                case str():
+                    yield entry_delay, item
+                case core_events.Chronon():
+                    csound_score_line = build_csound_score_line(item, entry_delay)
+                    if csound_score_line is not None:
+                        yield entry_delay, csound_score_line
+                case core_events.Consecution() | core_events.Concurrence():
+                    child_iterator = self._iter_positioned_items(
+                        item, entry_delay, position, beat_count_dict, event_count_dict
+                    )
+                    if (child_item := next(child_iterator, None)) is not None:
+                        heapq.heappush(heap, (*child_item, child_iterator))
+                case _:
+                    raise TypeError(
+                        f"Can't convert object '{item}' of type "
+                        f"'{type(item)}' with EventToCsoundScore."
+                    )
+
+    def _iter_compound_end(self) -> typing.Iterator[str]:
+        for _ in range(
+            csound_converters.configurations.N_EMPTY_LINES_AFTER_COMPOUND
+        ):
+            yield ""
+
+    def _iter_consecution(
+        self,
+        consecution: core_events.Consecution,
+        absolute_entry_delay: float,
+        fingerprint_dict: typing.Optional[dict[int, typing.Optional[bytes]]] = None,
+        beat_count_dict: typing.Optional[dict[int, float]] = None,
+    ) -> typing.Iterator[str]:
+        if beat_count_dict is None:
+            beat_count_dict = {}
+        return self._iter_walked_lines(
+            self._iter_compound_items(
+                consecution, absolute_entry_delay, beat_count_dict
+            ),
+            fingerprint_dict,
+            beat_count_dict,
+        )
+
+    def _iter_concurrence(
+        self,
+        concurrence: core_events.Concurrence,
+        absolute_entry_delay: float,
+        fingerprint_dict: typing.Optional[dict[int, typing.Optional[bytes]]] = None,
+        beat_count_dict: typing.Optional[dict[int, float]] = None,
+    ) -> typing.Iterator[str]:
+        if beat_count_dict is None:
+            beat_count_dict = {}
+        return self._iter_walked_lines(
+            self._iter_compound_items(
+                concurrence, absolute_entry_delay, beat_count_dict
+            ),
+            fingerprint_dict,
+            beat_count_dict,
+        )
+
+    def _is_parallel_compound(
+        self, event_to_convert: core_events.abc.Event, depth: int
+    ) -> bool:
+        """Check if the event is split between worker processes."""
+
+        match event_to_convert:
+            case core_events.Concurrence():
+                return depth <= self.parallel_depth  # type: ignore
+            case core_events.Consecution():
+                # Flat consecutions in column mode are converted at once.
+                return depth < self.parallel_depth and not (  # type: ignore
+                    self._is_column_mode
+                    and all(
+                        isinstance(event, core_events.Chronon)
+                        for event in event_to_convert
+                    )
+                )
+        return False
+
+    def _plan_parallel_event(
+        self,
+        event_to_convert: core_events.abc.Event,
+        absolute_entry_delay: float,
+        index_tuple: tuple[int, ...],
+        depth: int,
+        submit: typing.Callable[[list], concurrent.futures.Future],
+        worker_count: int,
+        beat_count_dict: dict[int, float],
+    ) -> typing.Iterator[str | concurrent.futures.Future]:
+        """Yield lines and the futures of branches in the order of the score."""
+
+        if not self._is_parallel_compound(event_to_convert, depth):
+            yield from self._iter_event(
+                event_to_convert, absolute_entry_delay, None, beat_count_dict
+            )
+            return
+        if isinstance(event_to_convert, core_events.Concurrence):
+            yield csound_converters.configurations.CONCURRENCE_ANNOTATION
+            # Successive branches are sent together, so that the overhead of
+            # sending jobs doesn't matter for many short branches.
+            batch_size = max(len(event_to_convert) // (worker_count * 4), 1)
+            branch_list: list = []
+            for index, event in enumerate(event_to_convert):
+                if self._is_parallel_compound(event, depth + 1):
+                    if branch_list:
+                        yield submit(branch_list)
+                        branch_list = []
+                    yield from self._plan_parallel_event(
+                        event,
+                        absolute_entry_delay,
+                        index_tuple + (index,),
+                        depth + 1,
+                        submit,
+                        worker_count,
+                        beat_count_dict,
+                    )
+                    continue
+                branch_list.append((event, index_tuple + (index,), absolute_entry_delay))
+                if len(branch_list) == batch_size:
+                    yield submit(branch_list)
+                    branch_list = []
+            if branch_list:
+                yield submit(branch_list)
+        else:
+            yield csound_converters.configurations.CONSECUTION_ANNOTATION
+            for index, (event_entry_delay, event) in enumerate(
+                self._iter_consecution_entry_delays(
+                    event_to_convert, absolute_entry_delay, beat_count_dict
+                )
+            ):
+                yield from self._plan_parallel_event(
+                    event,
+                    event_entry_delay,
+                    index_tuple + (index,),
+                    depth + 1,
+                    submit,
+                    worker_count,
+                    beat_count_dict,
+                )
+        yield from self._iter_compound_end()
+
+    def _iter_parallel_lines(
+        self, event_to_convert: core_events.abc.Event
+    ) -> typing.Iterator[str]:
+        """Convert branches of concurrences in worker processes."""
+
+        global _inherited_parallel_conversion
+
+        mp_context = self.mp_context or multiprocessing.get_context()
+        is_fork = mp_context.get_start_method() == "fork"
+        worker_count = self.max_workers or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(
+            worker_count, mp_context=mp_context
+        ) as executor:
+            if is_fork:
+                # Forked workers inherit converter and event, only the
+                # position of each branch in the event needs to be sent.
+                def submit(branch_list):
+                    return executor.submit(
+                        _convert_branch_list,
+                        None,
+                        [
+                            (None, index_tuple, absolute_entry_delay)
+                            for _, index_tuple, absolute_entry_delay in branch_list
+                        ],
+                    )
+
+            else:
+
+                def submit(branch_list):
+                    return executor.submit(
+                        _convert_branch_list,
+                        self,
+                        [
+                            (event, (), absolute_entry_delay)
+                            for event, _, absolute_entry_delay in branch_list
+                        ],
+                    )
+
+            with _inherited_parallel_conversion_lock:
+                _inherited_parallel_conversion = (self, event_to_convert)
+                try:
+                    # All branches are submitted before the first result is
+                    # awaited, so that all workers are busy.
+                    plan = list(
+                        self._plan_parallel_event(
+                            event_to_convert,
+                            0.0,
+                            (),
+                            0,
+                            submit,
+                            worker_count,
+                            {},
+                        )
+                    )
+                finally:
+                    _inherited_parallel_conversion = None
+            for item in plan:
+                if isinstance(item, str):
+                    yield item
+                    continue
+                csound_score_line_tuple, count_dict, sample_dict = item.result()
+                if count_dict:
+                    if (collector := _p_field_warning_collector.get()) is None:
+                        collector = _PFieldWarningCollector(self.strict)
+                        collector.update(count_dict, sample_dict)
+                        collector.warn()
+                    else:
+                        collector.update(count_dict, sample_dict)
+                yield from csound_score_line_tuple
+
+    def _convert_consecution(
+        self,
+        consecution: core_events.Consecution,
+        absolute_entry_delay: core_parameters.abc.Duration,
+    ) -> tuple[str, ...]:
+        return tuple(
+            self._iter_consecution(consecution, absolute_entry_delay.beat_count)
+        )
+
+    def _convert_concurrence(
+        self,
+        concurrence: core_events.Concurrence,
+        absolute_entry_delay: core_parameters.abc.Duration,
+    ) -> tuple[str, ...]:
+        return tuple(
+            self._iter_concurrence(concurrence, absolute_entry_delay.beat_count)
+        )
+
+    # ###################################################################### #
+    #                             public api                                 #
+    # ###################################################################### #
+
+    def _publish_report(self, report: ConversionReport):
+        self.report = report
+        if self.report_callback is not None:
+            self.report_callback(report)
+
+    def _iter_profiled_lines(
+        self,
+        csound_score_line_iterator: typing.Iterator[str],
+        report: ConversionReport,
+    ) -> typing.Iterator[str]:
+        """Count lines and measure how long it takes to generate them."""
+
+        perf_counter = time.perf_counter
+        duration = 0.0
+        try:
+            while True:
+                # The report needs to be available for the profiled p-field
+                # functions while the next line is generated.
+                token = _conversion_report.set(report)
+                start = perf_counter()
+                try:
+                    csound_score_line = next(csound_score_line_iterator)
+                except StopIteration:
+                    return
+                finally:
+                    duration += perf_counter() - start
+                    _conversion_report.reset(token)
+                # Annotations can span several lines.
+                report.line_count += 1 + csound_score_line.count("\n")
+                yield csound_score_line
+        finally:
+            report.add_phase_duration("score", duration)
+
+    def _iter_reported_lines(
+        self, csound_score_line_iterator: typing.Iterator[str]
+    ) -> typing.Iterator[str]:
+        report = ConversionReport()
+        yield from self._iter_profiled_lines(csound_score_line_iterator, report)
+        self._publish_report(report)
+
+    @contextlib.contextmanager
+    def _collect_p_field_warnings(self):
+        """Summarize all invalid p-field values of one conversion."""
+
+        if _p_field_warning_collector.get() is not None:
+            # Part of a bigger conversion which already collects warnings.
+            yield
+            return
+        collector = _PFieldWarningCollector(self.strict)
+        token = _p_field_warning_collector.set(collector)
+        try:
+            yield
+        finally:
+            _p_field_warning_collector.reset(token)
+        collector.warn()
+
+    def _iter_collected_lines(
+        self, csound_score_line_iterator: typing.Iterator[str]
+    ) -> typing.Iterator[str]:
+        collector = _PFieldWarningCollector(self.strict)
+        while True:
+            # The lines may be consumed in any context, therefore the
+            # collector is only set while the next line is generated.
+            token = _p_field_warning_collector.set(collector)
+            try:
+                csound_score_line = next(csound_score_line_iterator)
+            except StopIteration:
+                break
+            finally:
+                _p_field_warning_collector.reset(token)
+            yield csound_score_line
+        collector.warn()
+
+    @property
+    def _is_compact(self) -> bool:
+        return self.precision is not None or self.carry
+
+    def _iter_uncompacted_lines(
+        self, event_to_convert: core_events.abc.Event | PFieldColumnDict
+    ) -> typing.Iterator[str]:
+        if self._is_column_data(event_to_convert):
+            return self._iter_column_data_lines(event_to_convert)
+        if self.sort_by_time:
+            return map(
+                operator.itemgetter(1),
+                self._iter_timed_lines(event_to_convert, 0.0, {}),
+            )
+        if self.compress_repeats:
+            return self._iter_walked_lines(
+                iter(((0.0, event_to_convert),)),
+                None,
+                {},
+                _RepeatState(event_to_convert),
+            )
+        if self.parallel_depth is not None:
+            return self._iter_parallel_lines(event_to_convert)
+        fingerprint_dict = None
+        if self.subtree_cache_size > 0:
+            fingerprint_dict = {}
+            self._get_fingerprint(event_to_convert, fingerprint_dict)
+        return self._iter_event(event_to_convert, 0.0, fingerprint_dict)
+
+    def iter_lines(
+        self, event_to_convert: core_events.abc.Event | PFieldColumnDict
+    ) -> typing.Iterator[str]:
+        """Lazily yield each csound score line of the passed event.
+
+        :param event_to_convert: The event that shall be converted to csound
+            score lines. Instead of an event, column data can be passed: a
+            ``dict`` which maps p-field names (e.g. ``"p4"``) to arrays
+            with one value per i-statement or a structured
+            :class:`numpy.ndarray` with p-field names as field names.
+        :type event_to_convert: core_events.abc.Event | PFieldColumnDict
+
+        Lines are generated while the event tree is walked, therefore
+        the memory usage doesn't grow with the size of the score.
+        The lines don't contain any trailing new line character.
+        If the converter is profiled, :attr:`report` is updated as soon
+        as all lines have been yielded.
+
+        >>> from mutwo import core_events
+        >>> from mutwo import csound_converters
+        >>> converter = csound_converters.EventToCsoundScore()
+        >>> for line in converter.iter_lines(core_events.Chronon(2)):
+        ...     print(line)
+        i 1 0.0 2.0
+
+        Column data are written without creating any event: the
+        p-field functions of the converter aren't used, all values are
+        formatted column by column. If p1 is missing, instrument 1
+        is used. If p2 is missing, each i-statement starts when the
+        previous one ends (according to p3). Column data need
+        `numpy <https://numpy.org>`_.
+
+        >>> for line in converter.iter_lines({"p3": [1, 0.5], "p4": ["a", "b"]}):
+        ...     print(line)
+        i 1 0.0 1.0 "a"
+        i 1 1.0 0.5 "b"
+        """
+
+        csound_score_line_iterator = self._iter_uncompacted_lines(event_to_convert)
+        if _p_field_warning_collector.get() is None:
+            csound_score_line_iterator = self._iter_collected_lines(
+                csound_score_line_iterator
+            )
+        if self._is_compact:
+            csound_score_line_iterator = self._iter_compact_lines(
+                csound_score_line_iterator
+            )
+        if (report := _conversion_report.get()) is not None:
+            return self._iter_profiled_lines(csound_score_line_iterator, report)
+        if self.profile:
+            return self._iter_reported_lines(csound_score_line_iterator)
+        return csound_score_line_iterator
+
+    def get_column_dict(
+        self, consecution: core_events.Consecution
+    ) -> PFieldColumnDict:
+        """Extract the p-field values of a flat consecution as column data.
+
+        :param consecution: A :class:`~mutwo.core_events.Consecution` which
+            only contains :class:`~mutwo.core_events.Chronon`.
+        :type consecution: core_events.Consecution
+        :return: A ``dict`` which maps each p-field name to a
+            :class:`numpy.ndarray` with one value per chronon which isn't
+            a rest. Passing it to :meth:`iter_lines` or :meth:`convert`
+            writes the same i-statements as the consecution (without
+            annotations).
+
+        The p-field functions are called while the consecution is walked
+        once. The column data can be stored (e.g. with :func:`numpy.savez`)
+        and converted again without keeping the chronons in memory.
+
+        >>> from mutwo import core_events
+        >>> from mutwo import csound_converters
+        >>> converter = csound_converters.EventToCsoundScore()
+        >>> converter.get_column_dict(
+        ...     core_events.Consecution([core_events.Chronon(1), core_events.Chronon(2)])
+        ... )
+        {'p1': array([1, 1]), 'p2': array([0., 1.]), 'p3': array([1., 2.])}
+        """
+
+        if np is None:
+            raise ImportError(
+                "Column data need numpy. Please install "
+                "'mutwo.csound[numpy]' or 'numpy'."
+            )
+        rest_detector = self._rest_detector
+        value_list_list: list[list[typing.Any]] = [[] for _ in self.pfield_tuple]
+        chronon_list = []
+        # Column functions are called once for all chronons.
+        p_field_function_list = [
+            (nth_p_field, p_field_function)
+            for nth_p_field, p_field_function in enumerate(self.pfield_tuple)
+            if not isinstance(p_field_function, ColumnPField)
+        ]
+        for absolute_entry_delay, chronon in self._iter_consecution_entry_delays(
+            consecution, 0.0, {}
+        ):
+            if not isinstance(chronon, core_events.Chronon):
+                raise ValueError(
+                    "Only consecutions which contain chronons can be "
+                    f"converted to column data, but found '{chronon}'."
+                )
+            if rest_detector.is_rest(chronon):
+                continue
+            try:
+                p_field_value_list = [
+                    absolute_entry_delay
+                    if p_field_function is None
+                    else p_field_function(chronon)
+                    for _, p_field_function in p_field_function_list
+                ]
+            except AttributeError as e:
+                rest_detector.add(chronon, e)
+                continue
+            for (nth_p_field, _), p_field_value in zip(
+                p_field_function_list, p_field_value_list
+            ):
+                value_list_list[nth_p_field].append(p_field_value)
+            chronon_list.append(chronon)
+
+        column_dict = {}
+        for nth_p_field, p_field_function in enumerate(self.pfield_tuple):
+            if isinstance(p_field_function, ColumnPField):
+                column = np.asarray(p_field_function.function(chronon_list))
+            else:
+                column = self._get_column_array(value_list_list[nth_p_field])
+            column_dict[f"p{nth_p_field + 1}"] = column
+        return column_dict
+
+    def clear_subtree_cache(self):
+        """Forget all memorized csound score lines (see ``subtree_cache_size``)."""
+
+        with self._subtree_cache_lock:
+            self._subtree_cache.clear()
+
+    def convert(
+        self, event_to_convert: core_events.abc.Event | PFieldColumnDict, path: str
+    ) -> None:
+        """Render csound score file (.sco) from the passed event.
+
+        :param event_to_convert: The event that shall be rendered to a csound score
+            file (or column data, see :meth:`iter_lines`).
+        :type event_to_convert: core_events.abc.Event | PFieldColumnDict
+        :param path: where to write the csound score file
+        :type path: str
+
+        The file at ``path`` is only replaced once the whole score has
+        been written. After writing the file, :attr:`score_size_report` contains a
+        :class:`ScoreSizeReport` with the size of the score file and,
+        if the converter is profiled, :attr:`report` contains a
+        :class:`ConversionReport`.
+
+        >>> import random
+        >>> from mutwo import core_events
+        >>> from mutwo import csound_converters
+        >>> converter = csound_converters.EventToCsoundScore(
+        ...    p4=lambda event: event.tempo_envelope.duration
         ... )
         >>> event = core_events.Consecution(
         ...    [
@@ -267,13 +2740,370 @@ class EventToCsoundScore(core_converters.abc.EventConverter):
         >>> converter.convert(event, 'score.sco')
         """
 
-        csound_score_line_tuple = self._convert_event(
-            event_to_convert, core_parameters.DirectDuration(0)
+        report = _conversion_report.get()
+        is_report_owner = report is None and self.profile
+        if is_report_owner:
+            report = ConversionReport()
+        start = time.perf_counter()
+
+        uncompacted_byte_count = 0
+        csound_score_line_iterator = self._iter_uncompacted_lines(event_to_convert)
+        if self._is_compact:
+
+            def count_bytes(csound_score_line_iterator):
+                nonlocal uncompacted_byte_count
+                for csound_score_line in csound_score_line_iterator:
+                    uncompacted_byte_count += len(csound_score_line.encode()) + 1
+                    yield csound_score_line
+
+            csound_score_line_iterator = self._iter_compact_lines(
+                count_bytes(csound_score_line_iterator)
+            )
+        if report is not None:
+            score_duration = report.phase_duration_dict.get("score", 0)
+            csound_score_line_iterator = self._iter_profiled_lines(
+                csound_score_line_iterator, report
+            )
+        # Lines are written while the event tree is walked, so that
+        # the score never has to be held in memory as a whole. They are
+        # written to a temporary file first, so that a failed conversion
+        # never leaves a truncated score at 'path'.
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            prefix=".", suffix=".sco", dir=os.path.dirname(path) or None
+        )
+        try:
+            with self._collect_p_field_warnings(), open(
+                file_descriptor,
+                "w",
+                buffering=csound_converters.configurations.SCORE_FILE_BUFFER_SIZE,
+            ) as f:
+                for csound_score_line in csound_score_line_iterator:
+                    f.write(csound_score_line)
+                    break
+                f.writelines(map("\n".__add__, csound_score_line_iterator))
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        byte_count = os.path.getsize(path)
+        self.score_size_report = ScoreSizeReport(
+            byte_count,
+            # The last line has no trailing new line character.
+            max(uncompacted_byte_count - 1, 0) if self._is_compact else byte_count,
+        )
+        if report is not None:
+            score_duration = report.phase_duration_dict["score"] - score_duration
+            report.add_phase_duration(
+                "write", time.perf_counter() - start - score_duration
+            )
+            if is_report_owner:
+                self._publish_report(report)
+
+    def _write_chunk(
+        self, csound_score_line_iterator: typing.Iterator[str], path: str
+    ) -> int:
+        if self._is_compact:
+            # Each chunk is compacted on its own, so that chunks don't
+            # depend on each other.
+            csound_score_line_iterator = self._iter_compact_lines(
+                csound_score_line_iterator
+            )
+        line_count = 0
+        with open(
+            path,
+            "w",
+            buffering=csound_converters.configurations.SCORE_FILE_BUFFER_SIZE,
+        ) as f:
+            for csound_score_line in csound_score_line_iterator:
+                f.write(csound_score_line + "\n")
+                line_count += 1 + csound_score_line.count("\n")
+        return line_count
+
+    @staticmethod
+    def _remove_chunk_files(path_iterable: typing.Iterable[str]):
+        """Don't leave an incomplete chunked score behind."""
+
+        for path in path_iterable:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def _write_line_count_chunk_list(
+        self,
+        event_to_convert: core_events.abc.Event,
+        directory: str,
+        branch_index: typing.Optional[int],
+        max_line_count: int,
+    ) -> list[ScoreChunk]:
+        prefix = "" if branch_index is None else f"{branch_index}_"
+        csound_score_line_iterator = self._iter_uncompacted_lines(event_to_convert)
+        chunk_list: list[ScoreChunk] = []
+        path_list: list[str] = []
+        try:
+            # Only one chunk is held in memory at once.
+            while csound_score_line_list := list(
+                itertools.islice(csound_score_line_iterator, max_line_count)
+            ):
+                path = os.path.join(directory, f"{prefix}{len(chunk_list)}.sco")
+                path_list.append(path)
+                line_count = self._write_chunk(iter(csound_score_line_list), path)
+                chunk_list.append(ScoreChunk(path, line_count, branch_index))
+        except BaseException:
+            self._remove_chunk_files(path_list)
+            raise
+        return chunk_list
+
+    def _write_time_chunk_list(
+        self,
+        event_to_convert: core_events.abc.Event,
+        directory: str,
+        branch_index: typing.Optional[int],
+        chunk_duration: float,
+    ) -> list[ScoreChunk]:
+        prefix = "" if branch_index is None else f"{branch_index}_"
+        build_csound_score_line = self._csound_score_line_builder
+        max_open_file_count = csound_converters.configurations.MAX_OPEN_CHUNK_FILE_COUNT
+        # Chronons aren't sorted by time, therefore lines are appended to
+        # chunk files in any order. Only the recently used chunk files are
+        # kept open (least recently used first), all others are opened
+        # again in append mode when they get new lines.
+        file_dict: collections.OrderedDict[int, typing.TextIO] = (
+            collections.OrderedDict()
+        )
+        line_count_dict: dict[int, int] = {}
+        try:
+            for absolute_entry_delay, chronon in self._iter_timed_chronons(
+                event_to_convert
+            ):
+                csound_score_line = build_csound_score_line(
+                    chronon, absolute_entry_delay
+                )
+                if csound_score_line is None:
+                    continue
+                nth_chunk = int(absolute_entry_delay // chunk_duration)
+                try:
+                    f = file_dict[nth_chunk]
+                except KeyError:
+                    if len(file_dict) >= max_open_file_count:
+                        file_dict.popitem(last=False)[1].close()
+                    is_new = nth_chunk not in line_count_dict
+                    f = file_dict[nth_chunk] = open(
+                        os.path.join(directory, f"{prefix}{nth_chunk}.sco"),
+                        "w" if is_new else "a",
+                    )
+                    if is_new:
+                        line_count_dict[nth_chunk] = 0
+                else:
+                    file_dict.move_to_end(nth_chunk)
+                f.write(csound_score_line + "\n")
+                line_count_dict[nth_chunk] += 1
+        except BaseException:
+            for f in file_dict.values():
+                f.close()
+            self._remove_chunk_files(
+                os.path.join(directory, f"{prefix}{nth_chunk}.sco")
+                for nth_chunk in line_count_dict
+            )
+            raise
+        for f in file_dict.values():
+            f.close()
+        chunk_list = []
+        for nth_chunk in sorted(line_count_dict):
+            path = os.path.join(directory, f"{prefix}{nth_chunk}.sco")
+            line_count = line_count_dict[nth_chunk]
+            if self._is_compact:
+                with open(path, "r") as f:
+                    csound_score_line_list = f.read().splitlines()
+                line_count = self._write_chunk(iter(csound_score_line_list), path)
+            chunk_list.append(
+                ScoreChunk(
+                    path,
+                    line_count,
+                    branch_index,
+                    nth_chunk * chunk_duration,
+                    (nth_chunk + 1) * chunk_duration,
+                )
+            )
+        return chunk_list
+
+    def _write_chunk_list(
+        self,
+        event_to_convert: core_events.abc.Event,
+        directory: str,
+        branch_index: typing.Optional[int],
+        max_line_count: typing.Optional[int],
+        chunk_duration: typing.Optional[float],
+    ) -> list[ScoreChunk]:
+        if max_line_count is not None:
+            return self._write_line_count_chunk_list(
+                event_to_convert, directory, branch_index, max_line_count
+            )
+        return self._write_time_chunk_list(
+            event_to_convert, directory, branch_index, chunk_duration  # type: ignore
         )
-        # convert events to strings (where each string represents one csound score line)
-        # write csound score lines to file
-        with open(path, "w") as f:
-            f.write("\n".join(csound_score_line_tuple))
+
+    def _write_parallel_chunk_list(
+        self,
+        event_to_convert: core_events.Concurrence,
+        directory: str,
+        branch_index_list: list[int],
+        max_line_count: typing.Optional[int],
+        chunk_duration: typing.Optional[float],
+        max_workers: int,
+    ) -> list[ScoreChunk]:
+        """Write the chunk files of each branch in worker processes."""
+
+        global _inherited_parallel_conversion
+
+        mp_context = self.mp_context or multiprocessing.get_context()
+        is_fork = mp_context.get_start_method() == "fork"
+        with concurrent.futures.ProcessPoolExecutor(
+            min(max_workers, len(branch_index_list)), mp_context=mp_context
+        ) as executor:
+            with _inherited_parallel_conversion_lock:
+                _inherited_parallel_conversion = (self, event_to_convert)
+                try:
+                    future_list = [
+                        executor.submit(
+                            _write_branch_chunk_list,
+                            # Forked workers inherit converter and event.
+                            None if is_fork else self,
+                            None if is_fork else event_to_convert[branch_index],
+                            branch_index,
+                            directory,
+                            max_line_count,
+                            chunk_duration,
+                        )
+                        for branch_index in branch_index_list
+                    ]
+                finally:
+                    _inherited_parallel_conversion = None
+            chunk_list: list[ScoreChunk] = []
+            exception = None
+            collector = _p_field_warning_collector.get()
+            for future in future_list:
+                # Each failed branch removes its own chunk files, the chunk
+                # files of all other branches are removed here.
+                try:
+                    branch_chunk_list, count_dict, sample_dict = future.result()
+                except BaseException as branch_exception:
+                    exception = exception or branch_exception
+                    continue
+                chunk_list.extend(branch_chunk_list)
+                if count_dict:
+                    collector.update(count_dict, sample_dict)  # type: ignore
+        if exception is not None:
+            self._remove_chunk_files(chunk.path for chunk in chunk_list)
+            raise exception
+        return chunk_list
+
+    def convert_chunked(
+        self,
+        event_to_convert: core_events.abc.Event,
+        directory: str,
+        max_line_count: typing.Optional[int] = None,
+        chunk_duration: typing.Optional[core_constants.Real] = None,
+        max_workers: typing.Optional[int] = None,
+    ) -> tuple[ScoreChunk, ...]:
+        """Write the csound score of the passed event to many chunk files.
+
+        :param event_to_convert: The event that shall be converted.
+        :type event_to_convert: core_events.abc.Event
+        :param directory: Where to write the chunk files. The directory
+            needs to exist.
+        :type directory: str
+        :param max_line_count: If set, a new chunk file is started after
+            this number of csound score lines (as yielded by
+            :meth:`iter_lines`, an annotation counts as one line).
+        :type max_line_count: typing.Optional[int]
+        :param chunk_duration: If set, each chunk file contains all
+            i-statements which start in a time window of this duration
+            (in beats). Annotations are omitted.
+        :type chunk_duration: typing.Optional[core_constants.Real]
+        :param max_workers: How many worker processes generate the chunk
+            files of the branches of a :class:`~mutwo.core_events.Concurrence`
+            at the same time. They are started by the ``mp_context`` of the
+            converter. If ``None`` the number of CPUs is used. Default to
+            ``None``.
+        :type max_workers: typing.Optional[int]
+        :return: All chunks, in the order in which they are included.
+
+        Either ``max_line_count`` or ``chunk_duration`` needs to be set.
+        Besides the numbered chunk files, the directory contains the file
+        ``index.sco`` which includes all chunks with csound's ``#include``
+        directive and can be passed to csound like any other score, and the
+        file ``index.json`` which lists all chunks (with the attributes of
+        :class:`ScoreChunk`). If the event is a
+        :class:`~mutwo.core_events.Concurrence`, the chunks of each of its
+        branches are generated independently and in parallel worker
+        processes (chunk files are then named ``BRANCH_CHUNK.sco``). As
+        in parallel conversions (see ``parallel_depth``), these branches are
+        neither memorized nor profiled. If the converter compacts
+        the score (see ``precision`` and ``carry``), each chunk is compacted
+        on its own.
+
+        >>> import tempfile
+        >>> from mutwo import core_events
+        >>> from mutwo import csound_converters
+        >>> converter = csound_converters.EventToCsoundScore()
+        >>> event = core_events.Consecution(
+        ...     [core_events.Chronon(1) for _ in range(10)]
+        ... )
+        >>> chunk_tuple = converter.convert_chunked(
+        ...     event, tempfile.mkdtemp(), chunk_duration=4
+        ... )
+        >>> [(chunk.line_count, chunk.start) for chunk in chunk_tuple]
+        [(4, 0), (4, 4), (2, 8)]
+        """
+
+        if (max_line_count is None) == (chunk_duration is None):
+            raise ValueError(
+                "Please set either 'max_line_count' or 'chunk_duration'."
+            )
+        if isinstance(event_to_convert, core_events.Concurrence):
+            branch_index_list = list(range(len(event_to_convert)))
+        else:
+            branch_index_list = [None]
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        with self._collect_p_field_warnings():
+            if max_workers == 1 or len(branch_index_list) == 1:
+                chunk_list = []
+                try:
+                    for branch_index in branch_index_list:
+                        chunk_list.extend(
+                            self._write_chunk_list(
+                                event_to_convert
+                                if branch_index is None
+                                else event_to_convert[branch_index],  # type: ignore
+                                directory,
+                                branch_index,
+                                max_line_count,
+                                chunk_duration,
+                            )
+                        )
+                except BaseException:
+                    self._remove_chunk_files(chunk.path for chunk in chunk_list)
+                    raise
+            else:
+                chunk_list = self._write_parallel_chunk_list(
+                    event_to_convert,  # type: ignore
+                    directory,
+                    branch_index_list,  # type: ignore
+                    max_line_count,
+                    chunk_duration,
+                    max_workers,
+                )
+        if chunk_duration is not None:
+            chunk_list.sort(key=lambda chunk: (chunk.start, chunk.branch_index or 0))
+
+        with open(os.path.join(directory, "index.sco"), "w") as f:
+            f.writelines(
+                f'#include "{os.path.abspath(chunk.path)}"\n' for chunk in chunk_list
+            )
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump([dataclasses.asdict(chunk) for chunk in chunk_list], f, indent=2)
+        return tuple(chunk_list)
 
 
 class EventToSoundFile(core_converters.abc.Converter):
@@ -286,6 +3116,39 @@ class EventToSoundFile(core_converters.abc.Converter):
         csound flags can be found in :mod:`mutwo.csound_converters.constants`.
     :param remove_score_file: Set to True if :class:`EventToSoundFile` shall remove the
         csound score file after rendering. Defaults to False.
+    :param timeout: How many seconds csound may run before it is killed and
+        :class:`CsoundTimeoutError` is raised. If ``None``,
+        :const:`mutwo.csound_converters.configurations.CSOUND_TIMEOUT` is used.
+        Default to ``None``.
+    :param render_cache: If set, sound files are taken from this
+        :class:`RenderCache` whenever score, orchestra, flags and csound
+        version match an earlier render and new renders are added to it.
+        Default to ``None``.
+    :param pipe_score: Set to True if the score shall be sent to csound via
+        its standard input instead of writing a score file. Csound reads the
+        score from :const:`mutwo.csound_converters.configurations.SCORE_PIPE_PATH`.
+        The score is kept in memory and no score file ever touches the disk
+        (which is faster on slow or network filesystems). Defaults to False.
+    :param profile: Set to True to measure each render. The
+        :class:`ConversionReport` is added to the returned :class:`RenderResult`
+        and stored in :attr:`report`. For timings of p-field functions and
+        chronon, rest and warning counters, ``event_to_csound_score`` needs
+        to be profiled as well. Defaults to False.
+    :param report_callback: If set, it is called with the
+        :class:`ConversionReport` after each render. Setting a callback
+        enables ``profile``. Defaults to ``None``.
+    :param worker_pool: If set, scores are rendered by the csound instances
+        of this :class:`CsoundWorkerPool` instead of new csound processes.
+        The pool has to use the same orchestra. Defaults to ``None``.
+    :param memory_map: Set to True to map the rendered WAV file into memory
+        (see :func:`mutwo.csound_converters.sound_files.memory_map_wav`).
+        The samples are added as ``sample_array`` to the returned
+        :class:`RenderResult`, so that they can be analysed without
+        reading the file again. Combine it with
+        :const:`mutwo.csound_converters.constants.FORMAT_FLOAT` or
+        :const:`mutwo.csound_converters.constants.FORMAT_64BIT` to get
+        floating point samples. This feature needs
+        `numpy <https://numpy.org>`_. Defaults to False.
 
     **Disclaimer:** Before using the :class:`EventToSoundFile`, make sure
     `Csound <http://www.csounds.com/>`_ has been correctly installed on
@@ -298,37 +3161,1019 @@ class EventToSoundFile(core_converters.abc.Converter):
         event_to_csound_score: EventToCsoundScore,
         *flag: str,
         remove_score_file: bool = False,
+        timeout: typing.Optional[float] = None,
+        render_cache: typing.Optional[csound_converters.RenderCache] = None,
+        pipe_score: bool = False,
+        profile: bool = False,
+        report_callback: typing.Optional[
+            typing.Callable[[ConversionReport], None]
+        ] = None,
+        worker_pool: typing.Optional[csound_converters.CsoundWorkerPool] = None,
+        memory_map: bool = False,
     ):
+        if worker_pool is not None and os.path.abspath(
+            worker_pool.csound_orchestra_path
+        ) != os.path.abspath(csound_orchestra_path):
+            raise ValueError(
+                "The CsoundWorkerPool uses the orchestra "
+                f"'{worker_pool.csound_orchestra_path}' instead of "
+                f"'{csound_orchestra_path}'."
+            )
+        self.worker_pool = worker_pool
         self.flags = flag
         self.csound_orchestra_path = csound_orchestra_path
         self.event_to_csound_score = event_to_csound_score
         self.remove_score_file = remove_score_file
+        self.timeout = timeout
+        self.render_cache = render_cache
+        self.pipe_score = pipe_score
+        self.profile = profile or report_callback is not None
+        self.report_callback = report_callback
+        self.report: typing.Optional[ConversionReport] = None
+        self.memory_map = memory_map
+
+    @contextlib.contextmanager
+    def _report(self) -> typing.Iterator[typing.Optional[ConversionReport]]:
+        """Collect the report of a render (if the converter is profiled)."""
+
+        if not self.profile:
+            yield None
+            return
+        report = ConversionReport()
+        token = _conversion_report.set(report)
+        try:
+            yield report
+        finally:
+            _conversion_report.reset(token)
+        self.report = report
+        if self.report_callback is not None:
+            self.report_callback(report)
+
+    @staticmethod
+    def _add_report(
+        render_result: RenderResult, report: typing.Optional[ConversionReport]
+    ) -> RenderResult:
+        if report is None:
+            return render_result
+        return dataclasses.replace(render_result, report=report)
+
+    def _add_sample_array(self, render_result: RenderResult) -> RenderResult:
+        if not self.memory_map:
+            return render_result
+        sample_array, sample_rate = csound_converters.sound_files.memory_map_wav(
+            render_result.path
+        )
+        return dataclasses.replace(
+            render_result, sample_array=sample_array, sample_rate=sample_rate
+        )
+
+    def _get_score_path(self, path: str, score_path: typing.Optional[str]) -> str:
+        if self.pipe_score:
+            return csound_converters.configurations.SCORE_PIPE_PATH
+        return score_path if score_path else path + ".sco"
+
+    def _get_score_data(self, event_to_convert: core_events.abc.Event) -> bytes:
+        return "\n".join(
+            self.event_to_csound_score.iter_lines(event_to_convert)
+        ).encode()
+
+    def _get_timeout(self) -> typing.Optional[float]:
+        if self.timeout is None:
+            return csound_converters.configurations.CSOUND_TIMEOUT
+        return self.timeout
+
+    def _get_flag_tuple(self) -> tuple[str, ...]:
+        flag_list = []
+        for flag in self.flags:
+            # One flag may contain several arguments (e.g. '-O null').
+            flag_list.extend(shlex.split(flag))
+        return tuple(flag_list)
+
+    def _get_command_tuple(
+        self,
+        path: str,
+        score_path: str,
+        flag_tuple: typing.Optional[tuple[str, ...]] = None,
+    ) -> tuple[str, ...]:
+        """Csound command as argument tuple (which doesn't need a shell)."""
+
+        if flag_tuple is None:
+            flag_tuple = self._get_flag_tuple()
+        return (
+            csound_converters.configurations.CSOUND_BINARY,
+            "-o",
+            path,
+            *flag_tuple,
+            self.csound_orchestra_path,
+            score_path,
+        )
+
+    def _get_wav_sample_format(self) -> str:
+        """Find sample format of the rendered WAV file by parsing the flags."""
+
+        sample_format = "int16"
+        for flag in self._get_flag_tuple():
+            if flag.startswith("--format="):
+                format_list = flag[len("--format=") :].split(":")
+            else:
+                format_list = [flag]
+            for format_name in format_list:
+                match format_name:
+                    case "uchar" | "-8":
+                        sample_format = "uint8"
+                    case "short" | "-s":
+                        sample_format = "int16"
+                    case "24bit" | "-3":
+                        sample_format = "int24"
+                    case "long" | "-l":
+                        sample_format = "int32"
+                    case "float" | "-f":
+                        sample_format = "float32"
+                    case "double":
+                        sample_format = "float64"
+                    case "wav" | "-W":
+                        pass
+                    case "aiff" | "ircam" | "raw" | "-A" | "-J" | "-h":
+                        raise ValueError(
+                            f"Unsupported flag '{flag}': only WAV files can "
+                            "be stitched together."
+                        )
+        return sample_format
+
+    def _get_render_cache_key(
+        self, path: str, score_path: str, score_data: typing.Optional[bytes]
+    ) -> str:
+        return self.render_cache.get_key(  # type: ignore
+            score_path,
+            self.csound_orchestra_path,
+            self._get_flag_tuple(),
+            path,
+            score_data=score_data,
+        )
+
+    @staticmethod
+    def _unlink_shared_sound_file(path: str):
+        # Sound files taken from a 'RenderCache' may be hard links to the
+        # cached file: csound must never write into them.
+        try:
+            if os.stat(path).st_nlink > 1:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _make_render_result(
+        self,
+        path: str,
+        score_path: str,
+        exit_code: typing.Optional[int],
+        start: float,
+        stdout: typing.Optional[str | bytes],
+        stderr: typing.Optional[str | bytes],
+    ) -> RenderResult:
+        stdout, stderr = (
+            output.decode(errors="replace") if isinstance(output, bytes) else output
+            for output in (stdout, stderr)
+        )
+        return RenderResult(
+            path,
+            score_path,
+            exit_code,
+            time.perf_counter() - start,
+            stderr=stderr or "",
+            stdout=stdout or "",
+        )
+
+    def _run_csound(
+        self,
+        path: str,
+        score_path: str,
+        start: float,
+        flag_tuple: typing.Optional[tuple[str, ...]] = None,
+        score_data: typing.Optional[bytes] = None,
+    ) -> RenderResult:
+        self._unlink_shared_sound_file(path)
+        timeout = self._get_timeout()
+        try:
+            with _measure_csound():
+                if self.worker_pool is None:
+                    completed_process = subprocess.run(
+                        self._get_command_tuple(path, score_path, flag_tuple),
+                        input=score_data,
+                        capture_output=True,
+                        timeout=timeout,
+                    )
+                    exit_code, stdout, stderr = (
+                        completed_process.returncode,
+                        completed_process.stdout,
+                        completed_process.stderr,
+                    )
+                else:
+                    if flag_tuple is None:
+                        flag_tuple = self._get_flag_tuple()
+                    exit_code, stdout, stderr = self.worker_pool.render(
+                        path, score_path, flag_tuple, score_data, timeout
+                    )
+        except subprocess.TimeoutExpired as e:
+            raise CsoundTimeoutError(
+                self._make_render_result(
+                    path, score_path, None, start, e.stdout, e.stderr
+                ),
+                timeout,  # type: ignore
+            )
+        render_result = self._make_render_result(
+            path, score_path, exit_code, start, stdout, stderr
+        )
+        if render_result.exit_code != 0:
+            raise CsoundError(render_result)
+        return render_result
+
+    async def _run_csound_async(
+        self,
+        path: str,
+        score_path: str,
+        start: float,
+        score_data: typing.Optional[bytes] = None,
+    ) -> RenderResult:
+        if self.worker_pool is not None:
+            # Csound instances of the pool block, so they are waited for
+            # in the default executor.
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    contextvars.copy_context().run,
+                    self._run_csound,
+                    path,
+                    score_path,
+                    start,
+                    score_data=score_data,
+                ),
+            )
+        self._unlink_shared_sound_file(path)
+        timeout = self._get_timeout()
+        process = await asyncio.create_subprocess_exec(
+            *self._get_command_tuple(path, score_path),
+            stdin=None if score_data is None else asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            with _measure_csound():
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(score_data), timeout
+                )
+        except asyncio.TimeoutError:
+            process.kill()
+            stdout, stderr = await process.communicate()
+            raise CsoundTimeoutError(
+                self._make_render_result(path, score_path, None, start, stdout, stderr),
+                timeout,  # type: ignore
+            )
+        except asyncio.CancelledError:
+            # Csound would otherwise keep rendering after the render has
+            # been cancelled.
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+            raise
+        render_result = self._make_render_result(
+            path, score_path, process.returncode, start, stdout, stderr
+        )
+        if render_result.exit_code != 0:
+            raise CsoundError(render_result)
+        return render_result
+
+    def _render(
+        self,
+        path: str,
+        score_path: str,
+        start: float,
+        score_data: typing.Optional[bytes] = None,
+    ) -> RenderResult:
+        if self.render_cache is None:
+            return self._run_csound(path, score_path, start, score_data=score_data)
+        key = self._get_render_cache_key(path, score_path, score_data)
+        if self.render_cache.load(key, path):
+            return RenderResult(
+                path, score_path, 0, time.perf_counter() - start, is_cache_hit=True
+            )
+        render_result = self._run_csound(path, score_path, start, score_data=score_data)
+        self.render_cache.store(key, path)
+        return render_result
+
+    async def _render_async(
+        self,
+        path: str,
+        score_path: str,
+        start: float,
+        score_data: typing.Optional[bytes] = None,
+    ) -> RenderResult:
+        if self.render_cache is None:
+            return await self._run_csound_async(path, score_path, start, score_data)
+        key = self._get_render_cache_key(path, score_path, score_data)
+        if self.render_cache.load(key, path):
+            return RenderResult(
+                path, score_path, 0, time.perf_counter() - start, is_cache_hit=True
+            )
+        render_result = await self._run_csound_async(
+            path, score_path, start, score_data
+        )
+        self.render_cache.store(key, path)
+        return render_result
+
+    def _render_job(
+        self,
+        job: tuple[core_events.abc.Event, str] | tuple[core_events.abc.Event, str, str],
+    ) -> RenderResult:
+        event_to_convert, path, *score_path_list = job
+        score_path = self._get_score_path(path, next(iter(score_path_list), None))
+        start = time.perf_counter()
+        try:
+            return self.convert(event_to_convert, path, score_path)
+        # A failing job must never stop the other jobs.
+        except CsoundError as e:
+            return dataclasses.replace(e.render_result, exception=e)
+        except Exception as e:
+            return RenderResult(
+                path, score_path, None, time.perf_counter() - start, exception=e
+            )
+
+    def convert_many(
+        self,
+        job_sequence: typing.Sequence[
+            tuple[core_events.abc.Event, str]
+            | tuple[core_events.abc.Event, str, str]
+        ],
+        max_workers: typing.Optional[int] = None,
+    ) -> tuple[RenderResult, ...]:
+        """Render many sound files at the same time.
+
+        :param job_sequence: Each job is a tuple of the event that shall
+            be rendered, the path of the sound file and optionally the
+            path of the score file.
+        :type job_sequence: typing.Sequence[tuple]
+        :param max_workers: How many jobs run at the same time. If ``None``
+            the number of CPUs is used. Default to ``None``.
+        :type max_workers: typing.Optional[int]
+        :return: One :class:`RenderResult` for each job (in the same order
+            as the jobs).
+
+        Each worker writes the score of its job and then waits for its own
+        csound process, so that at most ``max_workers`` csound processes run
+        simultaneously. Workers are threads, because p-field functions (which
+        are often lambdas) can't be sent to other python processes. A job
+        which fails (with a non-zero csound exit code or with an exception
+        during the score conversion) doesn't stop any other job.
+        """
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            return tuple(executor.map(self._render_job, job_sequence))
+
+    def _get_note_duration(self, chronon: core_events.Chronon) -> float:
+        """Get p3 of the csound score line of a chronon.
+
+        Notes can last longer (or shorter) than their chronons if p3 isn't
+        the duration.
+        """
+
+        pfield_tuple = self.event_to_csound_score.pfield_tuple
+        if len(pfield_tuple) < 3 or pfield_tuple[2] is None:
+            return 0.0
+        try:
+            p3 = pfield_tuple[2](chronon)
+        except AttributeError:
+            return 0.0
+        # p-field values of unsupported types are ignored.
+        if not isinstance(p3, (float, fractions.Fraction, int)):
+            return 0.0
+        return max(float(p3), 0.0)
+
+    def _write_shard_score_list(
+        self,
+        event_to_convert: core_events.abc.Event,
+        directory: str,
+        shard_duration: float,
+        pre_roll: typing.Optional[float],
+        tail: float,
+    ) -> list[tuple[float, float, float, str]]:
+        """Write one score file for each time window of the event.
+
+        Returns (shard start, shard end, origin, score path) for each shard.
+        """
+
+        event_to_csound_score = self.event_to_csound_score
+        if len(event_to_csound_score.pfield_tuple) < 2 or (
+            event_to_csound_score.pfield_tuple[1] is not None
+        ):
+            raise ValueError(
+                "Sharded rendering needs p2 to be the absolute entry delay "
+                "(p2 has to be 'None')."
+            )
+        timed_chronon_list = sorted(
+            event_to_csound_score._iter_timed_chronons(event_to_convert),
+            key=lambda timed_chronon: timed_chronon[0],
+        )
+        if pre_roll is None:
+            pre_roll = max(
+                (self._get_note_duration(chronon) for _, chronon in timed_chronon_list),
+                default=0,
+            )
+        duration = event_to_csound_score._get_beat_count(event_to_convert, {})
+        shard_count = max(1, math.ceil(duration / shard_duration))
+        with event_to_csound_score._collect_p_field_warnings():
+            return self._write_shard_score_file_list(
+                timed_chronon_list,
+                directory,
+                shard_duration,
+                shard_count,
+                duration,
+                pre_roll,
+                tail,
+            )
+
+    def _write_shard_score_file_list(
+        self,
+        timed_chronon_list: list[tuple[float, core_events.Chronon]],
+        directory: str,
+        shard_duration: float,
+        shard_count: int,
+        duration: float,
+        pre_roll: float,
+        tail: float,
+    ) -> list[tuple[float, float, float, str]]:
+        build_csound_score_line = (
+            self.event_to_csound_score._csound_score_line_builder
+        )
+        absolute_entry_delay_list = [
+            absolute_entry_delay for absolute_entry_delay, _ in timed_chronon_list
+        ]
+        shard_list = []
+        for nth_shard in range(shard_count):
+            shard_start = nth_shard * shard_duration
+            shard_end = min(shard_start + shard_duration, duration)
+            is_last_shard = nth_shard == shard_count - 1
+            # Notes which start during the crossfade are needed by both shards.
+            window_end = duration if is_last_shard else min(shard_end + tail, duration)
+            origin = max(0, shard_start - pre_roll)
+            score_path = os.path.join(directory, f"{nth_shard}.sco")
+            with open(
+                score_path,
+                "w",
+                buffering=csound_converters.configurations.SCORE_FILE_BUFFER_SIZE,
+            ) as f:
+                # Render at least until the end of the window.
+                f.write(f"f 0 {window_end - origin}\n")
+                for absolute_entry_delay, chronon in timed_chronon_list[
+                    bisect.bisect_left(absolute_entry_delay_list, origin) : (
+                        None
+                        if is_last_shard
+                        else bisect.bisect_left(absolute_entry_delay_list, window_end)
+                    )
+                ]:
+                    csound_score_line = build_csound_score_line(
+                        chronon,
+                        round(
+                            float(absolute_entry_delay - origin),
+                            core_parameters.configurations.ROUND_DURATION_TO_N_DIGITS,
+                        ),
+                    )
+                    if csound_score_line is not None:
+                        f.write(csound_score_line + "\n")
+            shard_list.append((shard_start, shard_end, origin, score_path))
+        return shard_list
+
+    @staticmethod
+    def _get_shard_sound_path(score_path: str) -> str:
+        return f"{os.path.splitext(score_path)[0]}.wav"
+
+    @staticmethod
+    def _stitch_shards(
+        shard_list: list[tuple[float, float, float, str]], tail: float, path: str
+    ) -> tuple[typing.Any, int]:
+        """Concatenate rendered shards and crossfade them during their tails.
+
+        The shards are mixed into a floating point WAV file at ``path``.
+        """
+
+        sound_files = csound_converters.sound_files
+        sound_path_list = [
+            EventToSoundFile._get_shard_sound_path(score_path)
+            for *_, score_path in shard_list
+        ]
+        wav_format_list = [
+            sound_files.read_wav_format(sound_path) for sound_path in sound_path_list
+        ]
+        sample_rate = wav_format_list[0].sample_rate
+        channel_count = wav_format_list[0].channel_count
+        if any(wav_format.sample_rate != sample_rate for wav_format in wav_format_list):
+            raise ValueError("All shards need to have the same sample rate.")
+        crossfade_frame_count = round(tail * sample_rate)
+        frame_range_list = []
+        for nth_shard, ((shard_start, shard_end, origin, _), wav_format) in enumerate(
+            zip(shard_list, wav_format_list)
+        ):
+            origin_frame = round(origin * sample_rate)
+            start_frame = round(shard_start * sample_rate)
+            if nth_shard == len(shard_list) - 1:
+                end_frame = origin_frame + wav_format.frame_count
+            else:
+                end_frame = round(shard_end * sample_rate) + crossfade_frame_count
+            frame_range_list.append((origin_frame, start_frame, end_frame))
+
+        # The length of the render is known from the headers of the shards,
+        # therefore the output is allocated only once.
+        sample_array = sound_files.create_wav(
+            path,
+            max(end_frame for *_, end_frame in frame_range_list),
+            channel_count,
+            sample_rate,
+        )
+        # Complementary linear ramps sum up to 1 in the crossfades.
+        fade_in = (
+            (np.arange(crossfade_frame_count) + 0.5) / crossfade_frame_count
+        ).astype(np.float32)[:, None]
+        for nth_shard, sound_path in enumerate(sound_path_list):
+            origin_frame, start_frame, end_frame = frame_range_list[nth_shard]
+            shard_sample_array, _ = sound_files.read_wav(sound_path)
+            segment = np.zeros(
+                (end_frame - start_frame, channel_count), dtype=np.float32
+            )
+            shard_segment = shard_sample_array[
+                start_frame - origin_frame : end_frame - origin_frame
+            ]
+            segment[: len(shard_segment)] = shard_segment
+            if nth_shard > 0:
+                segment[:crossfade_frame_count] *= fade_in
+            if nth_shard < len(shard_list) - 1:
+                segment[len(segment) - crossfade_frame_count :] *= 1 - fade_in
+            sample_array[start_frame:end_frame] += segment
+        sample_array.flush()
+        return sample_array, sample_rate
+
+    def _write_note_score_list(
+        self,
+        event_to_convert: core_events.abc.Event,
+        directory: str,
+        stateful_instrument: typing.Sequence[str | int],
+        tail: float,
+    ) -> tuple[list[tuple[str, list[float]]], typing.Optional[str]]:
+        """Write one score file for each unique note of the event.
+
+        Returns (score path, absolute entry delays) for each unique note and
+        the path of the score with all notes of stateful instruments (or
+        ``None`` if there aren't any).
+        """
+
+        event_to_csound_score = self.event_to_csound_score
+        if len(event_to_csound_score.pfield_tuple) < 2 or (
+            event_to_csound_score.pfield_tuple[1] is not None
+        ):
+            raise ValueError(
+                "Memoized rendering needs p2 to be the absolute entry delay "
+                "(p2 has to be 'None')."
+            )
+        build_csound_score_line = event_to_csound_score._csound_score_line_builder
+        find_token = event_to_csound_score._csound_score_token_pattern.findall
+        stateful_p1_set = {
+            event_to_csound_score._process_p_field_value(0, instrument)
+            for instrument in stateful_instrument
+        }
+        # Csound score line with p2 = 0 => absolute entry delays
+        note_dict: dict[str, list[float]] = {}
+        stateful_csound_score_line_list = []
+        with event_to_csound_score._collect_p_field_warnings():
+            for (
+                absolute_entry_delay,
+                chronon,
+            ) in event_to_csound_score._iter_timed_chronons(event_to_convert):
+                # Notes which only differ in p2 are equal.
+                csound_score_line = build_csound_score_line(chronon, 0.0)
+                if csound_score_line is None:
+                    continue
+                if (
+                    stateful_p1_set
+                    and find_token(csound_score_line)[1] in stateful_p1_set
+                ):
+                    stateful_csound_score_line_list.append(
+                        build_csound_score_line(chronon, absolute_entry_delay)
+                    )
+                    continue
+                try:
+                    note_dict[csound_score_line].append(absolute_entry_delay)
+                except KeyError:
+                    note_dict[csound_score_line] = [absolute_entry_delay]
+
+        note_list = []
+        for nth_note, (csound_score_line, absolute_entry_delay_list) in enumerate(
+            note_dict.items()
+        ):
+            # The note lasts as long as its p3 (which doesn't need to be
+            # the duration of the chronon). Held notes (negative p3) end with
+            # the score.
+            note_duration = max(float(find_token(csound_score_line)[3]), 0)
+            score_path = os.path.join(directory, f"{nth_note}.sco")
+            with open(score_path, "w") as f:
+                # Render at least until the end of the tail.
+                f.write(f"f 0 {note_duration + tail}\n{csound_score_line}\n")
+            note_list.append((score_path, absolute_entry_delay_list))
+        stateful_score_path = None
+        # An empty event still needs one render (for the sample rate).
+        if stateful_csound_score_line_list or not note_list:
+            stateful_score_path = os.path.join(directory, "stateful.sco")
+            with open(
+                stateful_score_path,
+                "w",
+                buffering=csound_converters.configurations.SCORE_FILE_BUFFER_SIZE,
+            ) as f:
+                f.writelines(
+                    map("{}\n".format, stateful_csound_score_line_list)  # type: ignore
+                )
+        return note_list, stateful_score_path
+
+    @staticmethod
+    def _mix_notes(
+        note_list: list[tuple[str, list[float]]],
+        stateful_score_path: typing.Optional[str],
+        path: str,
+    ) -> tuple[typing.Any, int]:
+        """Add rendered notes at their absolute entry delays.
+
+        The notes are mixed into a floating point WAV file at ``path``.
+        """
+
+        sound_files = csound_converters.sound_files
+        get_sound_path = EventToSoundFile._get_shard_sound_path
+        sound_list = []
+        if stateful_score_path is not None:
+            sound_list.append((get_sound_path(stateful_score_path), [0.0]))
+        sound_list.extend(
+            (get_sound_path(score_path), absolute_entry_delay_list)
+            for score_path, absolute_entry_delay_list in note_list
+        )
+        wav_format_list = [
+            sound_files.read_wav_format(sound_path) for sound_path, _ in sound_list
+        ]
+        sample_rate = wav_format_list[0].sample_rate
+        if any(wav_format.sample_rate != sample_rate for wav_format in wav_format_list):
+            raise ValueError("All notes need to have the same sample rate.")
+        start_frame_array_list = [
+            np.round(np.asarray(absolute_entry_delay_list) * sample_rate).astype(int)
+            for _, absolute_entry_delay_list in sound_list
+        ]
+
+        # The length of the mix is known from the headers of the rendered
+        # notes, therefore the output is allocated only once.
+        sample_array = sound_files.create_wav(
+            path,
+            max(
+                int(start_frame_array.max()) + wav_format.frame_count
+                for start_frame_array, wav_format in zip(
+                    start_frame_array_list, wav_format_list
+                )
+            ),
+            wav_format_list[0].channel_count,
+            sample_rate,
+        )
+        for (sound_path, _), start_frame_array in zip(
+            sound_list, start_frame_array_list
+        ):
+            note_sample_array, _ = sound_files.read_wav(sound_path)
+            frame_count = len(note_sample_array)
+            for start_frame in start_frame_array.tolist():
+                sample_array[start_frame : start_frame + frame_count] += (
+                    note_sample_array
+                )
+        sample_array.flush()
+        return sample_array, sample_rate
+
+    def convert_memoized(
+        self,
+        event_to_convert: core_events.abc.Event,
+        path: str,
+        stateful_instrument: typing.Sequence[str | int] = tuple([]),
+        max_workers: typing.Optional[int] = None,
+        *,
+        tail: float,
+    ) -> RenderResult:
+        """Render each unique note only once and mix the notes with numpy.
+
+        :param event_to_convert: The event that shall be rendered.
+        :type event_to_convert: core_events.abc.Event
+        :param path: where to write the sound file (WAV)
+        :type path: str
+        :param stateful_instrument: Instruments (as they are returned by
+            the p1 function, e.g. ``(2, "granular")``) which are
+            non-deterministic (for instance because they use random
+            opcodes) or which have a state that lasts longer than one
+            note (for instance global variables). Their notes are
+            rendered together by one csound process as usual. Default to
+            an empty tuple.
+        :type stateful_instrument: typing.Sequence[str | int]
+        :param max_workers: How many csound processes run at the same time.
+            If ``None`` the number of CPUs is used. Default to ``None``.
+        :type max_workers: typing.Optional[int]
+        :param tail: How many seconds after its end (p2 + p3) each note is
+            rendered. Choose at least the longest release segment (or
+            reverb) of the orchestra, otherwise the notes are cut off
+            before they are mixed.
+        :type tail: float
+        :return: A :class:`RenderResult` with the collected csound output
+            of all renders.
+        :raises CsoundError: If csound failed to render any note.
+
+        Notes whose csound score lines only differ in p2 sound the same.
+        In sample based or granular pieces thousands of chronons may
+        create the same note. Each unique note is rendered by its own
+        csound process (many at the same time) and the rendered notes are
+        added at their start times. For deterministic instruments without
+        a state, the result equals a render with only one csound process.
+        Notes are rendered as floating point WAV files which are mixed into
+        a memory mapped temporary file (so that long renders don't need to
+        fit into memory) and the final sound file is written with the
+        sample format which is defined by the flags of the converter. This
+        feature needs
+        `numpy <https://numpy.org>`_.
+        """
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        sample_format = self._get_wav_sample_format()
+        note_flag_tuple = self._get_flag_tuple() + ("-W", "-f")
+        start = time.perf_counter()
+
+        with self._report() as report, tempfile.TemporaryDirectory() as directory:
+            note_list, stateful_score_path = self._write_note_score_list(
+                event_to_convert, directory, stateful_instrument, tail
+            )
+            if report is not None:
+                report.add_phase_duration("score", time.perf_counter() - start)
+            score_path_list = [score_path for score_path, _ in note_list]
+            if stateful_score_path is not None:
+                score_path_list.append(stateful_score_path)
+
+            def render_note(context, score_path):
+                # Executor threads don't know the report of this render.
+                return context.run(
+                    self._run_csound,
+                    self._get_shard_sound_path(score_path),
+                    score_path,
+                    start,
+                    note_flag_tuple,
+                )
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                render_result_tuple = tuple(
+                    executor.map(
+                        render_note,
+                        [contextvars.copy_context() for _ in score_path_list],
+                        score_path_list,
+                    )
+                )
+            sample_array, sample_rate = self._mix_notes(
+                note_list,
+                stateful_score_path,
+                os.path.join(directory, "mixed.wav"),
+            )
+
+            csound_converters.sound_files.write_wav(
+                path, sample_array, sample_rate, sample_format
+            )
+        return self._add_sample_array(
+            RenderResult(
+                path,
+                "",
+                0,
+                time.perf_counter() - start,
+                stderr="\n".join(
+                    render_result.stderr for render_result in render_result_tuple
+                ),
+                stdout="\n".join(
+                    render_result.stdout for render_result in render_result_tuple
+                ),
+                report=report,
+            )
+        )
+
+    def convert_sharded(
+        self,
+        event_to_convert: core_events.abc.Event,
+        path: str,
+        shard_duration: float,
+        pre_roll: typing.Optional[float] = None,
+        tail: typing.Optional[float] = None,
+        max_workers: typing.Optional[int] = None,
+    ) -> RenderResult:
+        """Render a long event in time windows with parallel csound processes.
+
+        :param event_to_convert: The event that shall be rendered.
+        :type event_to_convert: core_events.abc.Event
+        :param path: where to write the sound file (WAV)
+        :type path: str
+        :param shard_duration: Duration of each time window in seconds
+            (= beats of the csound score).
+        :type shard_duration: float
+        :param pre_roll: How many seconds before its window each shard starts
+            to render. All notes which start within the pre-roll are rendered
+            as well, so that notes which cross the start of a window sound
+            right. Notes which start earlier than the pre-roll are missing in
+            the shard. If ``None``, the longest p3 of the csound score lines
+            is used. Default to ``None``.
+        :type pre_roll: typing.Optional[float]
+        :param tail: How many seconds after its window each shard continues to
+            render. Neighbouring shards are crossfaded during the tail. If
+            ``None``, :const:`mutwo.csound_converters.configurations.SHARD_TAIL_DURATION`
+            is used. Default to ``None``.
+        :type tail: typing.Optional[float]
+        :param max_workers: How many csound processes run at the same time.
+            If ``None`` the number of CPUs is used. Default to ``None``.
+        :type max_workers: typing.Optional[int]
+        :return: A :class:`RenderResult` with the collected csound output
+            of all shards.
+        :raises CsoundError: If csound failed to render any shard.
+
+        The absolute entry delays of all chronons are used to cut the event
+        into windows of ``shard_duration``. Each shard is rendered by its own
+        csound process and all shards are stitched together afterwards. For
+        instruments without a state which lasts longer than the pre-roll,
+        the result equals a render with only one csound process. Shards are
+        rendered as floating point WAV files which are mixed into a memory
+        mapped temporary file (so that long renders don't need to fit into
+        memory) and the final sound file is written with the sample format
+        which is defined by the flags of the converter. Choose ``shard_duration``, ``pre_roll`` and ``tail``
+        so that they fit into the sample and control rate of the orchestra
+        (for instance 10 seconds). This feature needs
+        `numpy <https://numpy.org>`_.
+        """
+
+        if tail is None:
+            tail = csound_converters.configurations.SHARD_TAIL_DURATION
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        sample_format = self._get_wav_sample_format()
+        shard_flag_tuple = self._get_flag_tuple() + ("-W", "-f")
+        start = time.perf_counter()
+
+        with self._report() as report, tempfile.TemporaryDirectory() as directory:
+            shard_list = self._write_shard_score_list(
+                event_to_convert, directory, shard_duration, pre_roll, tail
+            )
+            if report is not None:
+                report.add_phase_duration("score", time.perf_counter() - start)
+
+            def render_shard(context, shard):
+                score_path = shard[3]
+                # Executor threads don't know the report of this render.
+                return context.run(
+                    self._run_csound,
+                    self._get_shard_sound_path(score_path),
+                    score_path,
+                    start,
+                    shard_flag_tuple,
+                )
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                render_result_tuple = tuple(
+                    executor.map(
+                        render_shard,
+                        [contextvars.copy_context() for _ in shard_list],
+                        shard_list,
+                    )
+                )
+            sample_array, sample_rate = self._stitch_shards(
+                shard_list, tail, os.path.join(directory, "stitched.wav")
+            )
+
+            csound_converters.sound_files.write_wav(
+                path, sample_array, sample_rate, sample_format
+            )
+        return self._add_sample_array(
+            RenderResult(
+                path,
+                "",
+                0,
+                time.perf_counter() - start,
+                stderr="\n".join(
+                    render_result.stderr for render_result in render_result_tuple
+                ),
+                stdout="\n".join(
+                    render_result.stdout for render_result in render_result_tuple
+                ),
+                report=report,
+            )
+        )
 
     def convert(
         self,
         event_to_convert: core_events.abc.Event,
         path: str,
         score_path: typing.Optional[str] = None,
-    ) -> None:
+    ) -> RenderResult:
         """Render sound file from the mutwo event.
 
         :param event_to_convert: The event that shall be rendered.
         :type event_to_convert: core_events.abc.Event
         :param path: where to write the sound file
         :type path: str
-        :param score_path: where to write the score file
+        :param score_path: where to write the score file (ignored if the
+            score is piped to csound)
         :type score_path: typing.Optional[str]
+        :return: The :class:`RenderResult` with the captured csound output.
+        :raises CsoundError: If csound returned with a non-zero exit code.
+        :raises CsoundTimeoutError: If csound didn't finish within the timeout.
         """
 
-        if not score_path:
-            score_path = path + ".sco"
+        with self._report() as report:
+            render_result = self._add_report(
+                self._convert(event_to_convert, path, score_path), report
+            )
+        return self._add_sample_array(render_result)
 
+    def _convert(
+        self,
+        event_to_convert: core_events.abc.Event,
+        path: str,
+        score_path: typing.Optional[str],
+    ) -> RenderResult:
+        score_path = self._get_score_path(path, score_path)
+        start = time.perf_counter()
+        if self.pipe_score:
+            return self._render(
+                path, score_path, start, self._get_score_data(event_to_convert)
+            )
         self.event_to_csound_score.convert(event_to_convert, score_path)
-        flags = " ".join(self.flags)
-        command = f"{csound_converters.configurations.CSOUND_BINARY} -o {path} {flags}"
-        command += " {} {}".format(self.csound_orchestra_path, score_path)
+        try:
+            return self._render(path, score_path, start)
+        finally:
+            if self.remove_score_file:
+                os.remove(score_path)
+
+    async def convert_async(
+        self,
+        event_to_convert: core_events.abc.Event,
+        path: str,
+        score_path: typing.Optional[str] = None,
+    ) -> RenderResult:
+        """Render sound file from the mutwo event without blocking the event loop.
+
+        :param event_to_convert: The event that shall be rendered.
+        :type event_to_convert: core_events.abc.Event
+        :param path: where to write the sound file
+        :type path: str
+        :param score_path: where to write the score file (ignored if the
+            score is piped to csound)
+        :type score_path: typing.Optional[str]
+        :return: The :class:`RenderResult` with the captured csound output.
+        :raises CsoundError: If csound returned with a non-zero exit code.
+        :raises CsoundTimeoutError: If csound didn't finish within the timeout.
+
+        The score is written in the default executor of the running loop,
+        csound runs as an :mod:`asyncio` subprocess. Therefore many renders
+        can run at the same time on one event loop:
+
+        >>> import asyncio
+        >>> async def render_all(converter, event_list):
+        ...     return await asyncio.gather(
+        ...         *(
+        ...             converter.convert_async(event, f"{i}.wav")
+        ...             for i, event in enumerate(event_list)
+        ...         )
+        ...     )
+        """
 
-        os.system(command)
+        with self._report() as report:
+            render_result = self._add_report(
+                await self._convert_async(event_to_convert, path, score_path), report
+            )
+        return self._add_sample_array(render_result)
+
+    async def _convert_async(
+        self,
+        event_to_convert: core_events.abc.Event,
+        path: str,
+        score_path: typing.Optional[str],
+    ) -> RenderResult:
+        score_path = self._get_score_path(path, score_path)
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        def run_in_executor(function, *argument):
+            # Executor threads don't know the report of this task.
+            return loop.run_in_executor(
+                None,
+                functools.partial(
+                    contextvars.copy_context().run, function, *argument
+                ),
+            )
 
-        if self.remove_score_file:
-            os.remove(score_path)
+        if self.pipe_score:
+            score_data = await run_in_executor(self._get_score_data, event_to_convert)
+            return await self._render_async(path, score_path, start, score_data)
+        await run_in_executor(
+            self.event_to_csound_score.convert, event_to_convert, score_path
+        )
+        try:
+            return await self._render_async(path, score_path, start)
+        finally:
+            if self.remove_score_file:
+                os.remove(score_path)
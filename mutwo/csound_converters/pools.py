@@ -0,0 +1,552 @@
+"""Keep csound instances alive between renders.
+
+Starting csound (loading its plugins and compiling the orchestra) is the
+biggest part of the time of short renders. A :class:`CsoundWorkerPool`
+reuses running csound instances of the csound API (via
+`ctcsound <https://github.com/csound/ctcsound>`_) for many renders: each
+instance compiles the orchestra only once. If ctcsound isn't installed,
+the pool only limits how many csound subprocesses run at the same time.
+"""
+
+import math
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+import typing
+
+try:
+    import ctcsound  # type: ignore
+except ImportError:
+    ctcsound = None
+
+from mutwo import csound_converters
+
+__all__ = ("CsoundWorkerPool",)
+
+
+# Flags which set the sample format of the rendered sound file.
+_FORMAT_TO_SAMPLE_FORMAT = {
+    "uchar": "uint8",
+    "short": "int16",
+    "24bit": "int24",
+    "long": "int32",
+    "float": "float32",
+    "double": "float64",
+}
+_FORMAT_FLAG_TO_SAMPLE_FORMAT = {
+    "-8": "uint8",
+    "-s": "int16",
+    "-3": "int24",
+    "-l": "int32",
+    "-f": "float32",
+}
+_WAV_FLAG_SET = {"-W", "--wave"}
+
+# p1, p2 and p3 of an i-statement (p1 may be a quoted instrument name).
+_I_STATEMENT_PATTERN = re.compile(r'i\s*("[^"]*"|\S+)\s+(\S+)\s+(\S+)')
+
+
+def _summarize_score(
+    score: str,
+) -> typing.Optional[tuple[float, set[typing.Union[int, str]]]]:
+    """Find the end of the last note and the instruments of a score.
+
+    Returns ``None`` if the score uses statements whose timing isn't
+    understood (for instance tempo statements or expressions).
+    """
+
+    score_end, instrument_set = 0.0, set()
+    # macro name => end of its last note (relative to its clock base)
+    macro_end_dict: dict[str, float] = {}
+    macro_name = None
+    clock_base = 0.0
+    previous_start = previous_duration = None
+    try:
+        for line in score.splitlines():
+            line = line.split(";", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("#define"):
+                macro_name = line.split()[1]
+                macro_end_dict[macro_name] = 0.0
+                previous_start = previous_duration = None
+            elif line == "#":
+                macro_name = None
+                previous_start = previous_duration = None
+            elif line[0] == "i":
+                if (match := _I_STATEMENT_PATTERN.match(line)) is None:
+                    return None
+                instrument, start, duration = match.groups()
+                if instrument[0] == '"':
+                    instrument_set.add(instrument[1:-1])
+                else:
+                    instrument_set.add(abs(int(float(instrument))))
+                if start == ".":
+                    start = previous_start
+                elif start == "+":
+                    start = previous_start + previous_duration  # type: ignore
+                if duration == ".":
+                    duration = previous_duration
+                previous_start, previous_duration = float(start), float(duration)
+                # Held notes (negative duration) don't extend the score.
+                note_end = previous_start + max(previous_duration, 0)
+                if macro_name is None:
+                    score_end = max(score_end, clock_base + note_end)
+                else:
+                    macro_end_dict[macro_name] = max(
+                        macro_end_dict[macro_name], note_end
+                    )
+            elif line[0] == "$":
+                score_end = max(
+                    score_end, clock_base + macro_end_dict[line[1:].rstrip(".")]
+                )
+                previous_start = previous_duration = None
+            elif line[0] == "b":
+                clock_base = float(line[1:])
+            elif line[0] == "f" and float(line[1:].split()[0]) == 0:
+                score_end = max(score_end, clock_base + float(line[1:].split()[1]))
+            elif line[0] not in "fe":
+                return None
+    except (ValueError, TypeError, IndexError, KeyError):
+        return None
+    return score_end, instrument_set
+
+
+class _CsoundWorker(object):
+    """One csound instance of a :class:`CsoundWorkerPool`.
+
+    With the csound API the orchestra is compiled and csound is started
+    only once, when the worker renders its first score. Csound can't
+    change its output file once it has been started, therefore csound
+    doesn't write any sound file: each score is read into the running
+    instance and the worker streams the samples of csound's output buffer
+    to the sound file of the render.
+    """
+
+    def __init__(self, csound_worker_pool: "CsoundWorkerPool"):
+        self.csound_worker_pool = csound_worker_pool
+        self.render_count = 0
+        self.is_healthy = True
+        self._csound = ctcsound.Csound() if csound_worker_pool.use_api else None
+        # Options with which the running csound instance has been started.
+        self._option_tuple: typing.Optional[tuple[str, ...]] = None
+
+    @staticmethod
+    def _get_option_list(flag_sequence: typing.Sequence[str]) -> list[str]:
+        # The csound API only accepts one argument per option: merge
+        # short flags with their arguments (e.g. '-O', 'null' => '-Onull').
+        option_list: list[str] = []
+        for flag in flag_sequence:
+            if option_list and not flag.startswith("-"):
+                option_list[-1] += flag
+            else:
+                option_list.append(flag)
+        return option_list
+
+    @staticmethod
+    def _split_flag_sequence(
+        flag_sequence: typing.Sequence[str],
+    ) -> tuple[str, tuple[str, ...]]:
+        """Split flags in the sample format of the sound file and csound options."""
+
+        sample_format = "int16"
+        option_list = []
+        for option in _CsoundWorker._get_option_list(flag_sequence):
+            if option in _WAV_FLAG_SET:
+                continue
+            if option in _FORMAT_FLAG_TO_SAMPLE_FORMAT:
+                sample_format = _FORMAT_FLAG_TO_SAMPLE_FORMAT[option]
+                continue
+            if option.startswith("--format="):
+                for format_name in option[len("--format=") :].split(":"):
+                    if format_name in _FORMAT_TO_SAMPLE_FORMAT:
+                        sample_format = _FORMAT_TO_SAMPLE_FORMAT[format_name]
+                    elif format_name != "wav":
+                        raise ValueError(
+                            "CsoundWorkerPool only renders WAV files with the "
+                            f"csound API, but got flag '{option}'."
+                        )
+                continue
+            option_list.append(option)
+        return sample_format, tuple(option_list)
+
+    def _pop_message_list(self) -> list[str]:
+        message_list = []
+        while self._csound.messageCnt() > 0:
+            message_list.append(self._csound.firstMessage())
+            self._csound.popFirstMessage()
+        return message_list
+
+    def _start(self, option_tuple: tuple[str, ...]) -> bool:
+        """Compile the orchestra and start csound (if not done yet)."""
+
+        if self._option_tuple == option_tuple:
+            return True
+        csound = self._csound
+        if self._option_tuple is not None:
+            # Other options can only be set before csound is started.
+            csound.cleanup()
+            csound.destroyMessageBuffer()
+            csound.reset()
+        self._option_tuple = None
+        csound.createMessageBuffer(False)
+        # Csound only calculates the samples, they are written by the worker.
+        for option in ("-n",) + option_tuple:
+            if csound.setOption(option) != 0:
+                return False
+        if (
+            csound.compileOrc(self.csound_worker_pool.orchestra) != 0
+            or csound.start() != 0
+        ):
+            return False
+        self._option_tuple = option_tuple
+        return True
+
+    def _iter_sample_blocks(
+        self, path: str, score_end: float, timeout: typing.Optional[float]
+    ) -> typing.Iterator[typing.Any]:
+        """Render the score which has been read and yield its samples."""
+
+        csound = self._csound
+        spout = csound.spout()
+        channel_count, zero_dbfs = csound.nchnls(), csound.get0dBFS()
+        # Csound plays the events of scores which are read into a running
+        # instance like realtime events: the end of the score isn't
+        # reliable, the render needs its own end.
+        block_count = math.ceil(
+            (score_end + self.csound_worker_pool.release_duration)
+            * csound.sr()
+            / csound.ksmps()
+        )
+        start = time.monotonic()
+        for _ in range(block_count):
+            # 'performKsmps' returns 0 while the score is running.
+            if csound.performKsmps() != 0:
+                break
+            yield spout.reshape(-1, channel_count) / zero_dbfs
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise subprocess.TimeoutExpired(
+                    ("ctcsound", path),
+                    timeout,
+                    stderr="".join(self._pop_message_list()),
+                )
+
+    def _turn_off(self, instrument_set: set[typing.Union[int, str]]):
+        """Stop all notes of a render, so that they don't sound in the next one."""
+
+        for instrument in instrument_set:
+            if isinstance(instrument, str):
+                self._csound.killInstance(0, instrument, 0, False)
+            else:
+                self._csound.killInstance(instrument, None, 0, False)
+
+    def _render_with_api(
+        self,
+        path: str,
+        score_path: str,
+        flag_sequence: typing.Sequence[str],
+        score_data: typing.Optional[bytes],
+        timeout: typing.Optional[float],
+    ) -> tuple[int, str, str]:
+        if score_data is None:
+            with open(score_path, "r") as f:
+                score = f.read()
+        else:
+            score = score_data.decode()
+        if (score_summary := _summarize_score(score)) is None:
+            # Without the end of the score the render couldn't stop.
+            return self._render_with_subprocess(
+                path, score_path, flag_sequence, score_data, timeout
+            )
+        score_end, instrument_set = score_summary
+        sample_format, option_tuple = self._split_flag_sequence(flag_sequence)
+        if not self._start(option_tuple):
+            self.is_healthy = False
+            return 1, "", "".join(self._pop_message_list())
+        csound = self._csound
+        # The score starts at time 0, the previous score has already ended.
+        csound.rewindScore()
+        if csound.readScore(score) != 0:
+            return 1, "", "".join(self._pop_message_list())
+        try:
+            csound_converters.sound_files.write_wav_blocks(
+                path,
+                self._iter_sample_blocks(path, score_end, timeout),
+                csound.nchnls(),
+                int(csound.sr()),
+                sample_format,
+            )
+        finally:
+            self._turn_off(instrument_set)
+        return 0, "", "".join(self._pop_message_list())
+
+    def _render_with_subprocess(
+        self,
+        path: str,
+        score_path: str,
+        flag_sequence: typing.Sequence[str],
+        score_data: typing.Optional[bytes],
+        timeout: typing.Optional[float],
+    ) -> tuple[int, str, str]:
+        completed_process = subprocess.run(
+            (
+                csound_converters.configurations.CSOUND_BINARY,
+                "-o",
+                path,
+                *flag_sequence,
+                self.csound_worker_pool.csound_orchestra_path,
+                score_path,
+            ),
+            input=score_data,
+            capture_output=True,
+            timeout=timeout,
+        )
+        return (
+            completed_process.returncode,
+            completed_process.stdout.decode(errors="replace"),
+            completed_process.stderr.decode(errors="replace"),
+        )
+
+    def render(self, *argument) -> tuple[int, str, str]:
+        self.render_count += 1
+        if self._csound is None:
+            return self._render_with_subprocess(*argument)
+        return self._render_with_api(*argument)
+
+    def check_health(self) -> bool:
+        if self._csound is None:
+            try:
+                completed_process = subprocess.run(
+                    (csound_converters.configurations.CSOUND_BINARY, "--version"),
+                    capture_output=True,
+                )
+            except OSError:
+                return False
+            return completed_process.returncode == 0
+        # A started instance has already compiled the orchestra.
+        return self._start(() if self._option_tuple is None else self._option_tuple)
+
+    def close(self):
+        if self._csound is not None and self._option_tuple is not None:
+            self._csound.cleanup()
+        # ctcsound destroys the csound instance as soon as it's deleted.
+        self._csound = None
+
+
+class CsoundWorkerPool(object):
+    """Pool of csound instances which are reused for many renders.
+
+    :param csound_orchestra_path: Path to the csound orchestra (.orc) file.
+        The orchestra is read only once, when the pool is created.
+    :type csound_orchestra_path: str
+    :param size: How many csound instances render at the same time. If
+        ``None`` the number of CPUs is used. Default to ``None``.
+    :type size: typing.Optional[int]
+    :param max_render_count: After how many renders a csound instance is
+        replaced by a fresh one. If ``None``,
+        :const:`mutwo.csound_converters.configurations.CSOUND_WORKER_MAX_RENDER_COUNT`
+        is used. Default to ``None``.
+    :type max_render_count: typing.Optional[int]
+    :param use_api: Set to ``True`` to render with the csound API (needs
+        ``ctcsound``) and to ``False`` to render with csound subprocesses.
+        If ``None``, the csound API is used if ctcsound is installed.
+        Default to ``None``.
+    :type use_api: typing.Optional[bool]
+    :param release_duration: How many seconds instances of the csound API
+        render after the end of the last note of a score. If ``None``,
+        :const:`mutwo.csound_converters.configurations.CSOUND_WORKER_RELEASE_DURATION`
+        is used. Default to ``None``.
+    :type release_duration: typing.Optional[float]
+
+    Instances of the csound API are kept alive between renders: each
+    instance compiles the orchestra and starts csound once and then only
+    reads the scores of its renders (the orchestra is only compiled
+    again if the flags of a render differ from the flags of the previous
+    render of the instance). With the csound API the pool only writes WAV
+    files (the sample format is taken from the flags). Each render stops
+    after the end of the last note of the score plus ``release_duration``
+    and the samples are written to the sound file while csound renders.
+    Afterwards all instruments of the score are turned off, so that no
+    note sounds in the next render of the instance. Scores whose timing
+    the pool doesn't understand (for instance with tempo statements) are
+    rendered with a csound subprocess.
+
+    The csound command line can't keep a compiled orchestra, therefore
+    without the csound API the pool is only a concurrency limiter: each
+    render starts a new csound process, but at most ``size`` processes run
+    at the same time.
+
+    Instances which failed (for instance with a timeout) are always
+    replaced. Pass the pool to :class:`EventToSoundFile`:
+
+    **Example:**
+
+    >>> import os
+    >>> import tempfile
+    >>> from mutwo import csound_converters
+    >>> orchestra_path = os.path.join(tempfile.mkdtemp(), 'instr.orc')
+    >>> with open(orchestra_path, 'w') as f:
+    ...     _ = f.write('instr 1\\nendin')
+    >>> with csound_converters.CsoundWorkerPool(orchestra_path, size=2) as pool:
+    ...     converter = csound_converters.EventToSoundFile(
+    ...         orchestra_path,
+    ...         csound_converters.EventToCsoundScore(),
+    ...         worker_pool=pool,
+    ...     )
+    """
+
+    def __init__(
+        self,
+        csound_orchestra_path: str,
+        size: typing.Optional[int] = None,
+        max_render_count: typing.Optional[int] = None,
+        use_api: typing.Optional[bool] = None,
+        release_duration: typing.Optional[float] = None,
+    ):
+        if use_api is None:
+            use_api = ctcsound is not None
+        elif use_api and ctcsound is None:
+            raise ImportError(
+                "Rendering with the csound API needs ctcsound. Please install "
+                "'mutwo.csound[ctcsound]' or 'ctcsound'."
+            )
+        if size is None:
+            size = os.cpu_count() or 1
+        if max_render_count is None:
+            max_render_count = (
+                csound_converters.configurations.CSOUND_WORKER_MAX_RENDER_COUNT
+            )
+        if release_duration is None:
+            release_duration = (
+                csound_converters.configurations.CSOUND_WORKER_RELEASE_DURATION
+            )
+        with open(csound_orchestra_path, "r") as f:
+            self.orchestra = f.read()
+        self.csound_orchestra_path = csound_orchestra_path
+        self.use_api = use_api
+        self.max_render_count = max_render_count
+        self.release_duration = release_duration
+        self.render_count = 0
+        self.recycle_count = 0
+        self._size = size
+        self._lock = threading.Lock()
+        self._is_closed = False
+        # The most recently used workers are reused first.
+        self._idle_worker_queue: queue.LifoQueue[_CsoundWorker] = queue.LifoQueue()
+        for _ in range(size):
+            self._idle_worker_queue.put(_CsoundWorker(self))
+
+    def __enter__(self) -> "CsoundWorkerPool":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    # ###################################################################### #
+    #                          private methods                               #
+    # ###################################################################### #
+
+    def _release(self, worker: _CsoundWorker):
+        if self._is_closed:
+            worker.close()
+            return
+        if not worker.is_healthy or worker.render_count >= self.max_render_count:
+            worker.close()
+            worker = _CsoundWorker(self)
+            with self._lock:
+                self.recycle_count += 1
+        self._idle_worker_queue.put(worker)
+
+    # ###################################################################### #
+    #                          properties                                    #
+    # ###################################################################### #
+
+    @property
+    def size(self) -> int:
+        """How many csound instances render at the same time."""
+        return self._size
+
+    @property
+    def is_closed(self) -> bool:
+        return self._is_closed
+
+    # ###################################################################### #
+    #                             public api                                 #
+    # ###################################################################### #
+
+    def render(
+        self,
+        path: str,
+        score_path: str,
+        flag_sequence: typing.Sequence[str] = tuple([]),
+        score_data: typing.Optional[bytes] = None,
+        timeout: typing.Optional[float] = None,
+    ) -> tuple[int, str, str]:
+        """Render a score with the next free csound instance.
+
+        :param path: Where to write the sound file.
+        :type path: str
+        :param score_path: Path of the csound score file.
+        :type score_path: str
+        :param flag_sequence: Flags which are passed to csound.
+        :type flag_sequence: typing.Sequence[str]
+        :param score_data: The content of the csound score. If set, it is
+            used instead of reading ``score_path``. Default to ``None``.
+        :type score_data: typing.Optional[bytes]
+        :param timeout: How many seconds the render may take. Default to
+            ``None`` (no timeout).
+        :type timeout: typing.Optional[float]
+        :return: The exit code, stdout and stderr of csound.
+        :raises subprocess.TimeoutExpired: If csound didn't finish in time.
+
+        Blocks until a csound instance is free.
+        """
+
+        if self._is_closed:
+            raise RuntimeError("Can't render with a closed CsoundWorkerPool.")
+        worker = self._idle_worker_queue.get()
+        try:
+            return worker.render(path, score_path, flag_sequence, score_data, timeout)
+        except BaseException:
+            worker.is_healthy = False
+            raise
+        finally:
+            with self._lock:
+                self.render_count += 1
+            self._release(worker)
+
+    def check_health(self) -> bool:
+        """Check all idle csound instances and replace broken ones.
+
+        :return: ``True`` if all checked instances are healthy.
+
+        With the csound API each instance which hasn't been started yet
+        compiles the orchestra, without the csound API it's checked if the
+        csound binary can be started.
+        """
+
+        worker_list = []
+        while True:
+            try:
+                worker_list.append(self._idle_worker_queue.get_nowait())
+            except queue.Empty:
+                break
+        is_healthy = True
+        for worker in worker_list:
+            worker.is_healthy = worker.check_health()
+            is_healthy = is_healthy and worker.is_healthy
+            self._release(worker)
+        return is_healthy
+
+    def close(self):
+        """Destroy all csound instances (renders which still run finish)."""
+
+        self._is_closed = True
+        while True:
+            try:
+                self._idle_worker_queue.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,399 @@
+"""Read and write WAV files as numpy arrays.
+
+The functions of this module are used to post-process sound files which
+have been rendered by csound (for instance to stitch shards of a render
+together). They only need `numpy <https://numpy.org>`_ and support
+integer PCM and floating point WAV files.
+"""
+
+import struct
+import typing
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = (
+    "WavFormat",
+    "read_wav_format",
+    "read_wav",
+    "memory_map_wav",
+    "write_wav",
+    "write_wav_blocks",
+    "create_wav",
+)
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# sample format -> (format tag, bytes per sample)
+_SAMPLE_FORMAT_TO_WAVE_FORMAT = {
+    "uint8": (_WAVE_FORMAT_PCM, 1),
+    "int16": (_WAVE_FORMAT_PCM, 2),
+    "int24": (_WAVE_FORMAT_PCM, 3),
+    "int32": (_WAVE_FORMAT_PCM, 4),
+    "float32": (_WAVE_FORMAT_IEEE_FLOAT, 4),
+    "float64": (_WAVE_FORMAT_IEEE_FLOAT, 8),
+}
+_WAVE_FORMAT_TO_SAMPLE_FORMAT = {
+    wave_format: sample_format
+    for sample_format, wave_format in _SAMPLE_FORMAT_TO_WAVE_FORMAT.items()
+}
+
+# The biggest size of a RIFF chunk: sizes of bigger files are written
+# to the 'ds64' chunk of a RF64 file (see EBU Tech 3306).
+_MAXIMUM_CHUNK_SIZE = 0xFFFFFFFE
+# RIFF size, data size, sample count and length of the (empty) table.
+_DS64_FORMAT = "<QQQI"
+
+# How many frames are converted at once while writing a WAV file.
+_BLOCK_FRAME_COUNT = 2**16
+
+
+class WavFormat(typing.NamedTuple):
+    """Where and how the samples of a WAV file are stored."""
+
+    sample_rate: int
+    channel_count: int
+    sample_format: str
+    data_offset: int
+    frame_count: int
+
+
+def _assert_numpy():
+    if np is None:
+        raise ImportError(
+            "Reading and writing sound files needs numpy. Please install "
+            "'mutwo.csound[numpy]' or 'numpy'."
+        )
+
+
+def read_wav_format(path: str) -> WavFormat:
+    """Parse the header of a WAV file.
+
+    :param path: Path of the WAV file.
+    :type path: str
+    :return: The :class:`WavFormat` of the file.
+    """
+
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff not in (b"RIFF", b"RF64") or wave != b"WAVE":
+            raise ValueError(f"'{path}' isn't a WAV file.")
+        wave_format = None
+        data_size_64 = None
+        while chunk_header := f.read(8):
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"ds64":
+                chunk = f.read(chunk_size)
+                data_size_64 = struct.unpack("<Q", chunk[8:16])[0]
+            elif chunk_id == b"fmt ":
+                chunk = f.read(chunk_size)
+                format_tag, channel_count, sample_rate = struct.unpack(
+                    "<HHI", chunk[:8]
+                )
+                bits_per_sample = struct.unpack("<H", chunk[14:16])[0]
+                if format_tag == _WAVE_FORMAT_EXTENSIBLE:
+                    # The first two bytes of the sub format GUID are the
+                    # actual format tag.
+                    format_tag = struct.unpack("<H", chunk[24:26])[0]
+                wave_format = (format_tag, bits_per_sample // 8)
+            elif chunk_id == b"data":
+                if wave_format is None:
+                    raise ValueError(f"'{path}' has no 'fmt ' chunk.")
+                if data_size_64 is not None and chunk_size == 0xFFFFFFFF:
+                    chunk_size = data_size_64
+                try:
+                    sample_format = _WAVE_FORMAT_TO_SAMPLE_FORMAT[wave_format]
+                except KeyError:
+                    raise ValueError(
+                        f"Unsupported sample format '{wave_format}' of '{path}'."
+                    )
+                return WavFormat(
+                    sample_rate,
+                    channel_count,
+                    sample_format,
+                    f.tell(),
+                    chunk_size // (channel_count * wave_format[1]),
+                )
+            else:
+                # Skip unknown chunk (chunks are padded to an even size).
+                f.seek(chunk_size + (chunk_size % 2), 1)
+    raise ValueError(f"'{path}' has no 'data' chunk.")
+
+
+def _get_dtype(sample_format: str) -> typing.Any:
+    return {
+        "uint8": np.uint8,
+        "int16": np.dtype("<i2"),
+        "int32": np.dtype("<i4"),
+        "float32": np.dtype("<f4"),
+        "float64": np.dtype("<f8"),
+    }[sample_format]
+
+
+def read_wav(path: str) -> tuple[typing.Any, int]:
+    """Read WAV file as array of floating point samples.
+
+    :param path: Path of the WAV file.
+    :type path: str
+    :return: A two-dimensional :class:`numpy.ndarray` (frames x channels)
+        with samples between -1 and 1 and the sample rate.
+    """
+
+    _assert_numpy()
+    wav_format = read_wav_format(path)
+    sample_count = wav_format.frame_count * wav_format.channel_count
+    with open(path, "rb") as f:
+        f.seek(wav_format.data_offset)
+        if wav_format.sample_format == "int24":
+            raw = np.frombuffer(f.read(sample_count * 3), dtype=np.uint8)
+            raw = raw.reshape(-1, 3).astype(np.int32)
+            data = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+            data = np.where(data >= 2**23, data - 2**24, data) / 2**23
+        else:
+            data = np.fromfile(
+                f, dtype=_get_dtype(wav_format.sample_format), count=sample_count
+            )
+            match wav_format.sample_format:
+                case "uint8":
+                    data = (data.astype(np.float64) - 128) / 128
+                case "int16":
+                    data = data / 2**15
+                case "int32":
+                    data = data / 2**31
+                case _:
+                    data = data.astype(np.float64)
+    return data.reshape(-1, wav_format.channel_count), wav_format.sample_rate
+
+
+def memory_map_wav(path: str, mode: str = "r") -> tuple[typing.Any, int]:
+    """Map samples of WAV file into memory without reading them.
+
+    :param path: Path of the WAV file.
+    :type path: str
+    :param mode: The mode of :class:`numpy.memmap`. Use ``"r+"`` to
+        change samples in place or ``"c"`` for copy-on-write. Default
+        to ``"r"``.
+    :type mode: str
+    :return: A two-dimensional :class:`numpy.memmap` (frames x channels)
+        with the raw samples of the file and the sample rate.
+
+    In contrast to :func:`read_wav` samples are neither converted nor
+    copied: the operating system only loads the pages which are accessed.
+    The array has the sample format of the file (for instance
+    ``float32`` for files which have been rendered with
+    :const:`mutwo.csound_converters.constants.FORMAT_FLOAT`). WAV files
+    with 24 bit samples can't be mapped.
+    """
+
+    _assert_numpy()
+    wav_format = read_wav_format(path)
+    if wav_format.sample_format == "int24":
+        raise ValueError(f"Can't map 24 bit samples of '{path}' into memory.")
+    sample_array = np.memmap(
+        path,
+        dtype=_get_dtype(wav_format.sample_format),
+        mode=mode,
+        offset=wav_format.data_offset,
+        shape=(wav_format.frame_count, wav_format.channel_count),
+    )
+    return sample_array, wav_format.sample_rate
+
+
+def _write_wav_header(
+    f: typing.BinaryIO,
+    frame_count: int,
+    channel_count: int,
+    sample_rate: int,
+    sample_format: str,
+    reserve_ds64: bool = False,
+) -> bytes:
+    """Write the header of a WAV file and return the padding of its data.
+
+    Files whose sizes don't fit into 32 bit are written as RF64 files
+    with a 'ds64' chunk. If ``reserve_ds64`` is ``True`` a 'JUNK' chunk
+    of the same size is written in place of the 'ds64' chunk of smaller
+    files, so that the header can be written again with any frame count.
+    """
+
+    format_tag, byte_count = _SAMPLE_FORMAT_TO_WAVE_FORMAT[sample_format]
+    block_align = channel_count * byte_count
+    data_size = frame_count * block_align
+    padding = b"\0" * (data_size % 2)
+    fmt_chunk = struct.pack(
+        "<HHIIHH",
+        format_tag,
+        channel_count,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        byte_count * 8,
+    )
+    ds64_chunk_size = 8 + struct.calcsize(_DS64_FORMAT)
+    riff_size = 4 + 8 + len(fmt_chunk) + 8 + data_size + len(padding)
+    is_rf64 = riff_size + ds64_chunk_size > _MAXIMUM_CHUNK_SIZE
+    if is_rf64 or reserve_ds64:
+        riff_size += ds64_chunk_size
+    if is_rf64:
+        f.write(struct.pack("<4sI4s", b"RF64", 0xFFFFFFFF, b"WAVE"))
+        f.write(
+            struct.pack("<4sI", b"ds64", ds64_chunk_size - 8)
+            + struct.pack(_DS64_FORMAT, riff_size, data_size, frame_count, 0)
+        )
+    else:
+        f.write(struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE"))
+        if reserve_ds64:
+            f.write(
+                struct.pack("<4sI", b"JUNK", ds64_chunk_size - 8)
+                + b"\0" * (ds64_chunk_size - 8)
+            )
+    f.write(struct.pack("<4sI", b"fmt ", len(fmt_chunk)) + fmt_chunk)
+    f.write(struct.pack("<4sI", b"data", 0xFFFFFFFF if is_rf64 else data_size))
+    return padding
+
+
+def _encode_samples(sample_array: typing.Any, sample_format: str) -> bytes:
+    format_tag, byte_count = _SAMPLE_FORMAT_TO_WAVE_FORMAT[sample_format]
+    if format_tag == _WAVE_FORMAT_IEEE_FLOAT:
+        return sample_array.astype(_get_dtype(sample_format)).tobytes()
+    maximum = 2 ** (byte_count * 8 - 1)
+    integer_array = np.clip(
+        np.round(sample_array * maximum), -maximum, maximum - 1
+    ).astype(np.int64)
+    match sample_format:
+        case "uint8":
+            return (integer_array + 128).astype(np.uint8).tobytes()
+        case "int24":
+            return (
+                (integer_array.reshape(-1, 1) >> np.array([0, 8, 16])) & 0xFF
+            ).astype(np.uint8).tobytes()
+        case _:
+            return integer_array.astype(_get_dtype(sample_format)).tobytes()
+
+
+def write_wav(
+    path: str, sample_array: typing.Any, sample_rate: int, sample_format: str = "int16"
+):
+    """Write array of floating point samples to a WAV file.
+
+    :param path: Where to write the WAV file.
+    :type path: str
+    :param sample_array: A :class:`numpy.ndarray` with samples between -1
+        and 1. Either one-dimensional (mono) or two-dimensional
+        (frames x channels).
+    :param sample_rate: The sample rate of the WAV file.
+    :type sample_rate: int
+    :param sample_format: One of "uint8", "int16", "int24", "int32",
+        "float32" or "float64". Integer formats are clipped. Default
+        to "int16".
+    :type sample_format: str
+
+    The samples are converted block by block, so that big (for instance
+    memory mapped) arrays are never copied at once.
+    """
+
+    _assert_numpy()
+    sample_array = np.asarray(sample_array)
+    if sample_array.ndim == 1:
+        sample_array = sample_array.reshape(-1, 1)
+    frame_count, channel_count = sample_array.shape
+    with open(path, "wb") as f:
+        padding = _write_wav_header(
+            f, frame_count, channel_count, sample_rate, sample_format
+        )
+        for start in range(0, frame_count, _BLOCK_FRAME_COUNT):
+            f.write(
+                _encode_samples(
+                    sample_array[start : start + _BLOCK_FRAME_COUNT], sample_format
+                )
+            )
+        f.write(padding)
+
+
+def write_wav_blocks(
+    path: str,
+    block_iterable: typing.Iterable[typing.Any],
+    channel_count: int,
+    sample_rate: int,
+    sample_format: str = "int16",
+) -> int:
+    """Write blocks of floating point samples to a WAV file.
+
+    :param path: Where to write the WAV file.
+    :type path: str
+    :param block_iterable: Two-dimensional :class:`numpy.ndarray`
+        (frames x channels) with samples between -1 and 1.
+    :param channel_count: How many channels the WAV file has.
+    :type channel_count: int
+    :param sample_rate: The sample rate of the WAV file.
+    :type sample_rate: int
+    :param sample_format: The sample format of the WAV file (see
+        :func:`write_wav`). Default to "int16".
+    :type sample_format: str
+    :return: How many frames have been written.
+
+    Each block is written as soon as it's available, so that the samples
+    of long renders are never held in memory. The header is written
+    again after the last block.
+    """
+
+    _assert_numpy()
+    frame_count = 0
+    with open(path, "wb") as f:
+        _write_wav_header(
+            f, frame_count, channel_count, sample_rate, sample_format, True
+        )
+        for block in block_iterable:
+            f.write(_encode_samples(block, sample_format))
+            frame_count += len(block)
+        f.seek(0)
+        padding = _write_wav_header(
+            f, frame_count, channel_count, sample_rate, sample_format, True
+        )
+        f.seek(0, 2)
+        f.write(padding)
+    return frame_count
+
+
+def create_wav(
+    path: str,
+    frame_count: int,
+    channel_count: int,
+    sample_rate: int,
+    sample_format: str = "float32",
+) -> typing.Any:
+    """Create a silent WAV file and map its samples into memory.
+
+    :param path: Where to write the WAV file.
+    :type path: str
+    :param frame_count: How many frames the WAV file has.
+    :type frame_count: int
+    :param channel_count: How many channels the WAV file has.
+    :type channel_count: int
+    :param sample_rate: The sample rate of the WAV file.
+    :type sample_rate: int
+    :param sample_format: The sample format of the WAV file (see
+        :func:`memory_map_wav`). Default to "float32".
+    :type sample_format: str
+    :return: A two-dimensional writable :class:`numpy.memmap`
+        (frames x channels) with the raw samples of the file.
+
+    The samples are neither written nor held in memory: the file is
+    extended to its final size (most file systems don't even allocate
+    the silent parts) and the operating system writes the pages which
+    are changed.
+    """
+
+    _assert_numpy()
+    if sample_format == "int24":
+        raise ValueError("Can't map 24 bit samples into memory.")
+    with open(path, "wb") as f:
+        padding = _write_wav_header(
+            f, frame_count, channel_count, sample_rate, sample_format
+        )
+        byte_count = _SAMPLE_FORMAT_TO_WAVE_FORMAT[sample_format][1]
+        f.truncate(f.tell() + frame_count * channel_count * byte_count + len(padding))
+    return memory_map_wav(path, "r+")[0]
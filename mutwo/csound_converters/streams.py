@@ -0,0 +1,267 @@
+"""Play mutwo events in realtime with a running csound instance.
+
+Instead of rendering a sound file, :class:`EventToCsoundStream` sends
+the csound score lines of an event while the event is played. Lines are
+sent a little bit earlier than they start (the ``lookahead``) and their
+p2 is set to the time which remains until their start, so that csound
+schedules each event at the right time even if a line is sent too late.
+"""
+
+import abc
+import dataclasses
+import math
+import socket
+import threading
+import time
+import typing
+
+from mutwo import core_converters
+from mutwo import core_events
+from mutwo import csound_converters
+
+__all__ = (
+    "CsoundStreamTransport",
+    "CsoundUdpTransport",
+    "CsoundApiTransport",
+    "StreamReport",
+    "EventToCsoundStream",
+)
+
+
+class CsoundStreamTransport(abc.ABC):
+    """Send csound score lines to a running csound instance."""
+
+    @abc.abstractmethod
+    def send(self, csound_score_line: str):
+        ...
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> "CsoundStreamTransport":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class CsoundUdpTransport(CsoundStreamTransport):
+    """Send csound score lines to the UDP server of csound.
+
+    :param port: The port of the UDP server (csound needs to be started
+        with ``--port=PORT``).
+    :type port: int
+    :param host: The host of csound. Default to ``"127.0.0.1"``.
+    :type host: str
+
+    The UDP server of csound reads all messages which start with ``$``
+    as score lines.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, csound_score_line: str):
+        self._socket.sendto(f"${csound_score_line}".encode(), self.address)
+
+    def close(self):
+        self._socket.close()
+
+
+class CsoundApiTransport(CsoundStreamTransport):
+    """Send csound score lines to a csound instance of the csound API.
+
+    :param csound: A running ``ctcsound.Csound`` instance (for instance
+        one which is performed by a ``ctcsound.CsoundPerformanceThread``).
+
+    Lines are passed to ``inputMessage`` of the csound instance.
+    """
+
+    def __init__(self, csound: typing.Any):
+        self.csound = csound
+
+    def send(self, csound_score_line: str):
+        self.csound.inputMessage(csound_score_line)
+
+
+@dataclasses.dataclass
+class StreamReport(object):
+    """Timing of one stream of :class:`EventToCsoundStream`.
+
+    :param line_count: How many lines have been sent.
+    :param dropped_line_count: How many lines haven't been sent, because
+        they would have started too late (see ``max_lateness`` of
+        :class:`EventToCsoundStream`).
+    :param late_line_count: How many lines have been sent after their
+        start time.
+    :param mean_lateness: Mean delay in seconds between the planned and
+        the actual send time of lines.
+    :param max_lateness: Maximum delay in seconds between the planned and
+        the actual send time of lines.
+    :param jitter: Standard deviation in seconds of the delays between the
+        planned and the actual send time of lines.
+
+    The report is updated while the event is streamed.
+    """
+
+    line_count: int = 0
+    dropped_line_count: int = 0
+    late_line_count: int = 0
+    mean_lateness: float = 0.0
+    max_lateness: float = 0.0
+    # Sum of squared differences from the mean (Welford's algorithm).
+    _squared_lateness_deviation: float = dataclasses.field(default=0.0, repr=False)
+
+    @property
+    def jitter(self) -> float:
+        if self.line_count < 2:
+            return 0.0
+        return math.sqrt(self._squared_lateness_deviation / self.line_count)
+
+    def add_lateness(self, lateness: float):
+        """Add the delay of one sent line."""
+
+        self.line_count += 1
+        delta = lateness - self.mean_lateness
+        self.mean_lateness += delta / self.line_count
+        self._squared_lateness_deviation += delta * (lateness - self.mean_lateness)
+        self.max_lateness = max(self.max_lateness, lateness)
+
+
+class EventToCsoundStream(core_converters.abc.Converter):
+    """Send the csound score lines of an event in realtime to csound.
+
+    :param event_to_csound_score: The :class:`EventToCsoundScore` which
+        creates the csound score lines.
+    :type event_to_csound_score: EventToCsoundScore
+    :param transport: Where lines are sent to (for instance a
+        :class:`CsoundUdpTransport` or a :class:`CsoundApiTransport`).
+    :type transport: CsoundStreamTransport
+    :param lookahead: How many seconds before their start lines are sent.
+        A bigger lookahead tolerates more jitter, but the stream reacts
+        later to :meth:`stop`. If ``None``,
+        :const:`mutwo.csound_converters.configurations.STREAM_LOOKAHEAD`
+        is used. Default to ``None``.
+    :type lookahead: typing.Optional[float]
+    :param max_lateness: If set, lines which would start more than this
+        number of seconds too late are dropped instead of being sent.
+        Default to ``None`` (all lines are sent).
+    :type max_lateness: typing.Optional[float]
+
+    Durations are interpreted as seconds (csound's default tempo of 60
+    beats per minute). If p2 is the absolute entry delay (the default), p2
+    of each sent line is set to the seconds which remain until the start
+    of the line, so that a late sent line doesn't shift the event more
+    than necessary. Lines are sent in the order of their start time.
+
+    **Example:**
+
+    >>> from mutwo import core_events
+    >>> from mutwo import csound_converters
+    >>> class PrintTransport(csound_converters.CsoundStreamTransport):
+    ...     def send(self, csound_score_line):
+    ...         print(csound_score_line.split()[:2])
+    >>> converter = csound_converters.EventToCsoundStream(
+    ...     csound_converters.EventToCsoundScore(), PrintTransport(), lookahead=0.01
+    ... )
+    >>> report = converter.convert(
+    ...     core_events.Consecution([core_events.Chronon(0.01) for _ in range(2)])
+    ... )
+    ['i', '1']
+    ['i', '1']
+    >>> report.line_count
+    2
+    """
+
+    def __init__(
+        self,
+        event_to_csound_score: csound_converters.EventToCsoundScore,
+        transport: CsoundStreamTransport,
+        lookahead: typing.Optional[float] = None,
+        max_lateness: typing.Optional[float] = None,
+    ):
+        if lookahead is None:
+            lookahead = csound_converters.configurations.STREAM_LOOKAHEAD
+        self.event_to_csound_score = event_to_csound_score
+        self.transport = transport
+        self.lookahead = lookahead
+        self.max_lateness = max_lateness
+        self.report: typing.Optional[StreamReport] = None
+        self._stop_event = threading.Event()
+
+    # ###################################################################### #
+    #                          private methods                               #
+    # ###################################################################### #
+
+    def _set_p2(self, csound_score_line: str, p2: float) -> str:
+        token_list = self.event_to_csound_score._csound_score_token_pattern.findall(
+            csound_score_line
+        )
+        token_list[2] = str(round(p2, 6))
+        return " ".join(token_list)
+
+    # ###################################################################### #
+    #                             public api                                 #
+    # ###################################################################### #
+
+    def stop(self):
+        """Stop the stream which is currently sent (from another thread)."""
+
+        self._stop_event.set()
+
+    def convert(
+        self,
+        event_to_convert: core_events.abc.Event,
+        start_time: typing.Optional[float] = None,
+    ) -> StreamReport:
+        """Send the csound score lines of the event in realtime.
+
+        :param event_to_convert: The event which shall be played.
+        :type event_to_convert: core_events.abc.Event
+        :param start_time: When the event starts as value of
+            :func:`time.monotonic`. If ``None``, the event starts after
+            ``lookahead`` seconds. Default to ``None``.
+        :type start_time: typing.Optional[float]
+        :return: A :class:`StreamReport` (which is also available as
+            :attr:`report` while the event is sent).
+
+        Blocks until all lines have been sent or until :meth:`stop`
+        has been called.
+        """
+
+        event_to_csound_score = self.event_to_csound_score
+        lookahead = self.lookahead
+        max_lateness = self.max_lateness
+        send = self.transport.send
+        is_p2_absolute_entry_delay = (
+            len(event_to_csound_score.pfield_tuple) > 1
+            and event_to_csound_score.pfield_tuple[1] is None
+        )
+        if start_time is None:
+            start_time = time.monotonic() + lookahead
+        self._stop_event.clear()
+        report = self.report = StreamReport()
+        with event_to_csound_score._collect_p_field_warnings():
+            # Lines are sorted by time and generated while they are sent.
+            for (
+                absolute_entry_delay,
+                csound_score_line,
+            ) in event_to_csound_score._iter_timed_lines(event_to_convert, 0.0, {}):
+                line_start_time = start_time + absolute_entry_delay
+                send_time = line_start_time - lookahead
+                if self._stop_event.wait(max(send_time - time.monotonic(), 0)):
+                    break
+                now = time.monotonic()
+                if max_lateness is not None and now - line_start_time > max_lateness:
+                    report.dropped_line_count += 1
+                    continue
+                if is_p2_absolute_entry_delay:
+                    csound_score_line = self._set_p2(
+                        csound_score_line, max(line_start_time - now, 0)
+                    )
+                send(csound_score_line)
+                report.add_lateness(now - send_time)
+                if now > line_start_time:
+                    report.late_line_count += 1
+        return report
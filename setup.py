@@ -8,7 +8,11 @@ VERSION = version["VERSION"]
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
 
-extras_require = {"testing": ["pytest>=7.1.1"]}
+extras_require = {
+    "numpy": ["numpy>=1.22.0"],
+    "ctcsound": ["ctcsound>=6.18.1"],
+    "testing": ["pytest>=7.1.1", "numpy>=1.22.0"],
+}
 
 setuptools.setup(
     name="mutwo.csound",
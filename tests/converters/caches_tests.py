@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+import unittest
+
+from mutwo import csound_converters
+
+
+class RenderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.render_cache = csound_converters.RenderCache(
+            os.path.join(self.directory.name, "cache"),
+            max_size=25,
+            csound_version="Csound version 6.18",
+        )
+        self.orchestra_path = self._write("test.orc", "instr 1\nendin")
+        self.score_path = self._write("test.sco", "i 1 0 1")
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def _read(self, path):
+        with open(path, "r") as f:
+            return f.read()
+
+    def _get_key(self, score_path=None, flag_sequence=("-O", "null"), path="a.wav"):
+        return self.render_cache.get_key(
+            score_path or self.score_path, self.orchestra_path, flag_sequence, path
+        )
+
+    def test_get_key(self):
+        key = self._get_key()
+        self.assertEqual(key, self._get_key())
+        self.assertNotEqual(key, self._get_key(flag_sequence=("-O", "stdout")))
+        self.assertNotEqual(key, self._get_key(path="a.aiff"))
+        self.assertEqual(key, self._get_key(path="other/b.wav"))
+        self.assertNotEqual(
+            key, self._get_key(score_path=self._write("b.sco", "i 1 0 2"))
+        )
+
+    def test_get_key_with_score_data(self):
+        key = self._get_key()
+        self.assertEqual(
+            key,
+            self.render_cache.get_key(
+                None,
+                self.orchestra_path,
+                ("-O", "null"),
+                "a.wav",
+                score_data=b"i 1 0 1",
+            ),
+        )
+
+    def test_load_and_store(self):
+        key = self._get_key()
+        path = os.path.join(self.directory.name, "out.wav")
+        self.assertFalse(self.render_cache.load(key, path))
+        self._write("rendered.wav", "audio")
+        self.render_cache.store(key, os.path.join(self.directory.name, "rendered.wav"))
+        self.assertTrue(self.render_cache.load(key, path))
+        self.assertEqual(self._read(path), "audio")
+        self.assertEqual(self.render_cache.hit_count, 1)
+        self.assertEqual(self.render_cache.miss_count, 1)
+
+    def test_evict_least_recently_used(self):
+        rendered_path = os.path.join(self.directory.name, "rendered.wav")
+        path = os.path.join(self.directory.name, "out.wav")
+        key_list = []
+        for nth_render in range(3):
+            self._write("rendered.wav", "0123456789")
+            key = self._get_key(
+                score_path=self._write("test.sco", f"i 1 0 {nth_render}")
+            )
+            key_list.append(key)
+            self.render_cache.store(key, rendered_path)
+            if nth_render == 1:
+                # Mark first render as recently used
+                time.sleep(0.01)
+                self.assertTrue(self.render_cache.load(key_list[0], path))
+            time.sleep(0.01)
+        self.assertLessEqual(self.render_cache.size, 25)
+        self.assertTrue(self.render_cache.load(key_list[0], path))
+        self.assertFalse(self.render_cache.load(key_list[1], path))
+        self.assertTrue(self.render_cache.load(key_list[2], path))
+
+    def test_clear(self):
+        self._write("rendered.wav", "audio")
+        self.render_cache.store(
+            self._get_key(), os.path.join(self.directory.name, "rendered.wav")
+        )
+        self.render_cache.clear()
+        self.assertEqual(self.render_cache.size, 0)
+        self.assertEqual(self.render_cache.hit_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
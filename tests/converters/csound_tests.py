@@ -1,6 +1,17 @@
+import asyncio
+import fractions
+import json
+import multiprocessing
+import operator
 import os
+import pathlib
+import pickle
+import subprocess
+import tempfile
 import unittest
 
+import numpy as np
+
 from mutwo import core_events
 from mutwo import core_parameters
 from mutwo import csound_converters
@@ -191,6 +202,1185 @@ class EventToCsoundScoreTest(unittest.TestCase):
         with open(self.test_path, "r") as f:
             self.assertEqual(f.read(), expected_lines)
 
+    def test_iter_lines(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(100, 2, "a.wav"),
+                        core_events.Chronon(1),
+                        ChrononWithPitchAndPathAttribute(200, 3, "b.wav"),
+                    ]
+                ),
+                ChrononWithPitchAndPathAttribute(300, 4, "c.wav"),
+            ]
+        )
+        line_iterator = self.converter.iter_lines(event_to_convert)
+        self.assertFalse(isinstance(line_iterator, (tuple, list)))
+        line_tuple = tuple(line_iterator)
+        self.assertEqual(
+            line_tuple,
+            self.converter._convert_event(
+                event_to_convert, core_parameters.DirectDuration(0)
+            ),
+        )
+        self.converter.convert(event_to_convert, self.test_path)
+        with open(self.test_path, "r") as f:
+            self.assertEqual(f.read(), "\n".join(line_tuple))
+
+    def test_convert_nested_event_with_irregular_durations(self):
+        # p2 needs to be equal to the absolute entry delays which are
+        # calculated with duration objects.
+        def iter_expected_p2(event, absolute_entry_delay):
+            match event:
+                case core_events.Consecution():
+                    for local_entry_delay, e in zip(event.absolute_time_tuple, event):
+                        yield from iter_expected_p2(
+                            e, local_entry_delay + absolute_entry_delay
+                        )
+                case core_events.Concurrence():
+                    for e in event:
+                        yield from iter_expected_p2(e, absolute_entry_delay)
+                case _:
+                    yield str(absolute_entry_delay.beat_count)
+
+        event_to_convert = core_events.Consecution([])
+        for nth_level in range(30):
+            compound_type = (core_events.Concurrence, core_events.Consecution)[
+                nth_level % 2
+            ]
+            event_to_convert = compound_type(
+                [
+                    core_events.Chronon(1 / 3),
+                    core_events.Chronon(core_parameters.RatioDuration("2/7")),
+                    event_to_convert,
+                    core_events.Chronon(0.1),
+                ]
+            )
+        converter = csound_converters.EventToCsoundScore()
+        p2_list = [
+            line.split()[2]
+            for line in converter.iter_lines(event_to_convert)
+            if line.startswith("i")
+        ]
+        self.assertEqual(
+            p2_list,
+            list(iter_expected_p2(event_to_convert, core_parameters.DirectDuration(0))),
+        )
+        self.assertEqual(
+            [
+                str(absolute_entry_delay)
+                for absolute_entry_delay, _ in converter._iter_timed_chronons(
+                    event_to_convert
+                )
+            ],
+            p2_list,
+        )
+
+    def test_convert_deeply_nested_event(self):
+        # Much deeper than the recursion limit.
+        level_count = 20000
+        event_to_convert = core_events.Chronon(1)
+        for nth_level in range(level_count):
+            if nth_level % 2:
+                event_to_convert = core_events.Consecution(
+                    [event_to_convert, core_events.Chronon(0.5)]
+                )
+            else:
+                event_to_convert = core_events.Concurrence([event_to_convert])
+        converter = csound_converters.EventToCsoundScore()
+        line_list = list(converter.iter_lines(event_to_convert))
+        self.assertEqual(
+            line_list[:2],
+            [
+                csound_converters.configurations.CONSECUTION_ANNOTATION,
+                csound_converters.configurations.CONCURRENCE_ANNOTATION,
+            ],
+        )
+        i_statement_list = [line for line in line_list if line.startswith("i")]
+        self.assertEqual(len(i_statement_list), level_count // 2 + 1)
+        self.assertEqual(
+            i_statement_list[:3], ["i 1 0.0 1.0", "i 1 1.0 0.5", "i 1 1.5 0.5"]
+        )
+        self.assertEqual(
+            len(tuple(converter._iter_timed_chronons(event_to_convert))),
+            level_count // 2 + 1,
+        )
+
+    @staticmethod
+    def _make_deeply_nested_event(level_count):
+        event_to_convert = core_events.Chronon(1)
+        for nth_level in range(level_count):
+            if nth_level % 2:
+                event_to_convert = core_events.Consecution(
+                    [event_to_convert, core_events.Chronon(0.5)]
+                )
+            else:
+                event_to_convert = core_events.Concurrence(
+                    [event_to_convert, core_events.Chronon(nth_level + 1)]
+                )
+        return event_to_convert
+
+    def test_convert_deeply_nested_event_with_sort_by_time(self):
+        # Much deeper than the recursion limit.
+        event_to_convert = self._make_deeply_nested_event(5000)
+        line_list = list(
+            csound_converters.EventToCsoundScore(sort_by_time=True).iter_lines(
+                event_to_convert
+            )
+        )
+        self.assertEqual(
+            line_list,
+            sorted(
+                (
+                    line
+                    for line in csound_converters.EventToCsoundScore().iter_lines(
+                        event_to_convert
+                    )
+                    if line.startswith("i")
+                ),
+                key=lambda line: float(line.split(" ")[2]),
+            ),
+        )
+
+    def test_convert_deeply_nested_event_with_subtree_cache(self):
+        # Much deeper than the recursion limit.
+        event_to_convert = self._make_deeply_nested_event(5000)
+        converter = csound_converters.EventToCsoundScore(subtree_cache_size=10)
+        expected_line_list = list(
+            csound_converters.EventToCsoundScore().iter_lines(event_to_convert)
+        )
+        for _ in range(2):
+            self.assertEqual(
+                list(converter.iter_lines(event_to_convert)), expected_line_list
+            )
+        # The second conversion reuses the lines of the whole event.
+        self.assertEqual(converter.subtree_cache_hit_count, 1)
+
+    def test_convert_chronon_with_custom_p2(self):
+        converter = csound_converters.EventToCsoundScore(
+            p2=lambda event: 5, p4=lambda event: event.path
+        )
+        line_tuple = converter._convert_chronon(
+            ChrononWithPitchAndPathAttribute(100, 2, "a.wav"),
+            core_parameters.DirectDuration(1),
+        )
+        self.assertEqual(line_tuple, ('i 1 5 2.0 "a.wav"',))
+
+    def test_set_pfield_tuple(self):
+        converter = csound_converters.EventToCsoundScore()
+        chronon = core_events.Chronon(2)
+        absolute_entry_delay = core_parameters.DirectDuration(1)
+        self.assertEqual(
+            converter._convert_chronon(chronon, absolute_entry_delay),
+            ("i 1 1.0 2.0",),
+        )
+        converter.pfield_tuple = converter.pfield_tuple + (lambda event: 0.5,)
+        self.assertEqual(
+            converter._convert_chronon(chronon, absolute_entry_delay),
+            ("i 1 1.0 2.0 0.5",),
+        )
+
+    def test_convert_with_column_p_field(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(100, 2, "a.wav"),
+                        core_events.Chronon(1),
+                        ChrononWithPitchAndPathAttribute(200, 0.25, "b.wav"),
+                        ChrononWithPitchAndPathAttribute(300, 1 / 3, "c.wav"),
+                    ]
+                ),
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(50, 3, "d.wav"),
+                        ChrononWithPitchAndPathAttribute(60, 0.5, "e.wav"),
+                    ]
+                ),
+                ChrononWithPitchAndPathAttribute(400, 4, "f.wav"),
+            ]
+        )
+        column_converter = csound_converters.EventToCsoundScore(
+            p4=csound_converters.ColumnPField(
+                lambda chronon_list: np.array(
+                    [chronon.hertz for chronon in chronon_list]
+                )
+            ),
+            p5=lambda event: event.path,
+            p6=csound_converters.ColumnPField(
+                lambda chronon_list: np.full(len(chronon_list), "x")
+            ),
+        )
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            p6=lambda event: "x",
+        )
+        self.assertEqual(
+            tuple(column_converter.iter_lines(event_to_convert)),
+            tuple(converter.iter_lines(event_to_convert)),
+        )
+
+    def test_convert_with_column_p_field_and_irregular_durations(self):
+        # Local entry delays are rounded after each chronon: late in the
+        # score the rounded sum of all durations would differ in the last
+        # digit.
+        event_to_convert = core_events.Consecution(
+            [core_events.Chronon(100000)]  # rest
+            + [
+                ChrononWithPitchAndPathAttribute(
+                    100, fractions.Fraction(i % 50 + 1, i % 97 + 1), "a.wav"
+                )
+                for i in range(300)
+            ]
+        )
+        column_converter = csound_converters.EventToCsoundScore(
+            p4=csound_converters.ColumnPField(
+                lambda chronon_list: np.array(
+                    [chronon.hertz for chronon in chronon_list]
+                )
+            ),
+            p5=lambda event: event.path,
+        )
+        self.assertEqual(
+            tuple(column_converter.iter_lines(event_to_convert)),
+            tuple(self.converter.iter_lines(event_to_convert)),
+        )
+
+    def test_convert_with_subtree_cache(self):
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            subtree_cache_size=100,
+        )
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(hertz, 1, "a.wav"),
+                        core_events.Chronon(0.5),
+                        ChrononWithPitchAndPathAttribute(hertz, 2, "b.wav"),
+                    ]
+                )
+                for hertz in (100, 200, 300)
+            ]
+        )
+        expected_line_tuple = tuple(self.converter.iter_lines(event_to_convert))
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert)), expected_line_tuple
+        )
+        self.assertEqual(converter.subtree_cache_hit_count, 0)
+        self.assertEqual(converter.subtree_cache_miss_count, 4)
+
+        event_to_convert[1][0].hertz = 250
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert)),
+            tuple(self.converter.iter_lines(event_to_convert)),
+        )
+        # The two unchanged voices are reused
+        self.assertEqual(converter.subtree_cache_hit_count, 2)
+        self.assertEqual(converter.subtree_cache_miss_count, 6)
+
+        # Same subtree, but different absolute entry delay
+        moved_event = core_events.Consecution(
+            [core_events.Chronon(1), event_to_convert[0]]
+        )
+        self.assertEqual(
+            tuple(converter.iter_lines(moved_event)),
+            tuple(self.converter.iter_lines(moved_event)),
+        )
+
+    def test_subtree_cache_size(self):
+        converter = csound_converters.EventToCsoundScore(subtree_cache_size=2)
+        event_to_convert = core_events.Consecution(
+            [
+                core_events.Concurrence([core_events.Chronon(duration)])
+                for duration in (1, 2, 3)
+            ]
+        )
+        converter.convert(event_to_convert, self.test_path)
+        self.assertEqual(len(converter._subtree_cache), 2)
+        converter.clear_subtree_cache()
+        self.assertEqual(len(converter._subtree_cache), 0)
+
+    @staticmethod
+    def _make_tempo_consecution(end_bpm):
+        # The 'repr' of both tempos is 'FlexTempo(60.0)': it doesn't show
+        # the last point of the envelope.
+        return core_events.Consecution(
+            [
+                core_events.Chronon(
+                    duration, tempo=core_parameters.FlexTempo([[0, 60], [1, end_bpm]])
+                )
+                for duration in (1, 2)
+            ]
+        )
+
+    def test_subtree_cache_with_equal_repr(self):
+        pfield_dict = dict(p4=lambda event: event.tempo.value_at(1))
+        converter = csound_converters.EventToCsoundScore(
+            subtree_cache_size=10, **pfield_dict
+        )
+        for end_bpm in (120, 60):
+            event_to_convert = core_events.Concurrence(
+                [self._make_tempo_consecution(end_bpm)]
+            )
+            self.assertEqual(
+                tuple(converter.iter_lines(event_to_convert)),
+                tuple(
+                    csound_converters.EventToCsoundScore(**pfield_dict).iter_lines(
+                        event_to_convert
+                    )
+                ),
+            )
+        self.assertEqual(converter.subtree_cache_hit_count, 0)
+
+        # Events with attributes whose content is unknown (and the events
+        # which contain them) aren't memorized.
+        converter = csound_converters.EventToCsoundScore(subtree_cache_size=10)
+        event_to_convert = core_events.Concurrence(
+            [core_events.Consecution([core_events.Chronon(1)]) for _ in range(2)]
+        )
+        event_to_convert[0].function = lambda: None
+        for _ in range(2):
+            tuple(converter.iter_lines(event_to_convert))
+        self.assertEqual(converter.subtree_cache_hit_count, 1)
+
+    @staticmethod
+    def _resolve_carry(csound_score_line_iterable):
+        # Reimplements how csound reads carried p-fields.
+        resolved_line_list, previous_token_list = [], None
+        for csound_score_line in csound_score_line_iterable:
+            if not csound_score_line.startswith("i"):
+                continue
+            token_list = csound_score_line.split(" ")[1:]
+            if previous_token_list and previous_token_list[0] == token_list[0]:
+                token_list += previous_token_list[len(token_list) :]
+                for nth_token, token in enumerate(token_list):
+                    if token == ".":
+                        token_list[nth_token] = previous_token_list[nth_token]
+                    elif token == "+":
+                        token_list[nth_token] = str(
+                            float(previous_token_list[1]) + float(previous_token_list[2])
+                        )
+            previous_token_list = token_list
+            resolved_line_list.append(
+                tuple(
+                    token if token[0] == '"' else float(token) for token in token_list
+                )
+            )
+        return resolved_line_list
+
+    @staticmethod
+    def _expand_macros(csound_score_line_iterable):
+        # Reimplements how csound expands score macros and moves start
+        # times by the clock base of 'b' statements.
+        macro_dict, macro_name, clock_base = {}, None, 0
+        expanded_line_list = []
+
+        def add_line(csound_score_line):
+            token_list = csound_score_line.split(" ")
+            if token_list[2] not in (".", "+"):
+                token_list[2] = str(float(token_list[2]) + clock_base)
+            expanded_line_list.append(" ".join(token_list))
+
+        for csound_score_line in csound_score_line_iterable:
+            if csound_score_line.startswith("#define"):
+                macro_name = csound_score_line.split(" ")[1]
+                macro_dict[macro_name] = []
+            elif csound_score_line == "#":
+                macro_name = None
+            elif macro_name is not None:
+                macro_dict[macro_name].append(csound_score_line)
+            elif csound_score_line.startswith("b "):
+                clock_base = float(csound_score_line[2:])
+            elif csound_score_line.startswith("$"):
+                for macro_line in macro_dict[csound_score_line[1:-1]]:
+                    add_line(macro_line)
+            elif csound_score_line.startswith("i"):
+                add_line(csound_score_line)
+        return expanded_line_list
+
+    def _assert_equal_expanded_score(self, line_iterable, expected_line_iterable):
+        def round_line_list(line_list):
+            return [
+                tuple(
+                    round(token, 9) if isinstance(token, float) else token
+                    for token in line
+                )
+                for line in line_list
+            ]
+
+        self.assertEqual(
+            round_line_list(self._resolve_carry(self._expand_macros(line_iterable))),
+            round_line_list(self._resolve_carry(expected_line_iterable)),
+        )
+
+    def test_convert_with_compress_repeats(self):
+        def make_motif(hertz):
+            consecution = core_events.Consecution(
+                [
+                    ChrononWithPitchAndPathAttribute(hertz, 0.5, "a.wav"),
+                    ChrononWithPitchAndPathAttribute(hertz * 2, 0.25, "a.wav"),
+                    core_events.Chronon(0.25),  # rest
+                    ChrononWithPitchAndPathAttribute(hertz, 1 / 3, "a.wav"),
+                ]
+            )
+            return consecution
+
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [make_motif(100), make_motif(200), make_motif(100)] * 2
+                ),
+                core_events.Consecution(
+                    [core_events.Chronon(0.1), make_motif(200), make_motif(300)]
+                ),
+            ]
+        )
+        pfield_dict = dict(p4=lambda event: event.hertz, p5=lambda event: event.path)
+        expected_line_tuple = tuple(
+            csound_converters.EventToCsoundScore(**pfield_dict).iter_lines(
+                event_to_convert
+            )
+        )
+        converter = csound_converters.EventToCsoundScore(
+            compress_repeats=True, **pfield_dict
+        )
+        line_tuple = tuple(converter.iter_lines(event_to_convert))
+        # 'motif(100)' and 'motif(200)' are defined once, 'motif(300)'
+        # appears only once.
+        self.assertEqual(
+            [line for line in line_tuple if line.startswith("#define")],
+            ["#define MUTWO_REPEAT_1 #", "#define MUTWO_REPEAT_2 #"],
+        )
+        self.assertEqual(sum(line.startswith("$") for line in line_tuple), 7)
+        self.assertLess(len(line_tuple), len(expected_line_tuple))
+        self._assert_equal_expanded_score(line_tuple, expected_line_tuple)
+
+        # Start times aren't carried inside of macros.
+        converter = csound_converters.EventToCsoundScore(
+            compress_repeats=True, carry=True, **pfield_dict
+        )
+        line_tuple = tuple(converter.iter_lines(event_to_convert))
+        self.assertEqual(line_tuple[4], 'i 1 0.5 0.25 200 "a.wav"')
+        self._assert_equal_expanded_score(line_tuple, expected_line_tuple)
+
+        self.assertRaises(
+            ValueError,
+            csound_converters.EventToCsoundScore,
+            compress_repeats=True,
+            sort_by_time=True,
+        )
+        self.assertRaises(
+            ValueError,
+            csound_converters.EventToCsoundScore,
+            compress_repeats=True,
+            p2=lambda event: 0,
+        )
+
+    def test_convert_with_compress_repeats_macro_lines(self):
+        event_to_convert = core_events.Consecution(
+            [
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(hertz, duration, "a.wav")
+                        for hertz, duration in ((200, 0.5), (300, 0.25), (400, 0.25))
+                    ]
+                )
+                for _ in range(4)
+            ]
+        )
+        # The motif is defined once and moved to its start times with 'b'
+        # statements.
+        self.assertEqual(
+            list(
+                csound_converters.EventToCsoundScore(
+                    p4=lambda event: event.hertz,
+                    p5=lambda event: event.path,
+                    compress_repeats=True,
+                ).iter_lines(event_to_convert)
+            ),
+            [
+                csound_converters.configurations.CONSECUTION_ANNOTATION,
+                "#define MUTWO_REPEAT_1 #",
+                'i 1 0.0 0.5 200 "a.wav"',
+                'i 1 0.5 0.25 300 "a.wav"',
+                'i 1 0.75 0.25 400 "a.wav"',
+                "#",
+            ]
+            + [
+                line
+                for nth_motif in range(4)
+                for line in (f"b {float(nth_motif)}", "$MUTWO_REPEAT_1.", "b 0")
+            ]
+            + [""],
+        )
+
+    def test_convert_with_compress_repeats_and_equal_repr(self):
+        event_to_convert = core_events.Consecution(
+            [self._make_tempo_consecution(end_bpm) for end_bpm in (120, 60, 120)]
+        )
+        pfield_dict = dict(p4=lambda event: event.tempo.value_at(1))
+        line_tuple = tuple(
+            csound_converters.EventToCsoundScore(
+                compress_repeats=True, **pfield_dict
+            ).iter_lines(event_to_convert)
+        )
+        self._assert_equal_expanded_score(
+            line_tuple,
+            csound_converters.EventToCsoundScore(**pfield_dict).iter_lines(
+                event_to_convert
+            ),
+        )
+
+    def test_convert_deeply_nested_event_with_compress_repeats(self):
+        # Much deeper than the recursion limit.
+        level_count = 5000
+        event_to_convert = core_events.Consecution(
+            [ChrononWithPitchAndPathAttribute(100, 1, "a.wav")]
+        )
+        for nth_level in range(level_count):
+            if nth_level % 2:
+                event_to_convert = core_events.Consecution(
+                    [
+                        event_to_convert,
+                        core_events.Consecution(
+                            [
+                                ChrononWithPitchAndPathAttribute(200, 0.5, "b.wav"),
+                                ChrononWithPitchAndPathAttribute(300, 0.5, "b.wav"),
+                            ]
+                        ),
+                    ]
+                )
+            else:
+                event_to_convert = core_events.Concurrence([event_to_convert])
+        pfield_dict = dict(p4=lambda event: event.hertz, p5=lambda event: event.path)
+        line_tuple = tuple(
+            csound_converters.EventToCsoundScore(
+                compress_repeats=True, **pfield_dict
+            ).iter_lines(event_to_convert)
+        )
+        self.assertEqual(
+            [line for line in line_tuple if line.startswith("#define")],
+            ["#define MUTWO_REPEAT_1 #"],
+        )
+        self.assertEqual(
+            sum(line == "$MUTWO_REPEAT_1." for line in line_tuple), level_count // 2
+        )
+        self._assert_equal_expanded_score(
+            line_tuple,
+            csound_converters.EventToCsoundScore(**pfield_dict).iter_lines(
+                event_to_convert
+            ),
+        )
+
+    def test_convert_with_carry(self):
+        converter = csound_converters.EventToCsoundScore(
+            p1=lambda event: event.instrument,
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            p6=lambda event: event.amplitude,
+            carry=True,
+        )
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(hertz, duration, "a.wav")
+                        for hertz, duration in (
+                            (440, 1),
+                            (440, 0.1),
+                            (440, 0.2),
+                            (220, 0.2),
+                            (220, 0.1),
+                        )
+                    ]
+                )
+                for _ in range(2)
+            ]
+        )
+        for instrument, consecution in enumerate(event_to_convert, 1):
+            for nth_chronon, chronon in enumerate(consecution):
+                chronon.instrument = instrument
+                chronon.amplitude = 0.5 if nth_chronon < 3 else 0.25
+        event_to_convert[1][2] = core_events.Chronon(1)  # rest
+
+        line_tuple = tuple(converter.iter_lines(event_to_convert))
+        self.assertEqual(line_tuple[2], 'i 1 0.0 1.0 440 "a.wav" 0.5')
+        self.assertEqual(line_tuple[3], 'i 1 + 0.1 . "a.wav"')
+        self.assertEqual(line_tuple[5], 'i 1 + . 220 "a.wav" 0.25')
+        self.assertEqual(
+            self._resolve_carry(line_tuple),
+            self._resolve_carry(
+                csound_converters.EventToCsoundScore(
+                    p1=lambda event: event.instrument,
+                    p4=lambda event: event.hertz,
+                    p5=lambda event: event.path,
+                    p6=lambda event: event.amplitude,
+                ).iter_lines(event_to_convert)
+            ),
+        )
+
+    def test_convert_with_precision(self):
+        converter = csound_converters.EventToCsoundScore(
+            p1=lambda event: 1.5,
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            precision=2,
+        )
+        event_to_convert = ChrononWithPitchAndPathAttribute(
+            1 / 3, core_parameters.DirectDuration(1), "1.23456"
+        )
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert)),
+            ('i 1.5 0 1 0.33 "1.23456"',),
+        )
+        event_to_convert.hertz = -0.0001
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert)),
+            ('i 1.5 0 1 0 "1.23456"',),
+        )
+        converter.convert(event_to_convert, self.test_path)
+        self.assertEqual(
+            converter.score_size_report,
+            csound_converters.ScoreSizeReport(21, 31),
+        )
+
+    def test_convert_with_profile(self):
+        report_list = []
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            report_callback=report_list.append,
+        )
+        self.assertTrue(converter.profile)
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, "a.wav"),
+                core_events.Chronon(1),  # rest
+                ChrononWithPitchAndPathAttribute(220, 1, {1, 2}),  # warning
+            ]
+        )
+        with self.assertWarns(Warning):
+            converter.convert(event_to_convert, self.test_path)
+        (report,) = report_list
+        self.assertIs(converter.report, report)
+        self.assertEqual(
+            (
+                report.chronon_count,
+                report.rest_count,
+                report.line_count,
+                report.warning_count,
+            ),
+            (3, 1, 5, 1),
+        )
+        self.assertEqual(set(report.phase_duration_dict), {"score", "write"})
+        self.assertEqual(set(report.p_field_duration_dict), {"p1", "p3", "p4", "p5"})
+        self.assertGreaterEqual(report.traversal_and_formatting_duration, 0)
+        self.assertIsNone(report.csound_wall_duration)
+
+        with self.assertWarns(Warning):
+            line_tuple = tuple(converter.iter_lines(event_to_convert))
+        self.assertEqual(len(report_list), 2)
+        self.assertEqual(
+            report_list[1].line_count, "\n".join(line_tuple).count("\n") + 1
+        )
+
+        # Profiling doesn't change the score
+        converter.profile = False
+        with self.assertWarns(Warning):
+            self.assertEqual(tuple(converter.iter_lines(event_to_convert)), line_tuple)
+        self.assertEqual(len(report_list), 2)
+
+    def test_convert_with_column_p_field_and_profile(self):
+        converter = csound_converters.EventToCsoundScore(
+            p4=csound_converters.ColumnPField(
+                lambda chronon_list: np.array([c.hertz for c in chronon_list])
+            ),
+            profile=True,
+        )
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, "a.wav"),
+                core_events.Chronon(1),  # rest
+            ]
+        )
+        converter.convert(event_to_convert, self.test_path)
+        self.assertEqual(
+            (converter.report.chronon_count, converter.report.rest_count), (2, 1)
+        )
+        self.assertIn("p4", converter.report.p_field_duration_dict)
+
+    def test_convert_with_known_rests(self):
+        call_list = []
+
+        def get_hertz(event):
+            call_list.append(event)
+            return event.hertz
+
+        converter = csound_converters.EventToCsoundScore(p4=get_hertz)
+        rest_list = [core_events.Chronon(1) for _ in range(3)]
+        pitchless_chronon = ChrononWithPitchAndPathAttribute(None, 1, "a.wav")
+        event_to_convert = core_events.Consecution(
+            [ChrononWithPitchAndPathAttribute(440, 1, "a.wav")]
+            + rest_list
+            + [ChrononWithPitchAndPathAttribute(220, 1, "a.wav")]
+        )
+        line_tuple = tuple(converter.iter_lines(event_to_convert))
+        self.assertEqual(len(line_tuple), 4)
+        # Only the first rest calls the p-field function: the other rests
+        # are chronons of the same kind.
+        self.assertEqual(len(call_list), 3)
+        self.assertIs(call_list[1], rest_list[0])
+        # Chronons with a new attribute aren't rests.
+        rest_list[1].hertz = 330
+        self.assertEqual(len(tuple(converter.iter_lines(event_to_convert))), 5)
+
+        # Rests which depend on values aren't remembered.
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz.real
+        )
+        event_to_convert = core_events.Consecution(
+            [pitchless_chronon, ChrononWithPitchAndPathAttribute(440, 1, "a.wav")]
+        )
+        self.assertEqual(len(tuple(converter.iter_lines(event_to_convert))), 3)
+        self.assertEqual(len(tuple(converter.iter_lines(event_to_convert))), 3)
+
+    def test_convert_with_rest_predicate(self):
+        call_list = []
+
+        def get_hertz(event):
+            call_list.append(event)
+            return event.hertz
+
+        converter = csound_converters.EventToCsoundScore(
+            p4=get_hertz, rest_predicate=lambda event: event.hertz is None
+        )
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, "a.wav"),
+                ChrononWithPitchAndPathAttribute(None, 1, "a.wav"),
+            ]
+        )
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert))[1:-1],
+            ("i 1 0.0 1.0 440",),
+        )
+        self.assertEqual(len(call_list), 1)
+
+        # Known rests aren't passed to column functions.
+        converter = csound_converters.EventToCsoundScore(
+            p4=csound_converters.ColumnPField(
+                lambda chronon_list: np.array([c.hertz for c in chronon_list])
+            ),
+            rest_predicate=lambda event: event.hertz is None,
+            profile=True,
+        )
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert))[1:-1],
+            ("i 1 0.0 1.0 440",),
+        )
+        self.assertEqual(converter.report.rest_count, 1)
+
+    def test_convert_column_data(self):
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz, p5=lambda event: event.path
+        )
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, "a.wav"),
+                core_events.Chronon(0.5),  # rest
+                ChrononWithPitchAndPathAttribute(220.5, 0.25, "b.wav"),
+                ChrononWithPitchAndPathAttribute(330, 2, "a b.wav"),
+            ]
+        )
+        line_list = [
+            line
+            for line in converter.iter_lines(event_to_convert)
+            if line.startswith("i")
+        ]
+        column_dict = converter.get_column_dict(event_to_convert)
+        self.assertEqual(sorted(column_dict), ["p1", "p2", "p3", "p4", "p5"])
+        self.assertEqual(column_dict["p2"].tolist(), [0, 1.5, 1.75])
+        self.assertEqual(list(converter.iter_lines(column_dict)), line_list)
+
+        # Structured arrays are converted like dicts.
+        structured_array = np.zeros(
+            3, dtype=[(name, column.dtype) for name, column in column_dict.items()]
+        )
+        for name, column in column_dict.items():
+            structured_array[name] = column
+        self.assertEqual(list(converter.iter_lines(structured_array)), line_list)
+
+        # Without p2 events follow each other.
+        self.assertEqual(
+            list(converter.iter_lines({"p3": [1, 0.5], "p4": [1, 2]})),
+            ["i 1 0.0 1.0 1", "i 1 1.0 0.5 2"],
+        )
+        # Their entry delays are rounded like the entry delays of chronons.
+        event_to_convert = core_events.Consecution(
+            [ChrononWithPitchAndPathAttribute(1, 100000, "a.wav")]
+            + [
+                ChrononWithPitchAndPathAttribute(
+                    i, fractions.Fraction(i % 50 + 1, i % 97 + 1), "a.wav"
+                )
+                for i in range(300)
+            ]
+        )
+        self.assertEqual(
+            list(
+                converter.iter_lines(
+                    {
+                        "p3": [
+                            chronon.duration.beat_count for chronon in event_to_convert
+                        ],
+                        "p4": [chronon.hertz for chronon in event_to_convert],
+                        "p5": [chronon.path for chronon in event_to_convert],
+                    }
+                )
+            ),
+            [
+                line
+                for line in converter.iter_lines(event_to_convert)
+                if line.startswith("i")
+            ],
+        )
+        converter = csound_converters.EventToCsoundScore(
+            carry=True, sort_by_time=True
+        )
+        converter.convert({"p2": [1, 0], "p3": [1, 1], "p4": [5, 5]}, self.test_path)
+        with open(self.test_path, "r") as f:
+            self.assertEqual(f.read(), "i 1 0 1 5\ni 1 + .")
+        with self.assertWarns(Warning):
+            self.assertEqual(
+                list(converter.iter_lines({"p2": [0], "p3": [1], "p5": [1]})),
+                ["i 1 0 1 0 1"],
+            )
+
+        self.assertRaises(ValueError, list, converter.iter_lines({"p4": [1]}))
+        self.assertRaises(
+            ValueError, list, converter.iter_lines({"p3": [1], "duration": [1]})
+        )
+        self.assertRaises(
+            ValueError, list, converter.iter_lines({"p3": [1], "p4": [1, 2]})
+        )
+        self.assertRaises(
+            ValueError,
+            converter.get_column_dict,
+            core_events.Consecution([core_events.Consecution()]),
+        )
+
+    def test_convert_with_sort_by_time(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [
+                        ChrononWithPitchAndPathAttribute(i, duration, "a.wav")
+                        for i in range(6)
+                    ]
+                    + [
+                        core_events.Concurrence(
+                            [
+                                core_events.Consecution(
+                                    [
+                                        core_events.Chronon(0.5),  # rest
+                                        ChrononWithPitchAndPathAttribute(
+                                            7, 1.25, "b.wav"
+                                        ),
+                                    ]
+                                ),
+                                ChrononWithPitchAndPathAttribute(8, 1, "c.wav"),
+                            ]
+                        )
+                    ]
+                )
+                for duration in (1, 0.75, 1.5)
+            ]
+        )
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            sort_by_time=True,
+        )
+        line_tuple = tuple(converter.iter_lines(event_to_convert))
+        expected_line_list = sorted(
+            (
+                line
+                for line in self.converter.iter_lines(event_to_convert)
+                if line.startswith("i")
+            ),
+            # Events with equal start time keep their order
+            key=lambda line: float(line.split()[2]),
+        )
+        self.assertEqual(line_tuple, tuple(expected_line_list))
+
+        column_converter = csound_converters.EventToCsoundScore(
+            p4=csound_converters.ColumnPField(
+                lambda chronon_list: [chronon.hertz for chronon in chronon_list]
+            ),
+            p5=lambda event: event.path,
+            sort_by_time=True,
+        )
+        self.assertEqual(
+            tuple(column_converter.iter_lines(event_to_convert)), line_tuple
+        )
+
+    def test_convert_keeps_score_on_error(self):
+        def get_hertz(event):
+            if event.hertz == 7:
+                raise ValueError("broken")
+            return event.hertz
+
+        consecution = core_events.Consecution(
+            [ChrononWithPitchAndPathAttribute(i, 1, "a.wav") for i in range(10)]
+        )
+        self.converter.convert(consecution, self.test_path)
+        with open(self.test_path, "r") as f:
+            score = f.read()
+        converter = csound_converters.EventToCsoundScore(p4=get_hertz)
+        self.assertRaises(ValueError, converter.convert, consecution, self.test_path)
+        with open(self.test_path, "r") as f:
+            self.assertEqual(f.read(), score)
+        # The temporary score file has been removed.
+        self.assertEqual(
+            [name for name in os.listdir(FILE_PATH) if name.startswith(".")], []
+        )
+
+    def test_convert_chunked(self):
+        event_to_convert = core_events.Consecution(
+            [ChrononWithPitchAndPathAttribute(i, 1, "a.wav") for i in range(10)]
+        )
+        line_tuple = tuple(self.converter.iter_lines(event_to_convert))
+        with tempfile.TemporaryDirectory() as directory:
+            chunk_tuple = self.converter.convert_chunked(
+                event_to_convert, directory, max_line_count=4
+            )
+            self.assertEqual(len(chunk_tuple), 3)
+            chunk_data_list = []
+            for chunk in chunk_tuple:
+                with open(chunk.path, "r") as f:
+                    chunk_data_list.append(f.read())
+            self.assertEqual("".join(chunk_data_list), "\n".join(line_tuple) + "\n")
+            with open(os.path.join(directory, "index.sco"), "r") as f:
+                self.assertEqual(
+                    f.read().splitlines(),
+                    [f'#include "{chunk.path}"' for chunk in chunk_tuple],
+                )
+            with open(os.path.join(directory, "index.json"), "r") as f:
+                self.assertEqual(
+                    [csound_converters.ScoreChunk(**chunk) for chunk in json.load(f)],
+                    list(chunk_tuple),
+                )
+
+    def test_convert_chunked_by_time(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [ChrononWithPitchAndPathAttribute(i, 1, "a.wav") for i in range(5)]
+                ),
+                core_events.Consecution(
+                    [ChrononWithPitchAndPathAttribute(i, 2, "b.wav") for i in range(3)]
+                ),
+            ]
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            chunk_tuple = self.converter.convert_chunked(
+                event_to_convert, directory, chunk_duration=2, max_workers=2
+            )
+            # Chunks are sorted by time
+            self.assertEqual(
+                [(chunk.start, chunk.branch_index) for chunk in chunk_tuple],
+                [(0, 0), (0, 1), (2, 0), (2, 1), (4, 0), (4, 1)],
+            )
+            p2_list = []
+            for chunk in chunk_tuple:
+                with open(chunk.path, "r") as f:
+                    line_list = f.read().splitlines()
+                self.assertEqual(len(line_list), chunk.line_count)
+                for line in line_list:
+                    p2 = float(line.split()[2])
+                    self.assertTrue(chunk.start <= p2 < chunk.end)
+                    p2_list.append(p2)
+        self.assertEqual(len(p2_list), 8)
+
+        self.assertRaises(
+            ValueError, self.converter.convert_chunked, event_to_convert, "."
+        )
+
+    def test_convert_chunked_with_spawned_workers(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [ChrononWithPitchAndPathAttribute(i, 1, path) for i in range(5)]
+                )
+                for path in ("a.wav", "b.wav")
+            ]
+        )
+        converter = csound_converters.EventToCsoundScore(
+            p4=operator.attrgetter("hertz"),
+            p5=operator.attrgetter("path"),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            chunk_tuple = converter.convert_chunked(
+                event_to_convert, directory, max_line_count=10, max_workers=2
+            )
+            self.assertEqual([chunk.branch_index for chunk in chunk_tuple], [0, 1])
+            for chunk, branch in zip(chunk_tuple, event_to_convert):
+                with open(chunk.path, "r") as f:
+                    self.assertEqual(
+                        f.read(), "\n".join(self.converter.iter_lines(branch)) + "\n"
+                    )
+
+    def test_convert_chunked_by_time_with_many_chunks(self):
+        resource = __import__("resource")
+        chunk_count = 2000
+        # The second branch adds lines to all chunks again, after their
+        # files have been closed.
+        event_to_convert = core_events.Consecution(
+            [
+                core_events.Concurrence(
+                    [
+                        core_events.Consecution(
+                            [
+                                ChrononWithPitchAndPathAttribute(i, 1, path)
+                                for i in range(chunk_count)
+                            ]
+                        )
+                        for path in ("a.wav", "b.wav")
+                    ]
+                )
+            ]
+        )
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        # Much less file descriptors than chunks are available.
+        resource.setrlimit(resource.RLIMIT_NOFILE, (256, hard_limit))
+        self.addCleanup(
+            resource.setrlimit, resource.RLIMIT_NOFILE, (soft_limit, hard_limit)
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            chunk_tuple = self.converter.convert_chunked(
+                event_to_convert, directory, chunk_duration=1
+            )
+            self.assertEqual(len(chunk_tuple), chunk_count)
+            for nth_chunk, chunk in enumerate(chunk_tuple):
+                self.assertEqual(chunk.start, nth_chunk)
+                self.assertEqual(chunk.line_count, 2)
+            with open(chunk_tuple[-1].path, "r") as f:
+                self.assertEqual(
+                    f.read().splitlines(),
+                    [
+                        f'i 1 {chunk_count - 1}.0 1.0 {chunk_count - 1} "{path}"'
+                        for path in ("a.wav", "b.wav")
+                    ],
+                )
+
+    def test_convert_chunked_removes_chunk_files_on_error(self):
+        def get_hertz(event):
+            if event.hertz == 7:
+                raise ValueError("broken")
+            return event.hertz
+
+        converter = csound_converters.EventToCsoundScore(p4=get_hertz)
+        consecution = core_events.Consecution(
+            [ChrononWithPitchAndPathAttribute(i, 1, "a.wav") for i in range(10)]
+        )
+        for event_to_convert, keyword_argument_dict in (
+            (consecution, dict(chunk_duration=2)),
+            (consecution, dict(max_line_count=2)),
+            (
+                core_events.Concurrence([consecution.copy(), consecution.copy()]),
+                dict(chunk_duration=2, max_workers=2),
+            ),
+        ):
+            with tempfile.TemporaryDirectory() as directory:
+                self.assertRaises(
+                    ValueError,
+                    converter.convert_chunked,
+                    event_to_convert,
+                    directory,
+                    **keyword_argument_dict,
+                )
+                self.assertEqual(os.listdir(directory), [])
+
+    def test_convert_with_parallel_depth(self):
+        event_to_convert = core_events.Consecution(
+            [
+                core_events.Concurrence(
+                    [
+                        core_events.Consecution(
+                            [
+                                ChrononWithPitchAndPathAttribute(i, 1, "a.wav"),
+                                core_events.Chronon(1),  # rest
+                                ChrononWithPitchAndPathAttribute(
+                                    j, 2, {1, 2}  # type: ignore
+                                ),
+                            ]
+                        )
+                        for j in range(5)
+                    ]
+                    + [ChrononWithPitchAndPathAttribute(i, 3, "b.wav")]
+                )
+                for i in range(3)
+            ]
+            + [ChrononWithPitchAndPathAttribute(10, 1, "c.wav")]
+        )
+        with self.assertWarns(Warning):
+            line_tuple = tuple(self.converter.iter_lines(event_to_convert))
+        for parallel_depth in (0, 1, 2):
+            converter = csound_converters.EventToCsoundScore(
+                p4=lambda event: event.hertz,
+                p5=lambda event: event.path,
+                parallel_depth=parallel_depth,
+                max_workers=2,
+            )
+            with self.assertWarns(Warning) as context:
+                self.assertEqual(
+                    tuple(converter.iter_lines(event_to_convert)), line_tuple
+                )
+            # Warnings of worker processes are summarized, too
+            self.assertEqual(len(context.warnings), 1)
+            self.assertIn("Ignored 15 p-field value(s)", str(context.warning))
+
+    def test_convert_with_parallel_depth_and_spawned_workers(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [ChrononWithPitchAndPathAttribute(i, 1, "a.wav") for i in range(5)]
+                )
+                for _ in range(3)
+            ]
+        )
+        converter = csound_converters.EventToCsoundScore(
+            p4=operator.attrgetter("hertz"),
+            p5=operator.attrgetter("path"),
+            parallel_depth=0,
+            max_workers=2,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Spawned workers don't inherit the converted event.
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert)),
+            tuple(self.converter.iter_lines(event_to_convert)),
+        )
+
+    def test_pickle(self):
+        converter = csound_converters.EventToCsoundScore(
+            p4=operator.attrgetter("hertz"), precision=2, trusted_pfield=("p4",)
+        )
+        unpickled_converter = pickle.loads(pickle.dumps(converter))
+        self.assertEqual(
+            len(unpickled_converter.pfield_tuple), len(converter.pfield_tuple)
+        )
+        self.assertEqual(unpickled_converter.precision, 2)
+        event_to_convert = ChrononWithPitchAndPathAttribute(440.123, 1, "a.wav")
+        self.assertEqual(
+            tuple(unpickled_converter.iter_lines(event_to_convert)),
+            tuple(converter.iter_lines(event_to_convert)),
+        )
+
     def test_generate_p_field_mapping(self):
         pfield_key_to_function_mapping = {
             "p1": lambda event: 100,
@@ -221,6 +1411,64 @@ class EventToCsoundScoreTest(unittest.TestCase):
         with open(self.test_path, "r") as f:
             self.assertEqual(f.read(), expected_line)
 
+    def test_summarize_p_field_warnings(self):
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, {i})  # type: ignore
+                for i in range(10)
+            ]
+        )
+        with self.assertWarns(Warning) as context:
+            self.converter.convert(event_to_convert, self.test_path)
+        # Only one warning per conversion
+        self.assertEqual(len(context.warnings), 1)
+        message = str(context.warning)
+        self.assertIn("Ignored 10 p-field value(s)", message)
+        self.assertIn("p5: 10 value(s), for instance {0}, {1}, {2}", message)
+        self.assertNotIn("{3}", message)
+
+        with self.assertWarns(Warning) as context:
+            tuple(self.converter.iter_lines(event_to_convert))
+        self.assertEqual(len(context.warnings), 1)
+
+    def test_convert_with_strict(self):
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.path, strict=True
+        )
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, "a.wav"),
+                ChrononWithPitchAndPathAttribute(440, 1, {1, 2}),  # type: ignore
+            ]
+        )
+        self.assertRaises(
+            csound_converters.InvalidPFieldValueTypeError,
+            converter.convert,
+            event_to_convert,
+            self.test_path,
+        )
+        self.assertRaises(
+            TypeError, lambda: tuple(converter.iter_lines(event_to_convert))
+        )
+
+    def test_convert_with_trusted_pfield(self):
+        converter = csound_converters.EventToCsoundScore(
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.path,
+            trusted_pfield=("p4",),
+        )
+        event_to_convert = core_events.Consecution(
+            [
+                ChrononWithPitchAndPathAttribute(440, 1, "a.wav"),
+                core_events.Chronon(1),  # rest
+                ChrononWithPitchAndPathAttribute(220.5, 2, "b.wav"),
+            ]
+        )
+        self.assertEqual(
+            tuple(converter.iter_lines(event_to_convert)),
+            tuple(self.converter.iter_lines(event_to_convert)),
+        )
+
 
 class EventToSoundFileTest(unittest.TestCase):
     @classmethod
@@ -280,6 +1528,421 @@ class EventToSoundFileTest(unittest.TestCase):
         )
         self.assertTrue(os.path.isfile(self.score_path))
 
+    def test_convert_many(self):
+        path_list = [
+            "{}/test_many{}.wav".format(FILE_PATH, nth_job) for nth_job in range(3)
+        ]
+        # Files are removed even if an assertion fails.
+        for path in path_list:
+            self.addCleanup(pathlib.Path(path).unlink, missing_ok=True)
+            self.addCleanup(pathlib.Path(path + ".sco").unlink, missing_ok=True)
+        result_tuple = self.converter.convert_many(
+            [
+                (self.event_to_convert, path_list[0]),
+                # Invalid event must not stop other jobs
+                ("not an event", path_list[1]),
+                (self.event_to_convert, path_list[2], self.score_path),
+            ],
+            max_workers=2,
+        )
+        self.assertEqual(len(result_tuple), 3)
+        self.assertTrue(result_tuple[0].is_successful)
+        self.assertEqual(result_tuple[0].exit_code, 0)
+        self.assertEqual(result_tuple[0].score_path, path_list[0] + ".sco")
+        self.assertIsInstance(result_tuple[1].exception, TypeError)
+        self.assertFalse(result_tuple[1].is_successful)
+        self.assertTrue(result_tuple[2].is_successful)
+        self.assertEqual(result_tuple[2].score_path, self.score_path)
+        for nth_job in (0, 2):
+            self.assertTrue(os.path.isfile(path_list[nth_job]))
+        # The failed conversion didn't leave a score file.
+        self.assertFalse(os.path.exists(path_list[1] + ".sco"))
+
+    def test_convert_returns_render_result(self):
+        render_result = self.converter.convert(
+            self.event_to_convert, self.soundfile_path, self.score_path
+        )
+        self.assertEqual(render_result.exit_code, 0)
+        self.assertEqual(render_result.error_tuple, tuple([]))
+        self.assertTrue(render_result.is_successful)
+
+    def test_convert_with_invalid_orchestra(self):
+        orchestra_path = "{}/invalid.orc".format(FILE_PATH)
+        with open(orchestra_path, "w") as f:
+            f.write("instr 1\nasig not_an_opcode p4\nendin")
+        self.addCleanup(os.remove, orchestra_path)
+        converter = csound_converters.EventToSoundFile(
+            orchestra_path, self.score_converter, remove_score_file=True
+        )
+        with self.assertRaises(csound_converters.CsoundError) as context:
+            converter.convert(self.event_to_convert, self.soundfile_path)
+        self.assertNotEqual(context.exception.exit_code, 0)
+        self.assertTrue(context.exception.render_result.error_tuple)
+        self.assertFalse(os.path.isfile(self.soundfile_path + ".sco"))
+
+    def test_convert_async(self):
+        async def render_all():
+            return await asyncio.gather(
+                *(
+                    self.converter.convert_async(
+                        self.event_to_convert,
+                        self.soundfile_path,
+                        self.score_path,
+                    )
+                    for _ in range(1)
+                )
+            )
+
+        (render_result,) = asyncio.run(render_all())
+        self.assertTrue(render_result.is_successful)
+        self.assertTrue(os.path.isfile(self.soundfile_path))
+
+    def test_cancel_convert_async(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        pid_path = os.path.join(directory.name, "pid")
+        csound_path = os.path.join(directory.name, "csound")
+        with open(csound_path, "w") as f:
+            f.write(f'#!/bin/sh\necho $$ > "{pid_path}"\nexec sleep 60\n')
+        os.chmod(csound_path, 0o755)
+        csound_binary = csound_converters.configurations.CSOUND_BINARY
+        csound_converters.configurations.CSOUND_BINARY = csound_path
+        self.addCleanup(
+            setattr, csound_converters.configurations, "CSOUND_BINARY", csound_binary
+        )
+
+        async def cancel_render():
+            task = asyncio.create_task(
+                self.converter.convert_async(
+                    self.event_to_convert, self.soundfile_path, self.score_path
+                )
+            )
+            while not os.path.isfile(pid_path) or not os.path.getsize(pid_path):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_render())
+        with open(pid_path, "r") as f:
+            pid = int(f.read())
+        # The csound process has been killed and waited for.
+        self.assertRaises(ProcessLookupError, os.kill, pid, 0)
+
+    def test_convert_with_pipe_score(self):
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path, self.score_converter, pipe_score=True
+        )
+        render_result = converter.convert(
+            self.event_to_convert, self.soundfile_path, self.score_path
+        )
+        self.assertTrue(render_result.is_successful)
+        self.assertEqual(
+            render_result.score_path,
+            csound_converters.configurations.SCORE_PIPE_PATH,
+        )
+        self.assertTrue(os.path.isfile(self.soundfile_path))
+        self.assertFalse(os.path.exists(self.soundfile_path + ".sco"))
+
+        render_result = asyncio.run(
+            converter.convert_async(self.event_to_convert, self.soundfile_path)
+        )
+        self.assertTrue(render_result.is_successful)
+
+    def test_convert_with_profile(self):
+        report_list = []
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path,
+            self.score_converter,
+            report_callback=report_list.append,
+        )
+        render_result = converter.convert(
+            self.event_to_convert, self.soundfile_path, self.score_path
+        )
+        self.assertEqual(report_list, [render_result.report])
+        report = render_result.report
+        self.assertEqual(set(report.phase_duration_dict), {"score", "write", "csound"})
+        self.assertGreater(report.csound_wall_duration, 0)
+        self.assertEqual(report.line_count, 1)
+
+    def test_convert_with_worker_pool(self):
+        with csound_converters.CsoundWorkerPool(
+            self.orchestra_path, size=2, max_render_count=2
+        ) as worker_pool:
+            self.assertTrue(worker_pool.check_health())
+            converter = csound_converters.EventToSoundFile(
+                self.orchestra_path, self.score_converter, worker_pool=worker_pool
+            )
+            job_list = [
+                (self.event_to_convert, "{}/test_pool{}.wav".format(FILE_PATH, i))
+                for i in range(5)
+            ]
+            for _, path in job_list:
+                self.addCleanup(os.remove, path)
+                self.addCleanup(os.remove, path + ".sco")
+            render_result_tuple = converter.convert_many(job_list)
+            for render_result in render_result_tuple:
+                self.assertTrue(render_result.is_successful)
+            self.assertEqual(worker_pool.render_count, 5)
+            self.assertGreaterEqual(worker_pool.recycle_count, 1)
+
+    def test_convert_with_render_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            render_cache = csound_converters.RenderCache(directory)
+            converter = csound_converters.EventToSoundFile(
+                self.orchestra_path, self.score_converter, render_cache=render_cache
+            )
+            render_result_tuple = tuple(
+                converter.convert(
+                    self.event_to_convert, self.soundfile_path, self.score_path
+                )
+                for _ in range(2)
+            )
+            self.assertFalse(render_result_tuple[0].is_cache_hit)
+            self.assertTrue(render_result_tuple[1].is_cache_hit)
+            self.assertEqual((render_cache.hit_count, render_cache.miss_count), (1, 1))
+            self.assertTrue(os.path.isfile(self.soundfile_path))
+            # Rendering again into a cached file must not change the cache
+            self.event_to_convert.hertz = 300
+            try:
+                converter.convert(
+                    self.event_to_convert, self.soundfile_path, self.score_path
+                )
+            finally:
+                self.event_to_convert.hertz = 200
+            self.assertEqual(render_cache.miss_count, 2)
+
+
+    def test_convert_sharded(self):
+        event_to_convert = core_events.Consecution(
+            [
+                core_events.Chronon(duration)
+                for duration in (0.75, 0.5, 1.25, 0.25, 0.5, 0.75)
+            ]
+        )
+        for nth_chronon, chronon in enumerate(event_to_convert):
+            chronon.hertz = 200 + nth_chronon * 50
+            chronon.amplitude = 0.25
+        self.addCleanup(os.remove, self.score_path)
+        sharded_path = "{}/test_sharded.wav".format(FILE_PATH)
+        self.addCleanup(os.remove, sharded_path)
+
+        self.converter.convert(event_to_convert, self.soundfile_path, self.score_path)
+        render_result = self.converter.convert_sharded(
+            event_to_convert, sharded_path, 1, tail=0.1, max_workers=2
+        )
+        self.assertTrue(render_result.is_successful)
+        expected_sample_array, expected_sample_rate = (
+            csound_converters.sound_files.read_wav(self.soundfile_path)
+        )
+        sample_array, sample_rate = csound_converters.sound_files.read_wav(
+            sharded_path
+        )
+        self.assertEqual(sample_rate, expected_sample_rate)
+        self.assertEqual(sample_array.shape, expected_sample_array.shape)
+        self.assertTrue(np.allclose(sample_array, expected_sample_array, atol=1e-3))
+
+    def test_convert_with_memory_map(self):
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path,
+            self.score_converter,
+            csound_converters.constants.FORMAT_FLOAT,
+            memory_map=True,
+        )
+        render_result = converter.convert(
+            self.event_to_convert, self.soundfile_path, self.score_path
+        )
+        self.assertIsInstance(render_result.sample_array, np.memmap)
+        self.assertEqual(render_result.sample_array.dtype, np.float32)
+        expected_sample_array, expected_sample_rate = (
+            csound_converters.sound_files.read_wav(self.soundfile_path)
+        )
+        self.assertEqual(render_result.sample_rate, expected_sample_rate)
+        self.assertTrue(
+            np.array_equal(render_result.sample_array, expected_sample_array)
+        )
+        # Without memory_map the sound file isn't touched.
+        self.assertIsNone(
+            self.converter.convert(
+                self.event_to_convert, self.soundfile_path, self.score_path
+            ).sample_array
+        )
+
+    def test_compress_repeats_round_trip(self):
+        # Csound needs to expand the compressed score to the same sorted
+        # score as the uncompressed score.
+        def make_motif():
+            consecution = core_events.Consecution(
+                [core_events.Chronon(duration) for duration in (0.5, 0.25, 0.25)]
+            )
+            for nth_chronon, chronon in enumerate(consecution):
+                chronon.hertz = 200 + nth_chronon * 100
+                chronon.amplitude = 0.1
+            return consecution
+
+        event_to_convert = core_events.Consecution(
+            [make_motif() for _ in range(4)]
+        )
+        sorted_score_list = []
+        for compress_repeats in (False, True):
+            converter = csound_converters.EventToCsoundScore(
+                p4=lambda event: event.hertz,
+                p5=lambda event: event.amplitude,
+                compress_repeats=compress_repeats,
+            )
+            with tempfile.TemporaryDirectory() as directory:
+                score_path = os.path.join(directory, "test.sco")
+                converter.convert(event_to_convert, score_path)
+                subprocess.run(
+                    (
+                        csound_converters.configurations.CSOUND_BINARY,
+                        "-n",
+                        "--keep-sorted-score",
+                        self.orchestra_path,
+                        score_path,
+                    ),
+                    cwd=directory,
+                    capture_output=True,
+                )
+                sorted_score_path = os.path.join(directory, "score.srt")
+                if not os.path.isfile(sorted_score_path):
+                    self.skipTest("csound didn't write a sorted score")
+                with open(sorted_score_path, "r") as f:
+                    sorted_score_list.append(f.read())
+        self.assertEqual(*sorted_score_list)
+
+    def test_convert_memoized(self):
+        event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [core_events.Chronon(duration) for duration in (0.5, 0.25) * 4]
+                ),
+                core_events.Consecution(
+                    [core_events.Chronon(0.75) for _ in range(3)]
+                ),
+            ]
+        )
+        for nth_consecution, consecution in enumerate(event_to_convert):
+            for nth_chronon, chronon in enumerate(consecution):
+                chronon.hertz = 200 + (nth_chronon % 2) * 100
+                chronon.amplitude = 0.25
+                chronon.instrument = nth_consecution + 1
+        score_converter = csound_converters.EventToCsoundScore(
+            p1=lambda event: event.instrument,
+            p4=lambda event: event.hertz,
+            p5=lambda event: event.amplitude,
+        )
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path, score_converter
+        )
+        self.addCleanup(os.remove, self.score_path)
+        memoized_path = "{}/test_memoized.wav".format(FILE_PATH)
+        self.addCleanup(os.remove, memoized_path)
+
+        converter.convert(event_to_convert, self.soundfile_path, self.score_path)
+        expected_sample_array, expected_sample_rate = (
+            csound_converters.sound_files.read_wav(self.soundfile_path)
+        )
+        for stateful_instrument, render_count in (((), 4), ((2,), 3)):
+            render_result = converter.convert_memoized(
+                event_to_convert,
+                memoized_path,
+                stateful_instrument,
+                max_workers=2,
+                tail=0,
+            )
+            self.assertTrue(render_result.is_successful)
+            # Each unique note (and all notes of stateful instruments)
+            # are rendered once.
+            self.assertEqual(
+                render_result.stderr.count("errors in performance"), render_count
+            )
+            sample_array, sample_rate = csound_converters.sound_files.read_wav(
+                memoized_path
+            )
+            self.assertEqual(sample_rate, expected_sample_rate)
+            self.assertEqual(sample_array.shape, expected_sample_array.shape)
+            self.assertTrue(
+                np.allclose(sample_array, expected_sample_array, atol=2**-14)
+            )
+
+    def test_convert_memoized_with_custom_p3(self):
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path,
+            csound_converters.EventToCsoundScore(p3=lambda event: 2),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            note_list, _ = converter._write_note_score_list(
+                core_events.Consecution([core_events.Chronon(0.5) for _ in range(3)]),
+                directory,
+                (),
+                0.25,
+            )
+            self.assertEqual(len(note_list), 1)
+            score_path, absolute_entry_delay_list = note_list[0]
+            self.assertEqual(absolute_entry_delay_list, [0.0, 0.5, 1.0])
+            # The note is rendered until the end of its p3 and its tail.
+            with open(score_path, "r") as f:
+                self.assertEqual(f.readline(), "f 0 2.25\n")
+
+    def test_convert_sharded_with_custom_p3(self):
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path,
+            csound_converters.EventToCsoundScore(p3=lambda event: 2.5),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            shard_list = converter._write_shard_score_list(
+                core_events.Consecution([core_events.Chronon(1) for _ in range(4)]),
+                directory,
+                1,
+                None,
+                0,
+            )
+            # Notes ring 2.5 seconds: each shard starts to render 2.5 seconds
+            # before its window.
+            self.assertEqual(
+                [origin for _, _, origin, _ in shard_list], [0, 0, 0, 0.5]
+            )
+            with open(shard_list[-1][-1], "r") as f:
+                self.assertEqual(
+                    f.read().splitlines(),
+                    ["f 0 3.5", "i 1 0.5 2.5", "i 1 1.5 2.5", "i 1 2.5 2.5"],
+                )
+
+    def test_convert_sharded_with_custom_p2(self):
+        converter = csound_converters.EventToSoundFile(
+            self.orchestra_path,
+            csound_converters.EventToCsoundScore(p2=lambda event: 0),
+        )
+        self.assertRaises(
+            ValueError,
+            converter.convert_sharded,
+            self.event_to_convert,
+            self.soundfile_path,
+            1,
+        )
+
+
+class RenderResultTest(unittest.TestCase):
+    def test_error_and_warning_tuple(self):
+        render_result = csound_converters.RenderResult(
+            "test.wav",
+            "test.wav.sco",
+            1,
+            0.5,
+            stderr=(
+                "WARNING: could not open library\n"
+                "error: syntax error, unexpected NEWLINE  (token \"\")\n"
+                "INIT ERROR in instr 1 (opcode poscil3) line 5: table not found\n"
+                "1 errors in performance\n"
+            ),
+        )
+        self.assertEqual(
+            render_result.warning_tuple, ("WARNING: could not open library",)
+        )
+        self.assertEqual(len(render_result.error_tuple), 2)
+        self.assertFalse(render_result.is_successful)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,306 @@
+import importlib
+import importlib.util
+import os
+import re
+import tempfile
+import types
+import unittest
+import unittest.mock
+
+import numpy as np
+
+from mutwo import csound_converters
+
+pools = importlib.import_module("mutwo.csound_converters.pools")
+
+
+class CsoundStandIn(object):
+    """Stand-in for 'ctcsound.Csound' which counts compiled orchestras.
+
+    Each score is played as a constant signal until its 'f 0' statement.
+    Only for testing purposes.
+    """
+
+    def __init__(self):
+        self.compile_count = 0
+        self.option_list = []
+        self.killed_instrument_list = []
+        self.is_started = False
+        self.end = 0
+        self.time = 0
+        self._spout = np.zeros(4 * 2)
+
+    def setOption(self, option):
+        self.option_list.append(option)
+        return 0
+
+    def compileOrc(self, orchestra):
+        self.compile_count += 1
+        return 0
+
+    def start(self):
+        self.is_started = True
+        return 0
+
+    def rewindScore(self):
+        self.time = 0
+
+    def readScore(self, score):
+        if match := re.search(r"f 0 (\S+)", score):
+            self.end = float(match.group(1))
+        else:
+            # Like csound the end of scores which are read into a running
+            # instance isn't reported.
+            self.end = float("inf")
+        return 0
+
+    def spout(self):
+        return self._spout
+
+    def performKsmps(self):
+        if self.time >= self.end * self.sr():
+            return 1
+        self._spout[:] = 16384
+        self.time += 4
+        return 0
+
+    def killInstance(self, instr, instrName, mode, allowRelease):
+        self.killed_instrument_list.append(instrName or instr)
+        return 0
+
+    def sr(self):
+        return 100.0
+
+    def ksmps(self):
+        return 4
+
+    def nchnls(self):
+        return 2
+
+    def get0dBFS(self):
+        return 32768.0
+
+    def createMessageBuffer(self, _):
+        pass
+
+    def destroyMessageBuffer(self):
+        pass
+
+    def messageCnt(self):
+        return 0
+
+    def cleanup(self):
+        pass
+
+    def reset(self):
+        self.is_started = False
+        self.option_list = []
+
+
+class CsoundWorkerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.orchestra_path = os.path.join(self.directory.name, "test.orc")
+        with open(self.orchestra_path, "w") as f:
+            f.write("instr 1\nendin")
+        self.csound_worker_pool = csound_converters.CsoundWorkerPool(
+            self.orchestra_path, size=2, max_render_count=3, use_api=False
+        )
+        self.addCleanup(self.csound_worker_pool.close)
+
+    def test_init(self):
+        self.assertEqual(self.csound_worker_pool.size, 2)
+        self.assertEqual(self.csound_worker_pool.orchestra, "instr 1\nendin")
+        self.assertFalse(self.csound_worker_pool.use_api)
+
+    @unittest.skipIf(importlib.util.find_spec("ctcsound"), "ctcsound is installed")
+    def test_use_api_without_ctcsound(self):
+        self.assertRaises(
+            ImportError,
+            csound_converters.CsoundWorkerPool,
+            self.orchestra_path,
+            use_api=True,
+        )
+
+    def test_recycle_failed_worker(self):
+        csound_binary = csound_converters.configurations.CSOUND_BINARY
+        csound_converters.configurations.CSOUND_BINARY = os.path.join(
+            self.directory.name, "not_csound"
+        )
+        try:
+            for _ in range(3):
+                self.assertRaises(
+                    OSError, self.csound_worker_pool.render, "a.wav", "a.sco"
+                )
+            self.assertFalse(self.csound_worker_pool.check_health())
+        finally:
+            csound_converters.configurations.CSOUND_BINARY = csound_binary
+        self.assertEqual(self.csound_worker_pool.render_count, 3)
+        self.assertEqual(self.csound_worker_pool.recycle_count, 5)
+
+    def test_render_with_api(self):
+        csound_list = []
+
+        def make_csound():
+            csound_list.append(CsoundStandIn())
+            return csound_list[-1]
+
+        with unittest.mock.patch.object(
+            pools, "ctcsound", types.SimpleNamespace(Csound=make_csound)
+        ):
+            csound_worker_pool = csound_converters.CsoundWorkerPool(
+                self.orchestra_path, size=1, max_render_count=3, use_api=True
+            )
+            self.addCleanup(csound_worker_pool.close)
+            for duration in (1, 2, 0.4, 1):
+                path = os.path.join(self.directory.name, f"{duration}.wav")
+                self.assertEqual(
+                    csound_worker_pool.render(
+                        path,
+                        "",
+                        ("-d", "--format=float"),
+                        score_data=f"f 0 {duration}\ni 1 0 1\n".encode(),
+                    )[0],
+                    0,
+                )
+                sample_array, sample_rate = csound_converters.sound_files.read_wav(path)
+                self.assertEqual(sample_rate, 100)
+                self.assertEqual(sample_array.shape, (round(duration * 100), 2))
+                self.assertTrue(np.all(sample_array == 0.5))
+                self.assertEqual(
+                    csound_converters.sound_files.read_wav_format(path).sample_format,
+                    "float32",
+                )
+        # The first instance has been replaced after 3 renders.
+        self.assertEqual(len(csound_list), 2)
+        self.assertEqual(csound_worker_pool.recycle_count, 1)
+        # Each instance compiled the orchestra only once.
+        self.assertEqual([csound.compile_count for csound in csound_list], [1, 1])
+        self.assertEqual(csound_list[0].option_list, ["-n", "-d"])
+
+    def test_render_with_api_and_other_flags(self):
+        csound = CsoundStandIn()
+        with unittest.mock.patch.object(
+            pools, "ctcsound", types.SimpleNamespace(Csound=lambda: csound)
+        ):
+            csound_worker_pool = csound_converters.CsoundWorkerPool(
+                self.orchestra_path, size=1, use_api=True
+            )
+            self.addCleanup(csound_worker_pool.close)
+            self.assertTrue(csound_worker_pool.check_health())
+            for flag_tuple in ((), ("-d",), ("-d",)):
+                csound_worker_pool.render(
+                    os.path.join(self.directory.name, "a.wav"),
+                    "",
+                    flag_tuple,
+                    score_data=b"f 0 1\n",
+                )
+            self.assertEqual(csound.compile_count, 2)
+            self.assertRaises(
+                ValueError,
+                csound_worker_pool.render,
+                "a.aiff",
+                "",
+                ("--format=aiff",),
+                score_data=b"f 0 1\n",
+            )
+
+    def test_summarize_score(self):
+        self.assertEqual(
+            pools._summarize_score(
+                "; comment\nf 1 0 8192 10 1\ni 1 0 1.5 ; note\ni 2 + 2\n"
+                'i "synth" . .\n#define MUTWO_REPEAT_1 #\ni 3 0 1\ni 3 1 0.5\n#\n'
+                "b 10\n$MUTWO_REPEAT_1.\nb 0\ni -1 0 0\nf 0 4\n"
+            ),
+            (11.5, {1, 2, 3, "synth"}),
+        )
+        # Tempo statements and expressions change the timing.
+        self.assertIsNone(pools._summarize_score("t 0 120\ni 1 0 1\n"))
+        self.assertIsNone(pools._summarize_score("i 1 [1 + 1] 1\n"))
+
+    def test_render_with_api_without_end_of_score(self):
+        csound = CsoundStandIn()
+        with unittest.mock.patch.object(
+            pools, "ctcsound", types.SimpleNamespace(Csound=lambda: csound)
+        ):
+            csound_worker_pool = csound_converters.CsoundWorkerPool(
+                self.orchestra_path, size=1, use_api=True, release_duration=0.5
+            )
+            self.addCleanup(csound_worker_pool.close)
+            for score, frame_count, killed_instrument_list in (
+                # (1.52 + 0.5) seconds, rounded up to the next block
+                ("i 1 0 1\ni 2 0.5 1.02\n", 204, [1, 2]),
+                ('i "synth" 0 0.5\n', 100, ["synth"]),
+            ):
+                path = os.path.join(self.directory.name, "a.wav")
+                csound.killed_instrument_list.clear()
+                self.assertEqual(
+                    csound_worker_pool.render(path, "", score_data=score.encode())[0],
+                    0,
+                )
+                # The render stops after the last note and its release and
+                # all notes are turned off afterwards.
+                self.assertEqual(
+                    csound_converters.sound_files.read_wav_format(path).frame_count,
+                    frame_count,
+                )
+                self.assertEqual(
+                    sorted(csound.killed_instrument_list), killed_instrument_list
+                )
+            # Scores with unknown timing are rendered with a subprocess.
+            with unittest.mock.patch.object(
+                pools._CsoundWorker,
+                "_render_with_subprocess",
+                return_value=(0, "", ""),
+            ) as render_with_subprocess:
+                csound_worker_pool.render(path, "", score_data=b"t 0 120\n")
+            render_with_subprocess.assert_called_once()
+
+    @unittest.skipUnless(importlib.util.find_spec("ctcsound"), "needs ctcsound")
+    def test_render_with_ctcsound(self):
+        with open(self.orchestra_path, "w") as f:
+            f.write(
+                "sr=44100\nksmps=32\n0dbfs=1\nnchnls=1\n"
+                "instr 1\nasig init p4\nout asig\nendin\n"
+            )
+        with csound_converters.CsoundWorkerPool(
+            self.orchestra_path, size=1, use_api=True, release_duration=0
+        ) as csound_worker_pool:
+            path_list = []
+            # The long note of the first render mustn't sound in the
+            # second render.
+            for nth_render, score in enumerate(
+                ("i 1 0 0.5 0.5\ni 1 0.5 -1 0.25\nf 0 1\n", "i 1 0 0.5 0.125\n")
+            ):
+                path_list.append(os.path.join(self.directory.name, f"{nth_render}.wav"))
+                self.assertEqual(
+                    csound_worker_pool.render(
+                        path_list[-1], "", ("-f",), score_data=score.encode()
+                    )[0],
+                    0,
+                )
+        sample_array, sample_rate = csound_converters.sound_files.read_wav(path_list[1])
+        self.assertEqual(sample_rate, 44100)
+        self.assertLessEqual(abs(len(sample_array) - 22050), 32)
+        self.assertTrue(np.allclose(sample_array[100:-100], 0.125))
+
+    def test_close(self):
+        self.csound_worker_pool.close()
+        self.assertTrue(self.csound_worker_pool.is_closed)
+        self.assertRaises(
+            RuntimeError, self.csound_worker_pool.render, "a.wav", "a.sco"
+        )
+
+    def test_event_to_sound_file_with_other_orchestra(self):
+        self.assertRaises(
+            ValueError,
+            csound_converters.EventToSoundFile,
+            "other.orc",
+            csound_converters.EventToCsoundScore(),
+            worker_pool=self.csound_worker_pool,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+
+from mutwo import csound_converters
+
+
+class SoundFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.wav")
+        self.sample_array = np.sin(np.linspace(0, 20, 1001)).reshape(-1, 1) * 0.5
+        self.sample_array = np.concatenate(
+            (self.sample_array, -self.sample_array), axis=1
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_and_read_wav(self):
+        for sample_format, tolerance in (
+            ("uint8", 2**-7),
+            ("int16", 2**-15),
+            ("int24", 2**-23),
+            ("int32", 2**-31),
+            ("float32", 1e-7),
+            ("float64", 0),
+        ):
+            csound_converters.sound_files.write_wav(
+                self.path, self.sample_array, 48000, sample_format
+            )
+            wav_format = csound_converters.sound_files.read_wav_format(self.path)
+            self.assertEqual(
+                wav_format[:3], (48000, 2, sample_format), msg=sample_format
+            )
+            self.assertEqual(wav_format.frame_count, 1001)
+            sample_array, sample_rate = csound_converters.sound_files.read_wav(
+                self.path
+            )
+            self.assertEqual(sample_rate, 48000)
+            self.assertTrue(
+                np.allclose(sample_array, self.sample_array, atol=tolerance),
+                msg=sample_format,
+            )
+
+    def test_write_wav_readable_by_wave_module(self):
+        csound_converters.sound_files.write_wav(
+            self.path, self.sample_array[:, 0], 44100, "int24"
+        )
+        with wave.open(self.path) as f:
+            self.assertEqual(f.getnchannels(), 1)
+            self.assertEqual(f.getsampwidth(), 3)
+            self.assertEqual(f.getnframes(), 1001)
+
+    def test_write_wav_blocks(self):
+        # An odd number of 24 bit samples needs a padding byte.
+        self.assertEqual(
+            csound_converters.sound_files.write_wav_blocks(
+                self.path,
+                (
+                    self.sample_array[start : start + 100]
+                    for start in range(0, 1001, 100)
+                ),
+                2,
+                44100,
+                "int24",
+            ),
+            1001,
+        )
+        with wave.open(self.path) as f:
+            self.assertEqual(f.getnchannels(), 2)
+            self.assertEqual(f.getnframes(), 1001)
+        sample_array, _ = csound_converters.sound_files.read_wav(self.path)
+        self.assertTrue(np.allclose(sample_array, self.sample_array, atol=2**-23))
+
+    def test_write_wav_header_of_big_file(self):
+        # 2 ** 30 stereo frames of 32 bit samples need 8 GiB.
+        with open(self.path, "wb") as f:
+            csound_converters.sound_files._write_wav_header(
+                f, 2**30, 2, 48000, "float32"
+            )
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(4), b"RF64")
+        wav_format = csound_converters.sound_files.read_wav_format(self.path)
+        self.assertEqual(wav_format[:3], (48000, 2, "float32"))
+        self.assertEqual(wav_format.frame_count, 2**30)
+        self.assertEqual(wav_format.data_offset, os.path.getsize(self.path))
+
+        # Headers with a reserved 'ds64' chunk always have the same size.
+        with open(self.path, "wb") as f:
+            csound_converters.sound_files._write_wav_header(
+                f, 1001, 2, 48000, "float32", True
+            )
+        self.assertEqual(wav_format.data_offset, os.path.getsize(self.path))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(4), b"RIFF")
+        self.assertEqual(
+            csound_converters.sound_files.read_wav_format(self.path).frame_count,
+            1001,
+        )
+
+    def test_memory_map_wav(self):
+        csound_converters.sound_files.write_wav(
+            self.path, self.sample_array, 48000, "float32"
+        )
+        sample_array, sample_rate = csound_converters.sound_files.memory_map_wav(
+            self.path
+        )
+        self.assertEqual(sample_rate, 48000)
+        self.assertIsInstance(sample_array, np.memmap)
+        self.assertEqual(sample_array.dtype, np.float32)
+        self.assertEqual(sample_array.shape, (1001, 2))
+        self.assertTrue(np.allclose(sample_array, self.sample_array, atol=1e-7))
+        del sample_array
+
+        csound_converters.sound_files.write_wav(
+            self.path, self.sample_array, 48000, "int24"
+        )
+        self.assertRaises(
+            ValueError, csound_converters.sound_files.memory_map_wav, self.path
+        )
+
+    def test_create_wav(self):
+        sample_array = csound_converters.sound_files.create_wav(
+            self.path, 1001, 2, 48000
+        )
+        self.assertIsInstance(sample_array, np.memmap)
+        self.assertEqual(sample_array.dtype, np.float32)
+        self.assertEqual(sample_array.shape, (1001, 2))
+        self.assertFalse(np.any(sample_array))
+        sample_array[:] += self.sample_array
+        sample_array.flush()
+        del sample_array
+        sample_array, sample_rate = csound_converters.sound_files.read_wav(self.path)
+        self.assertEqual(sample_rate, 48000)
+        self.assertTrue(np.allclose(sample_array, self.sample_array, atol=1e-7))
+
+        # Mapped arrays can be written to another WAV file.
+        sample_array, _ = csound_converters.sound_files.memory_map_wav(self.path)
+        other_path = os.path.join(self.directory.name, "other.wav")
+        csound_converters.sound_files.write_wav(
+            other_path, sample_array, 48000, "int24"
+        )
+        del sample_array
+        sample_array, _ = csound_converters.sound_files.read_wav(other_path)
+        self.assertTrue(np.allclose(sample_array, self.sample_array, atol=2**-23))
+
+        self.assertRaises(
+            ValueError,
+            csound_converters.sound_files.create_wav,
+            self.path,
+            1001,
+            2,
+            48000,
+            "int24",
+        )
+
+    def test_read_wav_with_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"RIFF\0\0\0\0AIFF")
+        self.assertRaises(
+            ValueError, csound_converters.sound_files.read_wav_format, self.path
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import socket
+import threading
+import time
+import unittest
+
+from mutwo import core_events
+from mutwo import csound_converters
+
+
+class UdpReceiver(object):
+    """Stand-in for the UDP server of csound which records all messages."""
+
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.05)
+        self.port = self.socket.getsockname()[1]
+        self.message_list = []
+        self._is_running = True
+        self._thread = threading.Thread(target=self._receive)
+        self._thread.start()
+
+    def _receive(self):
+        while self._is_running:
+            try:
+                data = self.socket.recv(4096)
+            except socket.timeout:
+                continue
+            self.message_list.append((time.monotonic(), data.decode()))
+
+    def close(self):
+        self._is_running = False
+        self._thread.join()
+        self.socket.close()
+
+
+class ApiStandIn(object):
+    """Stand-in for a ctcsound.Csound instance."""
+
+    def __init__(self):
+        self.message_list = []
+
+    def inputMessage(self, message):
+        self.message_list.append((time.monotonic(), message))
+
+
+class EventToCsoundStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.event_to_convert = core_events.Concurrence(
+            [
+                core_events.Consecution(
+                    [core_events.Chronon(0.04) for _ in range(5)]
+                ),
+                core_events.Consecution(
+                    [core_events.Chronon(0.05) for _ in range(2)]
+                ),
+            ]
+        )
+        self.event_to_csound_score = csound_converters.EventToCsoundScore(
+            p4=lambda event: "a b"
+        )
+
+    def test_convert_with_udp_transport(self):
+        receiver = UdpReceiver()
+        try:
+            with csound_converters.CsoundUdpTransport(receiver.port) as transport:
+                converter = csound_converters.EventToCsoundStream(
+                    self.event_to_csound_score, transport, lookahead=0.02
+                )
+                start_time = time.monotonic() + 0.05
+                report = converter.convert(self.event_to_convert, start_time)
+            time.sleep(0.05)
+        finally:
+            receiver.close()
+
+        self.assertEqual(report.line_count, 7)
+        self.assertEqual(report.dropped_line_count, 0)
+        self.assertIs(converter.report, report)
+        self.assertEqual(len(receiver.message_list), 7)
+        expected_start_time_list = sorted(
+            [0, 0.04, 0.08, 0.12, 0.16] + [0, 0.05]
+        )
+        for (receive_time, message), expected_start_time in zip(
+            receiver.message_list, expected_start_time_list
+        ):
+            self.assertTrue(message.startswith("$i 1 "))
+            # Strings with spaces are kept.
+            self.assertTrue(message.endswith(' "a b"'))
+            p2 = float(message.split()[2])
+            self.assertLessEqual(p2, 0.02)
+            # p2 always points to the planned start time.
+            self.assertAlmostEqual(
+                receive_time + p2, start_time + expected_start_time, delta=0.02
+            )
+        self.assertGreaterEqual(report.max_lateness, report.mean_lateness)
+        self.assertGreaterEqual(report.jitter, 0)
+
+    def test_convert_with_api_transport(self):
+        csound = ApiStandIn()
+        converter = csound_converters.EventToCsoundStream(
+            self.event_to_csound_score,
+            csound_converters.CsoundApiTransport(csound),
+            lookahead=0.01,
+        )
+        converter.convert(self.event_to_convert)
+        self.assertEqual(len(csound.message_list), 7)
+        self.assertTrue(all(message[1][0] == "i" for message in csound.message_list))
+
+    def test_convert_deeply_nested_event(self):
+        # Much deeper than the recursion limit.
+        level_count = 5000
+        event_to_convert = core_events.Chronon(0.00001)
+        for _ in range(level_count):
+            event_to_convert = core_events.Consecution(
+                [event_to_convert, core_events.Chronon(0.00001)]
+            )
+        csound = ApiStandIn()
+        report = csound_converters.EventToCsoundStream(
+            csound_converters.EventToCsoundScore(),
+            csound_converters.CsoundApiTransport(csound),
+            lookahead=1,
+        ).convert(event_to_convert)
+        self.assertEqual(report.line_count, level_count + 1)
+        self.assertEqual(len(csound.message_list), level_count + 1)
+
+    def test_convert_with_max_lateness(self):
+        csound = ApiStandIn()
+        converter = csound_converters.EventToCsoundStream(
+            self.event_to_csound_score,
+            csound_converters.CsoundApiTransport(csound),
+            lookahead=0,
+            max_lateness=0.01,
+        )
+        # The event started 0.1 seconds ago: only lines which start
+        # later can be sent.
+        report = converter.convert(self.event_to_convert, time.monotonic() - 0.1)
+        self.assertEqual((report.line_count, report.dropped_line_count), (2, 5))
+
+    def test_stop(self):
+        csound = ApiStandIn()
+        converter = csound_converters.EventToCsoundStream(
+            self.event_to_csound_score,
+            csound_converters.CsoundApiTransport(csound),
+            lookahead=0,
+        )
+        threading.Timer(0.02, converter.stop).start()
+        start = time.monotonic()
+        converter.convert(
+            core_events.Consecution([core_events.Chronon(1) for _ in range(5)])
+        )
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(csound.message_list), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()